@@ -0,0 +1,625 @@
+"""
+Mergeable count aggregates behind the Netflix analysis figure
+Each chunk of the catalog folds into a CatalogAggregates; partials from different chunks add up
+"""
+
+import copy
+import time
+import numpy as np
+import pandas as pd
+from data_loader import add_derived_columns
+from multivalue import CatalogTokens
+from count_cube import CountCube, _dimension_codes, MAX_DENSE_CELLS
+from cooccurrence import CollaborationGraph
+from sketches import SpaceSaving
+from profiling import stage
+
+# Every aggregate is a pandas Series of int64 counts keyed by value (or a MultiIndex for 2-D counts)
+COUNT_FIELDS = [
+    'type_counts',
+    'rating_counts',
+    'country_counts',
+    'country_type_counts',
+    'director_counts',
+    'director_cast_counts',
+    'genre_counts',
+    'genre_year_counts',
+    'release_year_counts',
+    'monthly_additions',
+    'month_counts',
+    'rating_type_counts',
+    'movie_minutes_counts',
+    'movie_year_minutes_counts',
+    'show_seasons_counts',
+]
+
+# Columns summarized by sketches in approximate mode, and the count field each sketch fills
+# (cast has no exact aggregate; its sketch is read through agg.sketches['cast'])
+SKETCHED_COLUMNS = {
+    'director': 'director_counts',
+    'country': 'country_counts',
+    'cast': None,
+}
+
+# Director-cast pairs kept for the collaborations panel; the pairs live in a Space-Saving summary of
+# this capacity, so the merged aggregate stays bounded however many people the catalog credits
+MAX_COLLABORATION_PAIRS = 1000
+
+# Marks drawn per distinct value by strip/jitter plots; beyond this the strip is saturated
+MAX_POINTS_PER_VALUE = 2000
+
+def _plain_index(counts):
+    """Drop empty categories and convert categorical (or Arrow string) index levels to plain values"""
+    counts = counts[counts > 0].astype('int64')
+    if isinstance(counts.index, pd.MultiIndex):
+        counts.index = pd.MultiIndex.from_arrays(
+            [np.asarray(counts.index.get_level_values(i), dtype=object) for i in range(counts.index.nlevels)],
+            names=counts.index.names)
+    elif isinstance(counts.index.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+        counts.index = pd.Index(np.asarray(counts.index, dtype=object), name=counts.index.name)
+    return counts
+
+def _value_counts(series):
+    """Count non-null values of a column"""
+    return _plain_index(series.value_counts())
+
+def _group_counts(df, columns):
+    """Count rows per combination of non-null values in several columns"""
+    subset = df[columns].dropna()
+    if subset.empty:
+        return pd.Series(dtype='int64')
+    return _plain_index(subset.groupby(columns, observed=True).size())
+
+class CatalogAggregates:
+    """Count aggregates for one chunk of the catalog, or several merged chunks"""
+
+    def __init__(self):
+        self.rows = 0
+        # Seconds spent computing each aggregate (summed over merged chunks)
+        self.timings = {}
+        # Approximate mode only: column -> ColumnSketch
+        self.sketches = {}
+        # CountCube behind the type/rating/country/year/month counts, for ad-hoc filtered views
+        self.cube = None
+        # SpaceSaving of director-cast pair counts; director_cast_counts holds its monitored pairs
+        self.collaborations = None
+        for field in COUNT_FIELDS:
+            setattr(self, field, pd.Series(dtype='int64'))
+
+    def merge(self, other):
+        """Add another partial into this one in place and return self"""
+        self.rows += other.rows
+        for field, seconds in other.timings.items():
+            self.timings[field] = self.timings.get(field, 0.0) + seconds
+        if other.cube is not None:
+            self.cube = other.cube.copy() if self.cube is None else self.cube.merge(other.cube)
+        sketched_fields = {'director_cast_counts'}
+        if other.collaborations is not None:
+            if self.collaborations is None:
+                self.collaborations = copy.deepcopy(other.collaborations)
+            else:
+                self.collaborations.merge(other.collaborations)
+            counts = self.collaborations.counts
+            if isinstance(counts.index, pd.MultiIndex):
+                counts = counts.rename_axis(['director', 'cast'])
+            self.director_cast_counts = counts
+        for column, sketch in other.sketches.items():
+            if column in self.sketches:
+                self.sketches[column].merge(sketch)
+            else:
+                self.sketches[column] = copy.deepcopy(sketch)
+            field = SKETCHED_COLUMNS.get(column)
+            if field:
+                setattr(self, field, self.sketches[column].top_counts())
+                sketched_fields.add(field)
+        for field in COUNT_FIELDS:
+            if field in sketched_fields:
+                continue
+            mine, theirs = getattr(self, field), getattr(other, field)
+            if theirs.empty:
+                continue
+            merged = theirs.copy() if mine.empty else mine.add(theirs, fill_value=0)
+            setattr(self, field, merged.astype('int64').sort_index())
+        return self
+
+    def count_of(self, field, value):
+        """Count for one value of an aggregate, 0 when absent"""
+        counts = getattr(self, field)
+        return int(counts.get(value, 0))
+
+    def released_since(self, year):
+        """Number of titles released in or after the given year"""
+        counts = self.release_year_counts
+        return int(counts[counts.index.astype(float) >= year].sum())
+
+    def yearly_additions(self):
+        """Titles added per calendar year"""
+        monthly = self.monthly_additions
+        if monthly.empty:
+            return monthly
+        return monthly.groupby(monthly.index.year).sum()
+
+    def movie_duration_mean(self):
+        """Mean movie duration in minutes"""
+        counts = self.movie_minutes_counts
+        if counts.sum() == 0:
+            return float('nan')
+        return float(np.average(counts.index.astype(float), weights=counts.values))
+
+    def print_sketches(self, k=5):
+        """Print distinct counts and heavy hitters of the sketched columns with their error bounds"""
+        for column, sketch in self.sketches.items():
+            bounds = sketch.error_bounds()
+            print(f"🔎 {column}: ~{sketch.distinct_count():,} distinct "
+                  f"(±{bounds['distinct_relative_error']:.1%}), counts overestimated by at most "
+                  f"{bounds['count_overestimate']:,.0f}")
+            for value, count in sketch.top_counts(k).items():
+                print(f"   {value:<40}~{count:,}")
+
+    def print_timings(self):
+        """Print the per-aggregate timing breakdown"""
+        total = sum(self.timings.values())
+        print(f"⏱️ Aggregates computed in {total:.3f}s")
+        for field, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            share = seconds / total * 100 if total else 0.0
+            print(f"   {field:<28}{seconds:8.4f}s {share:5.1f}%")
+
+# (aggregate, columns it needs) in computation order; aggregates whose columns are missing are skipped
+AGGREGATE_STEPS = [
+    ('type_counts', ['type']),
+    ('rating_counts', ['rating']),
+    ('country_counts', ['country']),
+    ('country_type_counts', ['country', 'type']),
+    ('director_counts', ['director']),
+    ('director_cast_counts', ['director', 'cast']),
+    ('release_year_counts', ['release_year']),
+    ('rating_type_counts', ['rating', 'type']),
+    ('genre_counts', ['listed_in']),
+    ('genre_year_counts', ['listed_in', 'release_year']),
+    ('monthly_additions', ['date_added']),
+    ('month_counts', ['date_added']),
+    ('movie_minutes_counts', ['type', 'duration']),
+    ('movie_year_minutes_counts', ['type', 'duration', 'release_year']),
+    ('show_seasons_counts', ['type', 'duration']),
+]
+
+class AggregationEngine:
+    """Computes every statistic the panels and insights read in one pass over a DataFrame
+
+    The result is memoized: run() returns the same CatalogAggregates on every call, and shared
+    intermediates (type masks, the genre index, the count cube) are built once. The type, rating,
+    country, release-year and date-added counts are slices of the CountCube; a cube read from the
+    dataset cache can be passed in so it is not rebuilt. With a SketchConfig the director,
+    country and cast counts also feed bounded-memory sketches and the count fields hold their
+    heavy hitters.
+    """
+
+    def __init__(self, df, tokens=None, sketch_config=None, cube=None):
+        self.df = df
+        self.tokens = tokens if tokens is not None else CatalogTokens(df)
+        self.sketch_config = sketch_config
+        self._cube = cube
+        self._graph = None
+        self._result = None
+        self._movie_rows = None
+
+    def run(self):
+        """Compute (once) and return the aggregates"""
+        if self._result is not None:
+            return self._result
+        add_derived_columns(self.df)
+        agg = CatalogAggregates()
+        agg.rows = len(self.df)
+        start = time.perf_counter()
+        agg.cube = self.cube()
+        agg.timings['count_cube'] = time.perf_counter() - start
+        columns = set(self.df.columns)
+        for field, needed in AGGREGATE_STEPS:
+            if not set(needed) <= columns:
+                continue
+            start = time.perf_counter()
+            with stage(field):
+                setattr(agg, field, getattr(self, '_' + field)())
+            agg.timings[field] = time.perf_counter() - start
+        if 'director_cast_counts' in agg.timings:
+            agg.collaborations = SpaceSaving(MAX_COLLABORATION_PAIRS).update(agg.director_cast_counts)
+        if self.sketch_config is not None:
+            self._sketch(agg)
+        self._result = agg
+        return agg
+
+    def _sketch(self, agg):
+        """Fold this DataFrame's exact counts into fresh sketches and keep only their heavy hitters"""
+        for column, field in SKETCHED_COLUMNS.items():
+            if column not in self.df.columns:
+                continue
+            start = time.perf_counter()
+            with stage(f'{column}_sketch'):
+                counts = getattr(agg, field) if field else self.tokens.counts(column)
+                agg.sketches[column] = self.sketch_config.new_sketch().update(counts)
+                if field:
+                    setattr(agg, field, agg.sketches[column].top_counts())
+            agg.timings[f'{column}_sketch'] = time.perf_counter() - start
+
+    def cube(self):
+        """Count cube of the DataFrame, built once"""
+        if self._cube is None:
+            add_derived_columns(self.df)
+            with stage('count_cube'):
+                self._cube = CountCube.from_frame(self.df, self.tokens)
+        return self._cube
+
+    def collaboration_graph(self):
+        """Sparse title x person incidence of the cast and director columns, built once"""
+        if self._graph is None:
+            with stage('collaboration_graph'):
+                self._graph = CollaborationGraph.from_frame(self.df, self.tokens)
+        return self._graph
+
+    def slice_aggregates(self, row_sets):
+        """CatalogAggregates of each row subset of the DataFrame, computed together (see SliceAggregator)"""
+        return SliceAggregator(self, row_sets).run()
+
+    def movie_rows(self):
+        """Boolean mask of movie rows, computed once"""
+        if self._movie_rows is None:
+            self._movie_rows = (self.df['type'] == 'Movie').to_numpy(dtype=bool)
+        return self._movie_rows
+
+    def _type_counts(self):
+        return self.cube().counts('type')
+
+    def _rating_counts(self):
+        return self.cube().counts('rating')
+
+    def _country_counts(self):
+        return self.cube().counts('country').sort_values(ascending=False, kind='stable')
+
+    def _country_type_counts(self):
+        return self.cube().counts('country', 'type')
+
+    def _director_counts(self):
+        return _value_counts(self.df['director'])
+
+    def _director_cast_counts(self):
+        return self.collaboration_graph().pair_counts('director', 'cast', limit=MAX_COLLABORATION_PAIRS)
+
+    def _release_year_counts(self):
+        return self.cube().counts('release_year')
+
+    def _rating_type_counts(self):
+        return self.cube().counts('rating', 'type')
+
+    def _genre_counts(self):
+        return _plain_index(self.tokens.genre_index().counts())
+
+    def _genre_year_counts(self):
+        return _plain_index(self.tokens.genre_index().cross_counts(self.df['release_year']))
+
+    def _monthly_additions(self):
+        return _monthly_series(self.cube().counts('year_added', 'month_added'))
+
+    def _month_counts(self):
+        return self.cube().counts('month_added')
+
+    def _movie_minutes_counts(self):
+        return _value_counts(self.df.loc[self.movie_rows(), 'duration_minutes'])
+
+    def _movie_year_minutes_counts(self):
+        return _group_counts(self.df.loc[self.movie_rows(), ['release_year', 'duration_minutes']],
+                             ['release_year', 'duration_minutes'])
+
+    def _show_seasons_counts(self):
+        return _value_counts(self.df.loc[self.df['type'] == 'TV Show', 'duration_seasons'])
+
+def _monthly_series(counts):
+    """Titles added per month, indexed by period, from counts by (year added, month added)"""
+    months = pd.to_datetime(pd.DataFrame({'year': counts.index.get_level_values(0),
+                                          'month': counts.index.get_level_values(1), 'day': 1}))
+    index = pd.PeriodIndex(months.dt.to_period('M'), name='date_added_clean')
+    return pd.Series(counts.values, index=index, name='count')
+
+def _by_count(counts):
+    """Most common first; ties stay in index order"""
+    return counts.sort_index().sort_values(ascending=False, kind='stable')
+
+class SliceAggregator:
+    """Aggregates of many row subsets (slices) of one catalog, with one grouped pass per aggregate
+
+    Each aggregate counts the catalog's shared codes (cube dimensions, tokenized genres and
+    countries, the collaboration graph) by (slice, value) over the slices' row memberships, so
+    nothing is re-tokenized or rebuilt per slice. The results match an AggregationEngine run over
+    each slice's rows.
+    """
+
+    def __init__(self, engine, row_sets):
+        self.engine = engine
+        self.df = engine.df
+        add_derived_columns(self.df)
+        self.row_sets = [np.asarray(rows, dtype=np.int64) for rows in row_sets]
+        rows = np.concatenate(self.row_sets) if self.row_sets else np.empty(0, dtype=np.int64)
+        slice_ids = np.repeat(np.arange(len(self.row_sets)), [len(rows) for rows in self.row_sets])
+        # Row -> slices it belongs to, CSR layout
+        self._member_slices = slice_ids[np.argsort(rows, kind='stable')]
+        self._member_offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(self.df)))])
+        # Rows in at least one slice; nothing else is read
+        self._rows = np.flatnonzero(np.diff(self._member_offsets))
+        self._codes = {}
+
+    def run(self):
+        """One CatalogAggregates per row set, in order"""
+        results = [CatalogAggregates() for _ in self.row_sets]
+        for agg, rows in zip(results, self.row_sets):
+            agg.rows = len(rows)
+        columns = set(self.df.columns)
+        for field, needed in AGGREGATE_STEPS:
+            if not set(needed) <= columns:
+                continue
+            start = time.perf_counter()
+            with stage(f'slice {field}'):
+                for agg, counts in zip(results, getattr(self, '_' + field)()):
+                    setattr(agg, field, counts)
+            seconds = (time.perf_counter() - start) / max(len(results), 1)
+            for agg in results:
+                agg.timings[field] = seconds
+        for agg in results:
+            if 'director_cast_counts' in agg.timings:
+                agg.collaborations = SpaceSaving(MAX_COLLABORATION_PAIRS).update(agg.director_cast_counts)
+        return results
+
+    def _expand(self, rows):
+        """(position in rows, slice) of every slice membership of the given rows"""
+        starts = self._member_offsets[rows]
+        per_row = self._member_offsets[rows + 1] - starts
+        entries = np.repeat(np.arange(len(rows)), per_row)
+        offsets = np.arange(len(entries)) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+        return entries, self._member_slices[starts[entries] + offsets]
+
+    def _group(self, rows, codes, levels, name='count'):
+        """Per-slice counts of (row, value codes) entries, as one Series per slice
+
+        codes are aligned with rows (-1 = missing, left out) and index into levels.
+        """
+        present = np.ones(len(rows), dtype=bool)
+        for level_codes in codes:
+            present &= level_codes >= 0
+        entries, slices = self._expand(rows[present])
+        codes = [level_codes[present][entries].astype(np.int64) for level_codes in codes]
+        sizes = [len(level) for level in levels]
+        n_slices = len(self.row_sets)
+        n_cells = float(np.prod(sizes, dtype=np.float64))
+        if n_slices * n_cells < 2 ** 63:
+            cells = np.zeros(len(slices), dtype=np.int64)
+            for level_codes, size in zip(codes, sizes):
+                cells = cells * size + level_codes
+            keys = slices * int(n_cells) + cells
+            if n_slices * n_cells <= MAX_DENSE_CELLS:
+                counts = np.bincount(keys, minlength=int(n_slices * n_cells))
+                keys = np.flatnonzero(counts)
+                counts = counts[keys]
+            else:
+                keys, counts = np.unique(keys, return_counts=True)
+            slices, cells = np.divmod(keys, int(n_cells))
+            codes = np.unravel_index(cells, sizes)
+        else:
+            # Too many cells for one int64 key: group the (slice, codes) rows directly
+            distinct, counts = np.unique(np.column_stack([slices] + codes), axis=0, return_counts=True)
+            slices, codes = distinct[:, 0], list(distinct[:, 1:].T)
+
+        bounds = np.searchsorted(slices, np.arange(n_slices + 1))
+        results = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            values = [level[level_codes[start:stop]] for level, level_codes in zip(levels, codes)]
+            index = values[0] if len(values) == 1 else pd.MultiIndex.from_arrays(values)
+            results.append(pd.Series(counts[start:stop].astype(np.int64), index=index, name=name))
+        return results
+
+    def _column_codes(self, dimension):
+        """Row-aligned codes and values of a cube dimension (or any column), computed once"""
+        if dimension not in self._codes:
+            if dimension in ('type', 'rating', 'release_year', 'year_added', 'month_added'):
+                self._codes[dimension] = _dimension_codes(self.df, dimension)
+            else:
+                codes, levels = pd.factorize(self.df[dimension])
+                self._codes[dimension] = codes, pd.Index(levels, name=dimension)
+        return self._codes[dimension]
+
+    def _by(self, *dimensions, rows=None):
+        """Per-slice counts by row-aligned dimensions, sorted by value"""
+        rows = self._rows if rows is None else rows
+        codes, levels = zip(*(self._column_codes(dimension) for dimension in dimensions))
+        results = self._group(rows, [level_codes[rows] for level_codes in codes], levels)
+        for counts in results:
+            counts.index.names = list(dimensions)
+        return [counts.sort_index() for counts in results]
+
+    def _by_tokens(self, index, *dimensions):
+        """Per-slice counts by a token index (genres, countries) and row-aligned dimensions"""
+        member = np.diff(self._member_offsets)[index.row_ids] > 0
+        rows, token_codes = index.row_ids[member], index.codes[member]
+        codes, levels = [token_codes], [index.values]
+        for dimension in dimensions:
+            level_codes, level = self._column_codes(dimension)
+            codes.append(level_codes[rows])
+            levels.append(level)
+        results = self._group(rows, codes, levels)
+        for counts in results:
+            counts.index.names = [index.values.name] + list(dimensions)
+        return results
+
+    def _type_counts(self):
+        return self._by('type')
+
+    def _rating_counts(self):
+        return self._by('rating')
+
+    def _country_counts(self):
+        return [_by_count(counts) for counts in self._by_tokens(self.engine.tokens.country_index())]
+
+    def _country_type_counts(self):
+        return [counts.sort_index() for counts in self._by_tokens(self.engine.tokens.country_index(), 'type')]
+
+    def _director_counts(self):
+        return [_by_count(_plain_index(counts)) for counts in self._by('director')]
+
+    def _director_cast_counts(self):
+        graph = self.engine.collaboration_graph()
+        if 'director' not in graph.incidence or 'cast' not in graph.incidence:
+            return [graph.pair_counts('director', 'cast') for _ in self.row_sets]
+        directors, cast = graph.incidence['director'], graph.incidence['cast']
+        rows = self._rows
+        # Every (director, cast member) pair credited on each row
+        n_directors, n_cast = np.diff(directors.indptr)[rows], np.diff(cast.indptr)[rows]
+        per_row = n_directors * n_cast
+        pair = np.arange(per_row.sum()) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+        row_cast = np.repeat(n_cast, per_row)
+        director_codes = directors.indices[np.repeat(directors.indptr[rows], per_row) + pair // row_cast]
+        cast_codes = cast.indices[np.repeat(cast.indptr[rows], per_row) + pair % row_cast]
+        results = self._group(np.repeat(rows, per_row), [director_codes, cast_codes],
+                              [graph.people, graph.people], name='titles')
+        for counts in results:
+            counts.index.names = ['director', 'cast']
+        # Strongest pairs first, ties by position in the people index (like pair_counts)
+        return [counts.sort_values(ascending=False, kind='stable').head(MAX_COLLABORATION_PAIRS)
+                for counts in results]
+
+    def _release_year_counts(self):
+        return self._by('release_year')
+
+    def _rating_type_counts(self):
+        return self._by('rating', 'type')
+
+    def _genre_counts(self):
+        return [_by_count(_plain_index(counts)) for counts in self._by_tokens(self.engine.tokens.genre_index())]
+
+    def _genre_year_counts(self):
+        return [_plain_index(counts).sort_index()
+                for counts in self._by_tokens(self.engine.tokens.genre_index(), 'release_year')]
+
+    def _monthly_additions(self):
+        return [_monthly_series(counts) for counts in self._by('year_added', 'month_added')]
+
+    def _month_counts(self):
+        return self._by('month_added')
+
+    def _typed_rows(self, value):
+        return self._rows[(self.df['type'].to_numpy(dtype=object)[self._rows] == value)]
+
+    def _movie_minutes_counts(self):
+        return [_by_count(_plain_index(counts))
+                for counts in self._by('duration_minutes', rows=self._typed_rows('Movie'))]
+
+    def _movie_year_minutes_counts(self):
+        # Unnamed, like a groupby size
+        return [_plain_index(counts).sort_index().rename(None) if len(counts) else pd.Series(dtype='int64')
+                for counts in self._by('release_year', 'duration_minutes', rows=self._typed_rows('Movie'))]
+
+    def _show_seasons_counts(self):
+        return [_by_count(_plain_index(counts))
+                for counts in self._by('duration_seasons', rows=self._typed_rows('TV Show'))]
+
+def compute_aggregates(df, tokens=None, sketch_config=None):
+    """Fold a DataFrame (the whole catalog or one chunk) into a CatalogAggregates"""
+    return AggregationEngine(df, tokens, sketch_config).run()
+
+def merge_aggregates(partials):
+    """Merge an iterable of partial aggregates into one"""
+    total = CatalogAggregates()
+    for partial in partials:
+        total.merge(partial)
+    return total
+
+def expand_counts(counts, max_per_value=MAX_POINTS_PER_VALUE):
+    """Repeat each value by its count, capped, for plots that draw one mark per title"""
+    return np.repeat(counts.index.to_numpy(dtype=float), np.minimum(counts.values, max_per_value))
+
+def weighted_percentile(values, counts, q):
+    """Percentile of the data described by a value histogram, matching np.percentile's linear method"""
+    values = np.asarray(values, dtype=float)
+    cumulative = np.cumsum(counts)
+    position = q / 100 * (cumulative[-1] - 1)
+    lower, upper = int(np.floor(position)), int(np.ceil(position))
+    low_value = values[np.searchsorted(cumulative, lower, side='right')]
+    high_value = values[np.searchsorted(cumulative, upper, side='right')]
+    return low_value + (high_value - low_value) * (position - lower)
+
+def box_stats(counts, label, whis=1.5):
+    """Box plot statistics (for Axes.bxp) computed from a value histogram"""
+    counts = counts.sort_index()
+    values = counts.index.to_numpy(dtype=float)
+    q1, median, q3 = (weighted_percentile(values, counts.values, q) for q in (25, 50, 75))
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    return {
+        'label': label,
+        'med': median,
+        'q1': q1,
+        'q3': q3,
+        'whislo': inside.min() if len(inside) else q1,
+        'whishi': inside.max() if len(inside) else q3,
+        'fliers': values[(values < q1 - whis * iqr) | (values > q3 + whis * iqr)],
+        'mean': np.average(values, weights=counts.values),
+    }
+
+def binned_kde(values, weights, bandwidth, low, high, points=200):
+    """Gaussian KDE of weighted values on a regular grid from low to high
+
+    The weights are linearly binned onto the grid with bincount and convolved with the Gaussian
+    kernel by FFT, so the cost depends on the grid and the number of distinct values, not on the
+    number of titles. Returns (grid, density).
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    coords = np.linspace(low, high, points)
+    step = (high - low) / (points - 1) if high > low else 1.0
+    position = np.clip((values - low) / step, 0, points - 1)
+    left = np.minimum(np.floor(position).astype(np.int64), points - 2)
+    right_share = position - left
+    grid = (np.bincount(left, weights=weights * (1 - right_share), minlength=points)
+            + np.bincount(left + 1, weights=weights * right_share, minlength=points + 1)[:points])
+
+    # The kernel spans the whole grid either way, so nothing inside the grid is truncated
+    offsets = np.arange(-(points - 1), points) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 1 << int(np.ceil(np.log2(3 * points)))
+    density = np.fft.irfft(np.fft.rfft(grid, size) * np.fft.rfft(kernel, size), size)[points - 1:2 * points - 1]
+    return coords, np.maximum(density, 0) / weights.sum()
+
+def kde_curve(counts, points=200, cut=3, bw_adjust=1):
+    """Density curve of a value histogram matching seaborn's weighted kdeplot (Scott bandwidth, cut)"""
+    values = counts.index.to_numpy(dtype=float)
+    weights = counts.values.astype(float)
+    total = weights.sum()
+    mean = np.average(values, weights=weights)
+    # scipy's gaussian_kde: weighted unbiased variance and Scott's factor of the effective sample size
+    n_effective = total ** 2 / np.sum(weights ** 2)
+    variance = np.sum(weights * (values - mean) ** 2) / (total - np.sum(weights ** 2) / total)
+    bandwidth = np.sqrt(variance) * n_effective ** (-1 / 5) * bw_adjust
+    if not bandwidth > 0:
+        bandwidth = 1.0
+    # seaborn sizes the grid with the unweighted bandwidth of the values themselves
+    support = np.std(values, ddof=1) * len(values) ** (-1 / 5) * bw_adjust if len(values) > 1 else 0
+    if not support > 0:
+        support = bandwidth
+    return binned_kde(values, weights, bandwidth, values.min() - cut * support,
+                      values.max() + cut * support, points)
+
+def violin_stats(counts, points=100):
+    """Violin statistics (for Axes.violin) computed from a value histogram with a Scott-bandwidth KDE"""
+    counts = counts.sort_index()
+    values = counts.index.to_numpy(dtype=float)
+    weights = counts.values.astype(float)
+    n = weights.sum()
+    mean = np.average(values, weights=weights)
+    std = np.sqrt(np.sum(weights * (values - mean) ** 2) / max(n - 1, 1))
+    bandwidth = std * n ** (-1 / 5) if std > 0 else 1.0
+
+    coords, density = binned_kde(values, weights, bandwidth, values.min(), values.max(), points)
+    return {
+        'coords': coords,
+        'vals': density,
+        'mean': mean,
+        'median': weighted_percentile(values, weights, 50),
+        'min': values.min(),
+        'max': values.max(),
+    }
@@ -0,0 +1,306 @@
+"""
+Batch mode: the 13-panel report for many slices of the catalog in one run
+The catalog is loaded and indexed once, every slice's rows come from one grouping pass per
+dimension and every aggregate of a group of slices comes from one grouped count over the shared
+codes; with several workers each process attaches the catalog as a zero-copy shared dataset and
+aggregates and renders its own groups of slices; a manifest in the output directory records finished
+figures so an interrupted batch picks up where it stopped
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from data_loader import DATASET_PATH, HAS_PYARROW
+from dataset_cache import (load_prepared_dataset, load_text_index, cache_paths, is_cache_valid, file_hash,
+                           read_metadata, write_metadata)
+from multivalue import CatalogTokens
+from count_cube import CUBE_DIMENSIONS, _dimension_codes
+from text_index import TextIndex
+from aggregates import AggregationEngine
+from shared_dataset import SharedDataset
+from panel_rendering import _init_worker
+import profiling
+from profiling import stage
+
+# Multi-valued slice dimensions and the column they are split from; a title is in every slice it lists
+MULTI_VALUED_DIMENSIONS = {
+    'country': 'country',
+    'genre': 'listed_in',
+}
+
+# Every dimension a slice can filter on
+SLICE_DIMENSIONS = list(MULTI_VALUED_DIMENSIONS) + [dimension for dimension in CUBE_DIMENSIONS
+                                                     if dimension not in MULTI_VALUED_DIMENSIONS]
+
+# Filter key of full-text queries over title and description, e.g. {"text": "heist OR robbery"}
+TEXT_FILTER = 'text'
+
+MANIFEST_NAME = 'batch_manifest.json'
+
+# Slice rows (summed over slices) aggregated in one grouped pass; bounds the memory of a pass
+ROWS_PER_PASS = 10_000_000
+
+# Pool tasks per worker process; smaller tasks balance better, larger ones share more of a grouped pass
+TASKS_PER_WORKER = 4
+
+class SliceIndex:
+    """Row positions of every value of the slice dimensions, grouped once per dimension
+
+    Full-text filters are answered by a TextIndex, built on first use unless one is passed in.
+    """
+
+    def __init__(self, df, tokens=None, text_index=None):
+        self.df = df
+        self.tokens = tokens if tokens is not None else CatalogTokens(df)
+        self._text_index = text_index
+        self._groups = {}
+
+    def text_index(self):
+        if self._text_index is None:
+            with stage('text_index_build'):
+                self._text_index = TextIndex.from_frame(self.df)
+        return self._text_index
+
+    def groups(self, dimension):
+        """Value -> sorted row positions for one dimension"""
+        if dimension not in self._groups:
+            with stage(f'group {dimension}'):
+                self._groups[dimension] = self._group(dimension)
+        return self._groups[dimension]
+
+    def _group(self, dimension):
+        if dimension in MULTI_VALUED_DIMENSIONS:
+            index = self.tokens.token_index(MULTI_VALUED_DIMENSIONS[dimension], dimension)
+            return {value: index.rows(value) for value in index.values}
+        if dimension not in SLICE_DIMENSIONS:
+            raise KeyError(f"Unknown slice dimension {dimension!r}; choose from {SLICE_DIMENSIONS}")
+        codes, levels = _dimension_codes(self.df, dimension)
+        # One stable sort puts every value's rows next to each other, in row order
+        order = np.argsort(codes, kind='stable')
+        sizes = np.bincount(codes[codes >= 0], minlength=len(levels))
+        offsets = np.concatenate([[0], np.cumsum(sizes)]) + np.count_nonzero(codes < 0)
+        return {value: order[offsets[i]:offsets[i + 1]] for i, value in enumerate(levels)}
+
+    def rows(self, filters):
+        """Rows matching every filter (a value or a list of values per dimension)"""
+        rows = None
+        for dimension, values in filters.items():
+            if isinstance(values, (str, int, float)):
+                values = [values]
+            if dimension == TEXT_FILTER:
+                # Several queries in one filter are alternatives, like several values of a dimension
+                matched = self.text_index().rows(' OR '.join(values))
+            else:
+                groups = self.groups(dimension)
+                parts = [groups[value] for value in values if value in groups]
+                matched = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return np.arange(len(self.df)) if rows is None else rows
+
+def slice_name(filters):
+    """Readable slice name, e.g. 'country=Spain, rating=TV-MA'"""
+    return ', '.join(f"{dimension}={'|'.join(map(str, values)) if isinstance(values, list) else values}"
+                     for dimension, values in filters.items())
+
+def slice_file_name(name):
+    """File-system safe PNG name for a slice"""
+    return re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_') + '.png'
+
+def slices_by(index, dimension, top=None, min_titles=1):
+    """One slice per value of a dimension, largest first, optionally only the top values"""
+    sizes = sorted(((len(rows), value) for value, rows in index.groups(dimension).items()),
+                   key=lambda item: -item[0])
+    values = [value for size, value in sizes if size >= min_titles][:top]
+    # JSON-friendly values so slice definitions round-trip through the manifest
+    return [{dimension: value.item() if isinstance(value, np.generic) else value} for value in values]
+
+def read_slice_file(path):
+    """Slice definitions from a JSON list of {"dimension": value or [values], ...} objects"""
+    with open(path) as f:
+        slices = json.load(f)
+    if not isinstance(slices, list) or not all(isinstance(filters, dict) for filters in slices):
+        raise ValueError(f"{path} must hold a JSON list of filter objects")
+    return slices
+
+def dataset_fingerprint(path):
+    """Content hash of the catalog, taken from the dataset cache metadata when it is current"""
+    metadata = read_metadata(cache_paths(path)[1])
+    if metadata and is_cache_valid(path, metadata):
+        return metadata['sha256']
+    return file_hash(path)
+
+def load_manifest(output_dir, fingerprint):
+    """Finished slices of an earlier run over the same catalog, keyed by slice name"""
+    manifest = read_metadata(os.path.join(output_dir, MANIFEST_NAME))
+    if not manifest or manifest.get('dataset_sha256') != fingerprint:
+        return {'dataset_sha256': fingerprint, 'slices': {}}
+    return manifest
+
+def is_done(manifest, output_dir, name, filters):
+    entry = manifest['slices'].get(name)
+    return (entry is not None and entry['filters'] == filters
+            and os.path.exists(os.path.join(output_dir, entry['output'])))
+
+def render_slice(agg, output_path, title, dpi):
+    """Render one slice's figure (runs in a worker process)"""
+    from data_visualization import render_visualizations
+    start = time.perf_counter()
+    render_visualizations(agg, output_path=output_path, show=False, title=title, dpi=dpi)
+    return time.perf_counter() - start
+
+# Engine over the attached shared dataset, built once per worker process and dataset
+_WORKER_ENGINES = {}
+
+def render_shared_slices(dataset, batch, dpi):
+    """Aggregate a batch of slices in one grouped pass over the shared dataset and render each
+    (runs in a worker process); returns (titles, seconds) per slice
+    """
+    engine = _WORKER_ENGINES.get(dataset.path)
+    if engine is None:
+        engine = _WORKER_ENGINES[dataset.path] = AggregationEngine(dataset.attach())
+    with stage('aggregate_slices'):
+        aggs = engine.slice_aggregates([rows for rows, _, _ in batch])
+    return [(agg.rows, render_slice(agg, output_path, title, dpi)) for (_, output_path, title), agg in zip(batch, aggs)]
+
+def run_batch(slices, path=DATASET_PATH, output_dir='reports', workers=None, dpi=100, force=False,
+              progress=True, index=None):
+    """Render the 13-panel report of every non-empty slice; returns {slice name: figure path}
+
+    Slices already rendered for the same catalog (per the manifest) are skipped unless force is set.
+    index is a SliceIndex over the already loaded catalog, if the caller has one. With several
+    workers, each one attaches the catalog as a SharedDataset and aggregates and renders its own
+    slices, so only row ids travel to the workers.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if index is None:
+        with stage('load'):
+            df = load_prepared_dataset(path, report=progress)
+            text_index = load_text_index(path, df) if any(TEXT_FILTER in filters for filters in slices) else None
+            index = SliceIndex(df, text_index=text_index)
+    df = index.df
+    manifest = load_manifest(output_dir, dataset_fingerprint(path))
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+
+    pending, outputs = [], {}
+    for filters in slices:
+        name = slice_name(filters)
+        outputs[name] = os.path.join(output_dir, slice_file_name(name))
+        if force or not is_done(manifest, output_dir, name, filters):
+            pending.append((name, filters))
+    if progress:
+        print(f"📦 {len(slices)} slices: {len(slices) - len(pending)} already rendered, {len(pending)} to go")
+
+    start = time.perf_counter()
+    done = 0
+
+    def finish(name, filters, rows, seconds):
+        nonlocal done
+        done += 1
+        manifest['slices'][name] = {'filters': filters, 'rows': rows, 'output': os.path.basename(outputs[name])}
+        write_metadata(manifest_path, manifest)
+        if progress:
+            print(f"  [{done}/{len(pending)}] {name}: {rows:,} titles, rendered in {seconds:.1f}s "
+                  f"({time.perf_counter() - start:.1f}s elapsed)")
+
+    def slice_rows():
+        """Row ids of each pending, non-empty slice"""
+        for name, filters in pending:
+            rows = index.rows(filters)
+            if len(rows) == 0:
+                print(f"⚠️ {name}: no matching titles, skipped")
+                del outputs[name]
+                continue
+            yield name, filters, rows
+
+    def batches(max_slices=None):
+        """Pending, non-empty slices in groups of at most max_slices and ROWS_PER_PASS rows"""
+        batch, batch_rows = [], 0
+        for name, filters, rows in slice_rows():
+            batch.append((name, filters, rows))
+            batch_rows += len(rows)
+            if batch_rows >= ROWS_PER_PASS or len(batch) == max_slices:
+                yield batch
+                batch, batch_rows = [], 0
+        if batch:
+            yield batch
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or not HAS_PYARROW:
+        # Without pyarrow the catalog can't be shared with workers, so everything runs here
+        engine = AggregationEngine(df, index.tokens)
+        for batch in batches():
+            with stage('aggregate_slices'):
+                aggs = engine.slice_aggregates([rows for _, _, rows in batch])
+            for (name, filters, _), agg in zip(batch, aggs):
+                with stage('render_slice'):
+                    seconds = render_slice(agg, outputs[name], name, dpi)
+                finish(name, filters, agg.rows, seconds)
+        return outputs
+
+    # Several groups per worker so the pool stays busy; only row ids and the dataset handle travel
+    max_slices = max(1, -(-len(pending) // (workers * TASKS_PER_WORKER)))
+    with stage('render_slices'), SharedDataset.from_cache(path, df) as dataset:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {}
+            for batch in batches(max_slices):
+                tasks = [(rows, outputs[name], name) for name, _, rows in batch]
+                futures[pool.submit(render_shared_slices, dataset, tasks, dpi)] = batch
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    for name, _, _ in batch:
+                        print(f"❌ {name} failed: {e!r}")
+                        del outputs[name]
+                    continue
+                for (name, filters, _), (rows, seconds) in zip(batch, results):
+                    finish(name, filters, rows, seconds)
+    return outputs
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description='Render the 13-panel Netflix report for many slices in one run')
+    parser.add_argument('path', nargs='?', default=DATASET_PATH, help='catalog CSV file')
+    parser.add_argument('--by', action='append', default=[], choices=SLICE_DIMENSIONS,
+                        help='one report per value of this dimension (repeatable)')
+    parser.add_argument('--top', type=int, default=None, help='only the N largest values of each --by dimension')
+    parser.add_argument('--min-titles', type=int, default=1, help='skip values with fewer titles')
+    parser.add_argument('--query', action='append', default=[],
+                        help='one report of the titles matching this full-text query (repeatable)')
+    parser.add_argument('--slices', help='JSON file with a list of filter objects, e.g. [{"country": "Spain"}]')
+    parser.add_argument('--output-dir', default='reports', help='where figures and the manifest go')
+    parser.add_argument('--workers', type=int, default=None, help='render processes (default: CPU count)')
+    parser.add_argument('--dpi', type=int, default=100, help='resolution of each figure')
+    parser.add_argument('--force', action='store_true', help='re-render slices finished by an earlier run')
+    parser.add_argument('--profile', action='store_true', help='print a per-stage profile and write a trace')
+    args = parser.parse_args()
+    profiling.configure(args.profile)
+
+    print("🎬 Netflix Analysis (batch reports)")
+    print("="*50)
+    if not os.path.exists(args.path):
+        print(f"❌ Dataset file '{args.path}' not found!")
+        return
+    with stage('load'):
+        df = load_prepared_dataset(args.path)
+
+    slices = read_slice_file(args.slices) if args.slices else []
+    slices.extend({TEXT_FILTER: query} for query in args.query)
+    text_index = load_text_index(args.path, df) if any(TEXT_FILTER in filters for filters in slices) else None
+    index = SliceIndex(df, text_index=text_index)
+    for dimension in args.by:
+        slices.extend(slices_by(index, dimension, args.top, args.min_titles))
+    if not slices:
+        parser.error('give at least one --by dimension, --query or a --slices file')
+
+    outputs = run_batch(slices, args.path, args.output_dir, args.workers, args.dpi, args.force, index=index)
+    print(f"\n✅ Batch complete! {len(outputs)} reports in '{args.output_dir}'")
+    profiling.report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark harness for the Netflix analysis pipeline
+Generates synthetic catalogs at several sizes, times each pipeline stage in a fresh process,
+records peak RSS and compares runs against a saved baseline with a regression threshold
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Stages in run order; each is timed separately
+STAGES = ['load', 'load_cached', 'basic_data_info', 'aggregate', 'create_visualizations', 'generate_insights']
+
+# Slowdowns below this many seconds are treated as noise when comparing runs
+MIN_REGRESSION_SECONDS = 0.05
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+def catalog_path(data_dir, n_rows, seed):
+    """CSV file of the benchmark catalog with n_rows titles"""
+    return os.path.join(data_dir, f"netflix_{n_rows}_seed{seed}.csv")
+
+def ensure_catalog(data_dir, n_rows, seed, workers=None):
+    """Generate the benchmark catalog unless it already exists; returns its path"""
+    from create_dataset import generate_catalog
+    path = catalog_path(data_dir, n_rows, seed)
+    if not os.path.exists(path):
+        print(f"🧪 Generating {n_rows:,}-row catalog...")
+        generate_catalog(path, n_rows, seed=seed, workers=workers)
+    return path
+
+def run_stages(path):
+    """Time every stage on one catalog; meant to run in its own process so peak RSS is per size"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import data_visualization as dv
+    from aggregates import AggregationEngine
+    from dataset_cache import cache_paths, cube_path, read_count_cube
+
+    # Start from a cold cache so 'load' measures CSV parse + derived columns + cache write
+    for cache_file in cache_paths(path) + (cube_path(path),):
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+
+    results = {}
+    state = {}
+    output_path = os.path.splitext(path)[0] + '_analysis.png'
+
+    def load():
+        state['df'] = dv.load_and_prepare_data(path)
+
+    def aggregate():
+        state['engine'] = AggregationEngine(state['df'], cube=read_count_cube(path))
+        state['engine'].run()
+
+    stages = {
+        'load': load,
+        'load_cached': load,
+        'basic_data_info': lambda: dv.basic_data_info(state['df']),
+        'aggregate': aggregate,
+        'create_visualizations': lambda: dv.create_visualizations(state['df'], state['engine'],
+                                                                  output_path=output_path),
+        'generate_insights': lambda: dv.generate_insights(state['df'], state['engine']),
+    }
+    for name in STAGES:
+        cpu_start, start = time.process_time(), time.perf_counter()
+        # The pipeline prints progress; keep benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            stages[name]()
+        results[name] = {
+            'seconds': time.perf_counter() - start,
+            'cpu_seconds': time.process_time() - cpu_start,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+    return {'rows': len(state['df']), 'stages': results, 'peak_rss_mb': peak_rss_mb()}
+
+def run_benchmarks(sizes, data_dir='benchmark_data', seed=42, workers=None):
+    """Benchmark every catalog size and return the results document"""
+    os.makedirs(data_dir, exist_ok=True)
+    document = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+        },
+        'results': {},
+    }
+    for n_rows in sizes:
+        path = ensure_catalog(data_dir, n_rows, seed, workers)
+        print(f"⏱️ Benchmarking {n_rows:,} rows...")
+        # One fresh process per size: ru_maxrss never goes down within a process
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            try:
+                result = pool.submit(run_stages, path).result()
+            except Exception as e:
+                print(f"❌ {n_rows:,} rows failed: {e!r}")
+                result = {'rows': n_rows, 'error': repr(e)}
+        document['results'][str(n_rows)] = result
+        if 'stages' in result:
+            print_result(n_rows, result)
+    return document
+
+def print_result(n_rows, result):
+    """Print the per-stage table of one catalog size"""
+    print(f"   {'stage':<24}{'wall':>10}{'cpu':>10}{'peak RSS':>12}")
+    for name, stage in result['stages'].items():
+        print(f"   {name:<24}{stage['seconds']:9.3f}s{stage['cpu_seconds']:9.3f}s{stage['peak_rss_mb']:9.0f} MB")
+
+def compare_results(current, baseline, threshold=0.2, min_seconds=MIN_REGRESSION_SECONDS):
+    """List (size, stage, baseline s, current s, ratio) for stages slower than baseline by > threshold"""
+    regressions = []
+    for size, result in current['results'].items():
+        base = baseline.get('results', {}).get(size, {})
+        for name, stage in result.get('stages', {}).items():
+            if name not in base.get('stages', {}):
+                continue
+            before, after = base['stages'][name]['seconds'], stage['seconds']
+            ratio = after / before if before > 0 else float('inf')
+            if ratio > 1 + threshold and after - before > min_seconds:
+                regressions.append((size, name, before, after, ratio))
+    return regressions
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark the Netflix analysis pipeline at scaled catalog sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='catalog sizes in rows')
+    parser.add_argument('--data-dir', default='benchmark_data', help='where generated catalogs are kept')
+    parser.add_argument('--seed', type=int, default=42, help='catalog generator seed')
+    parser.add_argument('--workers', type=int, default=None, help='catalog generator processes')
+    parser.add_argument('--output', default='benchmark_results.json', help='results JSON file')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown ratio, e.g. 0.2 = 20%%')
+    args = parser.parse_args()
+
+    document = run_benchmarks(args.sizes, args.data_dir, args.seed, args.workers)
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(document, baseline, args.threshold)
+        if not regressions:
+            print(f"✅ No stage slower than {args.compare} by more than {args.threshold:.0%}")
+            return 0
+        print(f"❌ {len(regressions)} regression(s) against {args.compare}:")
+        for size, name, before, after, ratio in regressions:
+            print(f"   {int(size):>12,} rows  {name:<24}{before:8.3f}s -> {after:8.3f}s ({ratio:.2f}x)")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
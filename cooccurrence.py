@@ -0,0 +1,193 @@
+"""
+Who works with whom: sparse co-occurrence of the people credited on each title
+Cast and director names are dictionary-encoded into one people index; each role is a sparse
+title x person incidence matrix, and collaboration counts (titles shared by two people) come
+from sparse matrix products instead of a loop over every pair of names on every title
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from data_loader import DATASET_PATH
+from multivalue import CatalogTokens
+from profiling import stage
+
+# Credited roles and the multi-valued column each comes from
+ROLES = {
+    'cast': 'cast',
+    'director': 'director',
+}
+
+def top_k_per_row(matrix, k):
+    """(row, column, value) arrays of the k largest entries of every row of a sparse matrix
+
+    Ties are broken by column; one sort over the non-zeros, no per-row Python loop.
+    """
+    matrix = matrix.tocsr()
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    order = np.lexsort((matrix.indices, -matrix.data, rows))
+    rank = np.arange(len(order)) - matrix.indptr[rows[order]]
+    keep = order[rank < k]
+    return rows[keep], matrix.indices[keep], matrix.data[keep]
+
+def _without_diagonal(matrix):
+    """CSR copy of a square matrix with its diagonal (a person with themself) dropped"""
+    matrix = sp.coo_matrix(matrix)
+    keep = matrix.row != matrix.col
+    return sp.csr_matrix((matrix.data[keep], (matrix.row[keep], matrix.col[keep])), shape=matrix.shape)
+
+class CollaborationGraph:
+    """Sparse incidence of titles x people per role, with collaboration queries
+
+    A person credited in several roles (e.g. directing and acting) is one node; shared titles
+    between two people count once however many roles they hold on it.
+    """
+
+    def __init__(self, people, incidence, n_titles):
+        self.people = people
+        self.incidence = incidence
+        # Titles x people, any role
+        credited = sp.csr_matrix((n_titles, len(people)), dtype=np.int32)
+        for matrix in incidence.values():
+            credited = credited + matrix
+        credited.data[:] = 1
+        self.credited = credited.tocsc()
+        self._positions = pd.Series(np.arange(len(people)), index=people)
+        self._collaborations = None
+
+    @classmethod
+    def from_frame(cls, df, tokens=None, roles=ROLES):
+        """Build the graph from the cast/director columns present in a DataFrame
+
+        A column whose names aren't separated by commas (e.g. space-joined cast lists) is left out
+        rather than read as one person per title.
+        """
+        tokens = tokens if tokens is not None else CatalogTokens(df)
+        split = {role: tokens[column] for role, column in roles.items()
+                 if column in df.columns and tokens.delimited(column)}
+        people = pd.Index([], dtype=object)
+        for role_tokens in split.values():
+            people = people.append(pd.Index(role_tokens.cat.categories, dtype=object))
+        people = people.unique().rename('person')
+
+        incidence = {}
+        for role, role_tokens in split.items():
+            # Map the role's dictionary onto the shared people index, then expand through the codes
+            columns = people.get_indexer(role_tokens.cat.categories)[role_tokens.cat.codes.to_numpy()]
+            rows = role_tokens.index.to_numpy()
+            matrix = sp.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns)),
+                                   shape=(len(df), len(people)))
+            matrix.sum_duplicates()
+            matrix.data[:] = 1
+            incidence[role] = matrix
+        return cls(people, incidence, len(df))
+
+    def __contains__(self, person):
+        return person in self._positions.index
+
+    def titles_per_person(self, role=None):
+        """Number of titles each person is credited on (in one role, or any)"""
+        matrix = self.credited if role is None else self.incidence[role]
+        counts = pd.Series(np.asarray(matrix.sum(axis=0)).ravel(), index=self.people, name='titles')
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def collaborations(self):
+        """People x people matrix of shared titles (any roles), diagonal cleared; computed once"""
+        if self._collaborations is None:
+            with stage('collaborations'):
+                self._collaborations = _without_diagonal(self.credited.T @ self.credited)
+        return self._collaborations
+
+    def role_pairs(self, first, second):
+        """People x people matrix: titles where the row person has role first and the column person second"""
+        return _without_diagonal(self.incidence[first].T @ self.incidence[second])
+
+    def _pairs(self, rows, columns, values, names):
+        index = pd.MultiIndex.from_arrays([self.people[rows], self.people[columns]], names=names)
+        return pd.Series(values.astype(np.int64), index=index, name='titles')
+
+    def pair_counts(self, first='director', second='cast', limit=None):
+        """Shared titles of every (first-role person, second-role person) pair, as a Series
+
+        With a limit only the limit strongest pairs are kept (ties by row, then column).
+        """
+        if first not in self.incidence or second not in self.incidence:
+            return self._pairs(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                               np.empty(0, dtype=np.int64), [first, second])
+        matrix = self.role_pairs(first, second).tocoo()
+        rows, columns, values = matrix.row, matrix.col, matrix.data
+        if limit is not None and len(values) > limit:
+            keep = np.lexsort((columns, rows, -values))[:limit]
+            rows, columns, values = rows[keep], columns[keep], values[keep]
+        return self._pairs(rows, columns, values, [first, second])
+
+    def collaborators(self, person, k=10, role=None):
+        """The k people sharing the most titles with one person, optionally only those in one role"""
+        if person not in self:
+            return pd.Series(dtype='int64', name='titles')
+        row = self.collaborations()[self._positions[person]]
+        columns, values = row.indices, row.data
+        if role is not None:
+            keep = np.asarray(self.incidence[role].sum(axis=0)).ravel()[columns] > 0
+            columns, values = columns[keep], values[keep]
+        order = np.lexsort((columns, -values))[:k]
+        return pd.Series(values[order].astype(np.int64), index=self.people[columns[order]], name='titles')
+
+    def top_collaborators(self, k=5, first=None, second=None):
+        """Top-k collaborators of every person, as (person, collaborator) -> shared titles
+
+        With roles, e.g. first='director', second='cast', rows are directors and collaborators
+        are cast members.
+        """
+        matrix = self.collaborations() if first is None else self.role_pairs(first, second or first)
+        rows, columns, values = top_k_per_row(matrix, k)
+        return self._pairs(rows, columns, values, [first or 'person', 'collaborator'])
+
+    def top_pairs(self, n=10):
+        """The n pairs of people sharing the most titles, each pair listed once"""
+        matrix = sp.triu(self.collaborations(), k=1).tocoo()
+        order = np.lexsort((matrix.col, matrix.row, -matrix.data))[:n]
+        return self._pairs(matrix.row[order], matrix.col[order], matrix.data[order], ['person', 'collaborator'])
+
+def main():
+    """Print collaboration reports for a catalog"""
+    from dataset_cache import load_prepared_dataset
+    parser = argparse.ArgumentParser(description='Who works with whom in the Netflix catalog')
+    parser.add_argument('path', nargs='?', default=DATASET_PATH, help='catalog CSV file')
+    parser.add_argument('--person', action='append', default=[], help='list the top collaborators of this person')
+    parser.add_argument('--k', type=int, default=5, help='collaborators per person')
+    parser.add_argument('--directors', type=int, default=10, help='report the N most prolific directors')
+    parser.add_argument('--pairs', type=int, default=10, help='strongest pairs to list')
+    args = parser.parse_args()
+
+    df = load_prepared_dataset(args.path)
+    graph = CollaborationGraph.from_frame(df)
+    print(f"\n🤝 {len(graph.people):,} people credited on {len(df):,} titles")
+    for role, column in ROLES.items():
+        if column in df.columns and role not in graph.incidence:
+            print(f"⚠️ '{column}' names aren't comma-separated; {role} credits are left out")
+
+    print(f"\nStrongest collaborations:")
+    for (person, collaborator), titles in graph.top_pairs(args.pairs).items():
+        print(f"   {person} & {collaborator}: {titles:,} titles")
+
+    if 'director' in graph.incidence and 'cast' in graph.incidence:
+        directors = graph.titles_per_person('director').head(args.directors).index
+        top = graph.top_collaborators(args.k, 'director', 'cast')
+        print(f"\nTop cast collaborators per director:")
+        for director in directors:
+            if director in top.index.get_level_values(0):
+                names = ', '.join(f"{name} ({titles})" for name, titles in top.loc[director].items())
+                print(f"   {director}: {names}")
+
+    for person in args.person:
+        collaborators = graph.collaborators(person, args.k)
+        print(f"\nTop collaborators of {person}:")
+        if collaborators.empty:
+            print("   (none found)")
+        for name, titles in collaborators.items():
+            print(f"   {name}: {titles:,} titles")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Materialized count cube over type x rating x country x release year x year/month added
+Built in one vectorized pass and stored sparsely (the non-empty cells' linear keys plus their counts)
+with a dictionary of values per dimension, so panel counts and ad-hoc filtered views such as
+"TV-MA titles from Spain" are a mask and a bincount over the cells instead of a DataFrame rescan
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from multivalue import CatalogTokens, _encode
+
+# Bump whenever the dimensions or the file layout change so stored cubes are rebuilt
+CUBE_VERSION = 1
+
+# Views with at most this many possible cells are counted with a dense bincount instead of a sort
+MAX_DENSE_CELLS = 1 << 22
+
+# Cube dimension -> source column; dimensions whose column is missing are left out
+CUBE_DIMENSIONS = {
+    'type': 'type',
+    'rating': 'rating',
+    'country': 'country',
+    'release_year': 'release_year',
+    'year_added': 'date_added_clean',
+    'month_added': 'date_added_clean',
+}
+
+def _dimension_codes(df, dimension):
+    """Per-row codes (-1 for missing) and the distinct values of one row-aligned dimension"""
+    column = df[CUBE_DIMENSIONS[dimension]]
+    if dimension in ('year_added', 'month_added'):
+        parts = column.dt.year if dimension == 'year_added' else column.dt.month
+        # NaT gives NaN, which factorize codes as -1
+        codes, levels = pd.factorize(parts.to_numpy())
+        return codes, pd.Index(levels.astype(np.int64), name=dimension)
+    codes, levels = _encode(column)
+    return codes, pd.Index(levels.tolist(), name=dimension)
+
+class CountCube:
+    """Sparse count cube: one entry per non-empty cell
+
+    Each dimension has one extra slot after its values for rows where the value is missing.
+    Country is multi-valued, so a title is in one cell per country it lists: pair_counts counts
+    (title, country) pairs and title_counts counts every title once (in one of its countries' cells).
+    Views that group or filter by country read pair_counts; all others read title_counts, so
+    co-productions are never counted twice.
+    """
+
+    def __init__(self, dimensions, levels, keys, pair_counts, title_counts, country_selected=False):
+        self.dimensions = list(dimensions)
+        self.levels = list(levels)
+        self.shape = tuple(len(level) + 1 for level in self.levels)
+        self.keys = keys
+        self.pair_counts = pair_counts
+        self.title_counts = title_counts
+        self.country_selected = country_selected
+        self._coordinates = None
+
+    @classmethod
+    def from_frame(cls, df, tokens=None):
+        """Build the cube from a prepared DataFrame in one pass over its columns"""
+        dimensions = [dimension for dimension, column in CUBE_DIMENSIONS.items() if column in df.columns]
+        n_rows = len(df)
+        rows = np.arange(n_rows)
+        country_codes = None
+        if 'country' in dimensions:
+            index = (tokens if tokens is not None else CatalogTokens(df)).country_index()
+            # Titles without a country keep one cell in the missing-country slot
+            no_country = np.flatnonzero(np.bincount(index.row_ids, minlength=n_rows) == 0)
+            rows = np.concatenate([index.row_ids, no_country])
+            country_codes = np.concatenate([index.codes, np.full(len(no_country), -1)])
+
+        levels, coordinates = [], []
+        for dimension in dimensions:
+            if dimension == 'country':
+                codes, level = country_codes, pd.Index(index.values.tolist(), name='country')
+            else:
+                codes, level = _dimension_codes(df, dimension)
+                codes = codes[rows]
+            levels.append(level)
+            coordinates.append(np.where(codes < 0, len(level), codes))
+
+        # One (title, country) pair per title carries the title count
+        owner = np.empty(n_rows, dtype=np.int64)
+        owner[rows] = np.arange(len(rows))
+        first = np.zeros(len(rows), dtype=bool)
+        first[owner] = True
+        shape = tuple(len(level) + 1 for level in levels)
+        keys, inverse = np.unique(np.ravel_multi_index(coordinates, shape), return_inverse=True)
+        pair_counts = np.bincount(inverse, minlength=len(keys))
+        title_counts = np.bincount(inverse[first], minlength=len(keys))
+        return cls(dimensions, levels, keys, pair_counts, title_counts)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def coordinates(self, dimension):
+        """Code of each non-empty cell along one dimension (the missing slot is len(level))"""
+        if self._coordinates is None:
+            self._coordinates = np.unravel_index(self.keys, self.shape)
+        return self._coordinates[self.dimensions.index(dimension)]
+
+    def level(self, dimension):
+        return self.levels[self.dimensions.index(dimension)]
+
+    def select(self, **filters):
+        """Sub-cube of the cells matching every filter, e.g. select(rating='TV-MA', country='Spain')
+
+        A filter is one value or a list of values; unknown values match nothing.
+        """
+        mask = np.ones(len(self.keys), dtype=bool)
+        for dimension, values in filters.items():
+            if dimension not in self.dimensions:
+                raise KeyError(f"Count cube has no dimension {dimension!r}; it has {self.dimensions}")
+            if isinstance(values, str) or np.ndim(values) == 0:
+                values = [values]
+            positions = self.level(dimension).get_indexer(values)
+            mask &= np.isin(self.coordinates(dimension), positions[positions >= 0])
+        return CountCube(self.dimensions, self.levels, self.keys[mask], self.pair_counts[mask],
+                         self.title_counts[mask], self.country_selected or 'country' in filters)
+
+    def _weights(self, by=()):
+        if self.country_selected or 'country' in by:
+            return self.pair_counts
+        return self.title_counts
+
+    def total(self):
+        """Number of titles in the cube (titles per country once a country filter is applied)"""
+        return int(self._weights().sum())
+
+    def counts(self, *by):
+        """Titles per value (or per combination of values) of the given dimensions
+
+        Rows with a missing value in any of them are left out, like a groupby over those columns.
+        """
+        if not by:
+            raise ValueError("counts() needs at least one dimension")
+        coordinates = [self.coordinates(dimension) for dimension in by]
+        sizes = [len(self.level(dimension)) for dimension in by]
+        present = np.ones(len(self.keys), dtype=bool)
+        for codes, size in zip(coordinates, sizes):
+            present &= codes < size
+        cells = np.ravel_multi_index([codes[present] for codes in coordinates], sizes)
+        weights = self._weights(by)[present]
+        if np.prod(sizes, dtype=np.float64) <= MAX_DENSE_CELLS:
+            counts = np.bincount(cells, weights=weights, minlength=int(np.prod(sizes))).astype(np.int64)
+            cells = np.flatnonzero(counts)
+            counts = counts[cells]
+        else:
+            cells, inverse = np.unique(cells, return_inverse=True)
+            counts = np.bincount(inverse, weights=weights, minlength=len(cells)).astype(np.int64)
+            cells, counts = cells[counts > 0], counts[counts > 0]
+        values = [self.level(dimension)[codes] for dimension, codes in zip(by, np.unravel_index(cells, sizes))]
+        if len(by) == 1:
+            index = values[0]
+        else:
+            index = pd.MultiIndex.from_arrays(values, names=list(by))
+        return pd.Series(counts, index=index, name='count').sort_index()
+
+    def merge(self, other):
+        """Add another cube (e.g. of the next chunk) into this one in place and return self"""
+        if other.dimensions != self.dimensions:
+            raise ValueError("Count cubes must have the same dimensions to merge")
+        levels, mine, theirs = [], [], []
+        for level, other_level, codes, other_codes in zip(
+                self.levels, other.levels, np.unravel_index(self.keys, self.shape),
+                np.unravel_index(other.keys, other.shape)):
+            merged = level.append(other_level[~other_level.isin(level)])
+            # Old missing slots move to the end of the merged dictionary
+            mine.append(np.where(codes == len(level), len(merged), codes))
+            remap = np.append(merged.get_indexer(other_level), len(merged))
+            theirs.append(remap[other_codes])
+            levels.append(merged)
+        shape = tuple(len(level) + 1 for level in levels)
+        keys, inverse = np.unique(np.concatenate([np.ravel_multi_index(mine, shape),
+                                                  np.ravel_multi_index(theirs, shape)]), return_inverse=True)
+        self.pair_counts = np.bincount(inverse, weights=np.concatenate([self.pair_counts, other.pair_counts]),
+                                       minlength=len(keys)).astype(np.int64)
+        self.title_counts = np.bincount(inverse, weights=np.concatenate([self.title_counts, other.title_counts]),
+                                        minlength=len(keys)).astype(np.int64)
+        self.levels, self.shape, self.keys = levels, shape, keys
+        self._coordinates = None
+        return self
+
+    def copy(self):
+        return CountCube(self.dimensions, self.levels, self.keys.copy(), self.pair_counts.copy(),
+                         self.title_counts.copy(), self.country_selected)
+
+    def save(self, path):
+        """Write the cube as an .npz file (atomically)"""
+        tmp_path = path + '.tmp'
+        meta = {
+            'version': CUBE_VERSION,
+            'dimensions': self.dimensions,
+            'levels': [level.tolist() for level in self.levels],
+        }
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, keys=self.keys, pair_counts=self.pair_counts, title_counts=self.title_counts,
+                     meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a cube written by save(); returns None when it is from another cube version"""
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != CUBE_VERSION:
+                return None
+            levels = [pd.Index(values, name=dimension)
+                      for dimension, values in zip(meta['dimensions'], meta['levels'])]
+            return cls(meta['dimensions'], levels, data['keys'], data['pair_counts'], data['title_counts'])
@@ -1,146 +1,296 @@
 """
 Create a comprehensive Netflix dataset for visualization
+Columns are generated with NumPy in vectorized batches, so the same code builds the 1000-row demo
+file and 10M+ row load-testing catalogs written as CSV or Parquet shards by worker processes
 """
 
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-import random
-from datetime import datetime, timedelta
 
-def create_netflix_dataset():
+# Sample data
+TITLES = [
+    "Stranger Things", "The Crown", "Money Heist", "Ozark", "The Witcher",
+    "Bridgerton", "Squid Game", "Dark", "Narcos", "House of Cards",
+    "Orange is the New Black", "13 Reasons Why", "The Queen's Gambit",
+    "Tiger King", "Making a Murderer", "Chef's Table", "Abstract",
+    "Our Planet", "Explained", "The Social Dilemma", "Extraction",
+    "6 Underground", "Red Notice", "The Irishman", "Marriage Story",
+    "Roma", "Bird Box", "Bright", "The Old Guard", "Enola Holmes",
+    "To All the Boys I've Loved Before", "The Kissing Booth",
+    "Tall Girl", "The Half of It", "The Platform", "Parasite",
+    "The Trial of the Chicago 7", "Da 5 Bloods", "Mank", "Ma Rainey's Black Bottom"
+]
+
+DIRECTORS = [
+    "Matt Duffer", "Peter Morgan", "Álex Pina", "Jason Bateman", "Lauren Schmidt",
+    "Chris Van Dusen", "Hwang Dong-hyuk", "Baran bo Odar", "José Padilha", "Beau Willimon",
+    "Jenji Kohan", "Brian Yorkey", "Scott Frank", "Eric Goode", "Laura Ricciardi",
+    "David Gelb", "Scott Dadich", "Alastair Fothergill", "Ezra Klein", "Jeff Orlowski",
+    "Sam Hargrave", "Michael Bay", "Rawson Marshall Thurber", "Martin Scorsese",
+    "Noah Baumbach", "Alfonso Cuarón", "Susanne Bier", "David Ayer", "Gina Prince-Bythewood",
+    "Harry Bradbeer", "Susan Johnson", "Vince Marcello", "Nzingha Stewart", "Alice Wu",
+    "Galder Gaztelu-Urrutia", "Bong Joon-ho", "Aaron Sorkin", "Spike Lee", "David Fincher", "George C. Wolfe"
+]
+
+CAST = [
+    "Ryan Reynolds", "Dwayne Johnson", "Gal Gadot", "Chris Hemsworth", "Scarlett Johansson",
+    "Robert Downey Jr.", "Chris Evans", "Mark Ruffalo", "Chris Pratt", "Tom Holland",
+    "Zendaya", "Timothée Chalamet", "Anya Taylor-Joy", "Millie Bobby Brown", "Finn Wolfhard"
+]
+
+COUNTRIES = [
+    "United States", "United Kingdom", "Spain", "South Korea", "Germany",
+    "India", "Japan", "France", "Italy", "Brazil", "Mexico", "Canada",
+    "Australia", "Netherlands", "Sweden", "Norway", "Denmark", "Poland",
+    "Turkey", "Argentina", "Chile", "Colombia", "Peru", "Venezuela"
+]
+
+RATINGS = ["TV-MA", "TV-14", "R", "PG-13", "TV-PG", "PG", "TV-Y7", "TV-Y", "G", "NC-17"]
+
+GENRES = [
+    "Dramas", "International Movies", "Action & Adventure", "Comedies", "Thrillers",
+    "Romantic Movies", "Documentaries", "Horror Movies", "Sci-Fi & Fantasy", "Kids & Family",
+    "Anime Features", "Stand-Up Comedy", "Music & Musicals", "Sports Movies", "LGBTQ Movies",
+    "Classic Movies", "Independent Movies", "Faith & Spirituality", "Military Movies", "Westerns"
+]
+
+DESCRIPTIONS = [
+    "A gripping story that will keep you on the edge of your seat.",
+    "An emotional journey through love, loss, and redemption.",
+    "A thrilling adventure that takes you to new worlds.",
+    "A heartwarming tale of friendship and family.",
+    "A dark and mysterious story with unexpected twists.",
+    "A hilarious comedy that will make you laugh out loud.",
+    "A thought-provoking documentary about real-life events.",
+    "An action-packed thriller with stunning visuals.",
+    "A romantic story that will touch your heart.",
+    "A sci-fi epic that explores the future of humanity."
+]
+
+# Knobs of the generated catalog; (low, high) ranges are inclusive
+DEFAULT_DISTRIBUTIONS = {
+    'movie_share': 0.7,
+    'sequel_share': 0.3,
+    'genres_per_title': (1, 3),
+    'cast_size': (2, 4),
+    'release_years': (1990, 2023),
+    'date_added_range': ('2015-01-01', '2023-12-31'),
+    'movie_minutes': (80, 180),
+    'show_seasons': (1, 8),
+}
+
+COLUMNS = ['show_id', 'type', 'title', 'director', 'cast', 'country', 'date_added',
+           'release_year', 'rating', 'duration', 'listed_in', 'description']
+
+def _choice(rng, values, n_rows):
+    """Draw n_rows values uniformly from a list, as an object array"""
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n_rows)]
+
+def _join_samples(rng, values, size_range, n_rows, sep=', '):
+    """Join a random sample without replacement of values on each row, with a per-row sample size"""
+    low, high = size_range
+    high = min(high, len(values))
+    # The high smallest of n uniform keys, in key order, are a uniformly random ordered sample
+    keys = rng.random((n_rows, len(values)))
+    picks = np.argpartition(keys, high - 1, axis=1)[:, :high]
+    picks = np.take_along_axis(picks, np.argsort(np.take_along_axis(keys, picks, axis=1), axis=1), axis=1)
+    sizes = rng.integers(low, high + 1, n_rows)
+
+    # Encode each row's sample as one integer so only distinct samples are joined into strings
+    if (high + 1) * float(len(values)) ** high < 2 ** 63:
+        codes = sizes.astype(np.int64)
+        for k in range(high):
+            codes = codes * len(values) + np.where(sizes > k, picks[:, k], 0)
+
+        def labels(distinct):
+            joined = []
+            for code in distinct:
+                sample = []
+                for _ in range(high):
+                    code, pick = divmod(int(code), len(values))
+                    sample.append(values[pick])
+                joined.append(sep.join(sample[::-1][:code]))
+            return joined
+        return _formatted(codes, labels)
+
+    # Samples too long to pack into an int64: deduplicate the rows of picks instead
+    picks = np.where(np.arange(high) < sizes[:, None], picks, -1)
+    distinct, inverse = np.unique(picks, axis=0, return_inverse=True)
+    joined = [sep.join(values[pick] for pick in row if pick >= 0) for row in distinct]
+    return np.asarray(joined, dtype=object)[inverse.ravel()]
+
+def _formatted(codes, labels):
+    """Map integer codes to strings by formatting each distinct code once"""
+    distinct, inverse = np.unique(codes, return_inverse=True)
+    return np.asarray(labels(distinct), dtype=object)[inverse]
+
+def generate_batch(n_rows, rng, start_id=0, distributions=None):
+    """Generate one batch of catalog rows as a DataFrame, every column drawn with NumPy"""
+    dist = dict(DEFAULT_DISTRIBUTIONS, **(distributions or {}))
+    is_movie = rng.random(n_rows) < dist['movie_share']
+
+    ids = np.arange(start_id + 1, start_id + n_rows + 1)
+    show_id = ids.astype(str).astype(object)
+    short = ids < 1000
+    show_id[short] = [f"{i:04d}" for i in ids[short]]
+    show_id = 's' + show_id
+
+    title = _choice(rng, TITLES, n_rows)
+    sequel = rng.random(n_rows) < dist['sequel_share']
+    title[sequel] = title[sequel] + ' ' + _formatted(rng.integers(1, 6, sequel.sum()),
+                                                      lambda n: n.astype(str))
+
+    start, end = (np.datetime64(day, 'D') for day in dist['date_added_range'])
+    days = rng.integers(0, (end - start).astype(int) + 1, n_rows)
+    date_added = _formatted(days, lambda d: pd.DatetimeIndex(start + d).strftime('%B %d, %Y'))
+
+    minutes = rng.integers(dist['movie_minutes'][0], dist['movie_minutes'][1] + 1, n_rows)
+    seasons = rng.integers(dist['show_seasons'][0], dist['show_seasons'][1] + 1, n_rows)
+    duration = np.where(is_movie,
+                        _formatted(minutes, lambda m: [f"{v} min" for v in m]),
+                        _formatted(seasons, lambda s: [f"{v} Season{'s' if v > 1 else ''}" for v in s]))
+
+    return pd.DataFrame({
+        'show_id': show_id,
+        'type': np.array(['TV Show', 'Movie'], dtype=object)[is_movie.astype(np.int8)],
+        'title': title,
+        'director': _choice(rng, DIRECTORS, n_rows),
+        'cast': _join_samples(rng, CAST, dist['cast_size'], n_rows),
+        'country': _choice(rng, COUNTRIES, n_rows),
+        'date_added': date_added,
+        'release_year': rng.integers(dist['release_years'][0], dist['release_years'][1] + 1, n_rows),
+        'rating': _choice(rng, RATINGS, n_rows),
+        'duration': duration,
+        'listed_in': _join_samples(rng, GENRES, dist['genres_per_title'], n_rows),
+        'description': _choice(rng, DESCRIPTIONS, n_rows),
+    }, columns=COLUMNS)
+
+def shard_seed(seed, shard):
+    """Seed of one shard, independent of how shards are spread over workers"""
+    return np.random.SeedSequence([seed, shard])
+
+def write_shard(path, n_rows, seed, shard=0, start_id=0, batch_size=250_000, distributions=None):
+    """Generate one shard batch by batch and stream it to a CSV or Parquet file"""
+    rng = np.random.default_rng(shard_seed(seed, shard))
+    tmp_path = path + '.tmp'
+    parquet = path.endswith('.parquet')
+    writer = None
+    try:
+        for offset in range(0, n_rows, batch_size):
+            batch = generate_batch(min(batch_size, n_rows - offset), rng, start_id + offset, distributions)
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(batch, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                batch.to_csv(tmp_path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+        if n_rows == 0:
+            # An empty shard is still a readable file: header only, or a Parquet file with the full schema
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                schema = pa.Table.from_pandas(generate_batch(1, np.random.default_rng(0)), preserve_index=False).schema
+                pq.write_table(schema.empty_table(), tmp_path)
+            else:
+                pd.DataFrame(columns=COLUMNS).to_csv(tmp_path, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return path
+
+def _write_shard_task(task):
+    """Process-pool entry point for write_shard"""
+    return write_shard(**task)
+
+def shard_paths(output, shards):
+    """File name of each shard: the output itself for one shard, numbered otherwise"""
+    if shards == 1:
+        return [output]
+    base, ext = os.path.splitext(output)
+    return [f"{base}-{shard:05d}{ext}" for shard in range(shards)]
+
+def generate_catalog(output, n_rows, shards=1, seed=42, workers=None, batch_size=250_000,
+                     distributions=None):
+    """Write an n_rows synthetic catalog as shards generated in parallel; returns the shard paths
+
+    Shard i always holds the same rows for a given seed, whatever the worker count.
+    """
+    paths = shard_paths(output, shards)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    bounds = np.linspace(0, n_rows, shards + 1).astype(int)
+    tasks = [{
+        'path': path,
+        'n_rows': int(bounds[shard + 1] - bounds[shard]),
+        'seed': seed,
+        'shard': shard,
+        'start_id': int(bounds[shard]),
+        'batch_size': batch_size,
+        'distributions': distributions,
+    } for shard, path in enumerate(paths)]
+
+    workers = min(workers or os.cpu_count() or 1, shards)
+    if workers == 1:
+        return [write_shard(**task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_write_shard_task, tasks))
+
+def create_netflix_dataset(n_rows=1000, seed=42, path='netflix_titles.csv'):
     """Create a realistic Netflix dataset"""
-    
-    # Set random seed for reproducibility
-    np.random.seed(42)
-    random.seed(42)
-    
-    # Sample data
-    titles = [
-        "Stranger Things", "The Crown", "Money Heist", "Ozark", "The Witcher",
-        "Bridgerton", "Squid Game", "Dark", "Narcos", "House of Cards",
-        "Orange is the New Black", "13 Reasons Why", "The Queen's Gambit",
-        "Tiger King", "Making a Murderer", "Chef's Table", "Abstract",
-        "Our Planet", "Explained", "The Social Dilemma", "Extraction",
-        "6 Underground", "Red Notice", "The Irishman", "Marriage Story",
-        "Roma", "Bird Box", "Bright", "The Old Guard", "Enola Holmes",
-        "To All the Boys I've Loved Before", "The Kissing Booth",
-        "Tall Girl", "The Half of It", "The Platform", "Parasite",
-        "The Trial of the Chicago 7", "Da 5 Bloods", "Mank", "Ma Rainey's Black Bottom"
-    ]
-    
-    directors = [
-        "Matt Duffer", "Peter Morgan", "Álex Pina", "Jason Bateman", "Lauren Schmidt",
-        "Chris Van Dusen", "Hwang Dong-hyuk", "Baran bo Odar", "José Padilha", "Beau Willimon",
-        "Jenji Kohan", "Brian Yorkey", "Scott Frank", "Eric Goode", "Laura Ricciardi",
-        "David Gelb", "Scott Dadich", "Alastair Fothergill", "Ezra Klein", "Jeff Orlowski",
-        "Sam Hargrave", "Michael Bay", "Rawson Marshall Thurber", "Martin Scorsese",
-        "Noah Baumbach", "Alfonso Cuarón", "Susanne Bier", "David Ayer", "Gina Prince-Bythewood",
-        "Harry Bradbeer", "Susan Johnson", "Vince Marcello", "Nzingha Stewart", "Alice Wu",
-        "Galder Gaztelu-Urrutia", "Bong Joon-ho", "Aaron Sorkin", "Spike Lee", "David Fincher", "George C. Wolfe"
-    ]
-    
-    countries = [
-        "United States", "United Kingdom", "Spain", "South Korea", "Germany",
-        "India", "Japan", "France", "Italy", "Brazil", "Mexico", "Canada",
-        "Australia", "Netherlands", "Sweden", "Norway", "Denmark", "Poland",
-        "Turkey", "Argentina", "Chile", "Colombia", "Peru", "Venezuela"
-    ]
-    
-    ratings = ["TV-MA", "TV-14", "R", "PG-13", "TV-PG", "PG", "TV-Y7", "TV-Y", "G", "NC-17"]
-    
-    genres = [
-        "Dramas", "International Movies", "Action & Adventure", "Comedies", "Thrillers",
-        "Romantic Movies", "Documentaries", "Horror Movies", "Sci-Fi & Fantasy", "Kids & Family",
-        "Anime Features", "Stand-Up Comedy", "Music & Musicals", "Sports Movies", "LGBTQ Movies",
-        "Classic Movies", "Independent Movies", "Faith & Spirituality", "Military Movies", "Westerns"
-    ]
-    
-    # Generate dataset
-    data = []
-    
-    for i in range(1000):  # Create 1000 records
-        show_id = f"s{i+1:04d}"
-        
-        # Type (70% movies, 30% TV shows)
-        content_type = "Movie" if random.random() < 0.7 else "TV Show"
-        
-        title = random.choice(titles) + f" {random.randint(1, 5)}" if random.random() < 0.3 else random.choice(titles)
-        
-        director = random.choice(directors)
-        
-        # Cast (multiple actors)
-        cast_list = [
-            "Ryan Reynolds", "Dwayne Johnson", "Gal Gadot", "Chris Hemsworth", "Scarlett Johansson",
-            "Robert Downey Jr.", "Chris Evans", "Mark Ruffalo", "Chris Pratt", "Tom Holland",
-            "Zendaya", "Timothée Chalamet", "Anya Taylor-Joy", "Millie Bobby Brown", "Finn Wolfhard"
-        ]
-        cast = ", ".join(random.sample(cast_list, random.randint(2, 4)))
-        
-        country = random.choice(countries)
-        
-        # Date added (random date between 2015-2023)
-        start_date = datetime(2015, 1, 1)
-        end_date = datetime(2023, 12, 31)
-        random_days = random.randint(0, (end_date - start_date).days)
-        date_added = (start_date + timedelta(days=random_days)).strftime("%B %d, %Y")
-        
-        # Release year (between 1990-2023)
-        release_year = random.randint(1990, 2023)
-        
-        rating = random.choice(ratings)
-        
-        # Duration based on type
-        if content_type == "Movie":
-            duration = f"{random.randint(80, 180)} min"
-        else:
-            duration = f"{random.randint(1, 8)} Season{'s' if random.randint(1, 8) > 1 else ''}"
-        
-        # Listed in (multiple genres)
-        num_genres = random.randint(1, 3)
-        listed_in = ", ".join(random.sample(genres, num_genres))
-        
-        # Description
-        descriptions = [
-            "A gripping story that will keep you on the edge of your seat.",
-            "An emotional journey through love, loss, and redemption.",
-            "A thrilling adventure that takes you to new worlds.",
-            "A heartwarming tale of friendship and family.",
-            "A dark and mysterious story with unexpected twists.",
-            "A hilarious comedy that will make you laugh out loud.",
-            "A thought-provoking documentary about real-life events.",
-            "An action-packed thriller with stunning visuals.",
-            "A romantic story that will touch your heart.",
-            "A sci-fi epic that explores the future of humanity."
-        ]
-        description = random.choice(descriptions)
-        
-        data.append({
-            'show_id': show_id,
-            'type': content_type,
-            'title': title,
-            'director': director,
-            'cast': cast,
-            'country': country,
-            'date_added': date_added,
-            'release_year': release_year,
-            'rating': rating,
-            'duration': duration,
-            'listed_in': listed_in,
-            'description': description
-        })
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
+    df = generate_batch(n_rows, np.random.default_rng(shard_seed(seed, 0)))
+
     # Save to CSV
-    df.to_csv('netflix_titles.csv', index=False)
+    df.to_csv(path, index=False)
     print(f"✅ Netflix dataset created successfully!")
     print(f"📊 Dataset shape: {df.shape}")
     print(f"📋 Columns: {list(df.columns)}")
     print(f"🎬 Movies: {len(df[df['type'] == 'Movie'])}")
     print(f"📺 TV Shows: {len(df[df['type'] == 'TV Show'])}")
-    
+
     return df
 
+def _int_range(text):
+    """Parse 'low-high' (or a single number) into an inclusive (low, high) tuple"""
+    low, _, high = text.partition('-')
+    return int(low), int(high or low)
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description='Generate a synthetic Netflix catalog')
+    parser.add_argument('--rows', type=int, default=1000, help='number of titles')
+    parser.add_argument('--output', default='netflix_titles.csv', help='.csv or .parquet file (numbered per shard)')
+    parser.add_argument('--shards', type=int, default=1, help='number of output files')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=42, help='base seed; each shard derives its own')
+    parser.add_argument('--batch-size', type=int, default=250_000, help='rows generated per batch')
+    parser.add_argument('--movie-share', type=float, default=DEFAULT_DISTRIBUTIONS['movie_share'],
+                        help='fraction of titles that are movies')
+    parser.add_argument('--genres-per-title', type=_int_range, default=DEFAULT_DISTRIBUTIONS['genres_per_title'],
+                        help='genres per title, e.g. 1-3')
+    parser.add_argument('--cast-size', type=_int_range, default=DEFAULT_DISTRIBUTIONS['cast_size'],
+                        help='cast members per title, e.g. 2-4')
+    args = parser.parse_args()
+
+    distributions = {
+        'movie_share': args.movie_share,
+        'genres_per_title': args.genres_per_title,
+        'cast_size': args.cast_size,
+    }
+    start = time.perf_counter()
+    paths = generate_catalog(args.output, args.rows, shards=args.shards, seed=args.seed, workers=args.workers,
+                             batch_size=args.batch_size, distributions=distributions)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Generated {args.rows:,} titles in {len(paths)} shard(s) in {elapsed:.1f}s "
+          f"({args.rows / elapsed:,.0f} rows/s)")
+    for path in paths:
+        print(f"   {path}")
+
 if __name__ == "__main__":
-    create_netflix_dataset()
+    main()
@@ -0,0 +1,163 @@
+"""
+Shared loader for the Netflix Movies and TV Shows dataset
+Reads the CSV with a declared column schema so the catalog loads as compact typed columns
+"""
+
+import os
+import time
+import pandas as pd
+from profiling import stage
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+DATASET_PATH = 'netflix_titles.csv'
+
+# read_csv options every entry point loads the catalog with, so they share one dataset cache
+READ_CSV_OPTIONS = {'encoding': 'utf-8', 'on_bad_lines': 'skip'}
+
+# Low-cardinality columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['type', 'rating', 'country']
+
+def netflix_schema():
+    """Return the column dtypes used when reading the dataset"""
+    return {
+        'show_id': 'string[pyarrow]' if HAS_PYARROW else 'string',
+        'type': 'category',
+        'rating': 'category',
+        'country': 'category',
+        'release_year': 'Int16',
+    }
+
+def memory_footprint(df):
+    """Return the deep memory usage of a DataFrame in bytes"""
+    return int(df.memory_usage(deep=True).sum())
+
+def _read_csv(path, engine, dtype, usecols, read_csv_kwargs):
+    """Read the CSV with the given parser engine"""
+    kwargs = dict(read_csv_kwargs)
+    if engine == 'pyarrow':
+        # The pyarrow parser has no row-skipping hook; it reports bad rows as errors instead
+        kwargs.pop('on_bad_lines', None)
+    return pd.read_csv(path, engine=engine, dtype=dtype, usecols=usecols, **kwargs)
+
+def load_netflix_data(path=DATASET_PATH, usecols=None, report=True, **read_csv_kwargs):
+    """Load the dataset with the typed schema, using the pyarrow CSV engine when available"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    dtype = netflix_schema()
+    if usecols is not None:
+        dtype = {column: value for column, value in dtype.items() if column in usecols}
+
+    start = time.perf_counter()
+    engine = 'pyarrow' if HAS_PYARROW else 'c'
+    try:
+        with stage('read_csv'):
+            df = _read_csv(path, engine, dtype, usecols, read_csv_kwargs)
+    except (ValueError, TypeError, ImportError) as e:
+        if engine != 'pyarrow':
+            raise
+        # Fall back to the C parser for inputs or options pyarrow can't handle
+        print(f"⚠️ pyarrow CSV engine failed ({e}); falling back to the C engine")
+        engine = 'c'
+        with stage('read_csv (C engine)'):
+            df = _read_csv(path, engine, dtype, usecols, read_csv_kwargs)
+    elapsed = time.perf_counter() - start
+
+    with stage('memory_footprint'):
+        memory_bytes = memory_footprint(df)
+    df.attrs['load_report'] = {
+        'path': path,
+        'engine': engine,
+        'rows': len(df),
+        'columns': len(df.columns),
+        'seconds': elapsed,
+        'memory_bytes': memory_bytes,
+    }
+    if report:
+        print_load_report(df)
+    return df
+
+def read_netflix_chunks(path=DATASET_PATH, chunksize=100_000, usecols=None, **read_csv_kwargs):
+    """Iterate over the dataset in typed DataFrame chunks of at most chunksize rows"""
+    dtype = netflix_schema()
+    if usecols is not None:
+        dtype = {column: value for column, value in dtype.items() if column in usecols}
+    # Chunked reads need the C parser; the pyarrow engine only reads whole files
+    return pd.read_csv(path, engine='c', dtype=dtype, usecols=usecols, chunksize=chunksize,
+                       **read_csv_kwargs)
+
+def print_load_report(df):
+    """Print load time and memory footprint recorded by load_netflix_data"""
+    info = df.attrs.get('load_report')
+    if not info:
+        return
+    print(f"⏱️ Loaded {info['rows']:,} rows x {info['columns']} columns in {info['seconds']:.3f}s "
+          f"({info['engine']} engine), memory footprint: {info['memory_bytes'] / 1024**2:.2f} MB")
+
+# Duration units recognised by parse_duration; any other unit (e.g. '8 Episodes') parses to <NA>
+DURATION_UNITS = {
+    'min': 'minutes',
+    'mins': 'minutes',
+    'minute': 'minutes',
+    'minutes': 'minutes',
+    'season': 'seasons',
+    'seasons': 'seasons',
+}
+DURATION_PATTERN = r'^\s*(\d+)\s*([A-Za-z]+)\.?\s*$'
+
+def parse_duration(duration):
+    """Split duration strings into nullable-integer (minutes, seasons) Series
+
+    Only the distinct strings are parsed; values with an unknown unit or no number become <NA>.
+    """
+    codes, distinct = pd.factorize(duration)
+    parts = pd.Series(distinct, dtype=object).str.extract(DURATION_PATTERN)
+    value = pd.to_numeric(parts[0]).astype('Int32')
+    unit = parts[1].str.lower().map(DURATION_UNITS)
+    columns = []
+    for name in ('minutes', 'seasons'):
+        parsed = value.where(unit == name).array
+        columns.append(pd.Series(parsed.take(codes, allow_fill=True), index=duration.index))
+    return tuple(columns)
+
+# date_added spellings seen in the Kaggle export, create_dataset.py and download_dataset.py
+DATE_ADDED_FORMATS = ['%B %d, %Y', '%B %d %Y', '%Y-%m-%d']
+
+def parse_date_added(date_added):
+    """Parse date_added strings with explicit formats, one parse per distinct string
+
+    Each known format is tried on the strings still unparsed; anything left over goes through
+    pandas' per-element inference, and unparseable strings become NaT.
+    """
+    codes, distinct = pd.factorize(date_added)
+    distinct = pd.Series(distinct, dtype=object).str.strip()
+    parsed = pd.Series(pd.NaT, index=distinct.index, dtype='datetime64[ns]')
+    for fmt in DATE_ADDED_FORMATS:
+        pending = parsed.isna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(distinct[pending], format=fmt, errors='coerce')
+    pending = parsed.isna()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(distinct[pending], format='mixed', errors='coerce')
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=date_added.index)
+
+def add_derived_columns(df):
+    """Add the parsed date and duration columns used by the visualizations"""
+    if 'date_added' in df.columns and 'date_added_clean' not in df.columns:
+        with stage('parse_date_added'):
+            df['date_added_clean'] = parse_date_added(df['date_added'])
+    if 'date_added_clean' in df.columns and 'month_added' not in df.columns:
+        df['month_added'] = df['date_added_clean'].dt.month
+    if {'type', 'duration'} <= set(df.columns) and 'duration_minutes' not in df.columns:
+        # Movies are listed in minutes and TV shows in seasons
+        with stage('parse_duration'):
+            minutes, seasons = parse_duration(df['duration'])
+            df['duration_minutes'] = minutes.where(df['type'] == 'Movie')
+            df['duration_seasons'] = seasons.where(df['type'] == 'TV Show')
+    return df
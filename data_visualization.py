@@ -4,12 +4,23 @@ Using Seaborn and Matplotlib to create meaningful visualizations
 Based on Kaggle Netflix Dataset: https://www.kaggle.com/datasets/shivamb/netflix-shows
 """
 
+import os
+import sys
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime
 import warnings
+from data_loader import DATASET_PATH, READ_CSV_OPTIONS
+from dataset_cache import load_prepared_dataset, read_count_cube
+from multivalue import CatalogTokens
+from aggregates import AggregationEngine, box_stats, violin_stats, expand_counts
+import profiling
+from profiling import stage
+from figure_cache import FigureCache, render_cached
+from panel_rendering import (is_headless, render_panels_parallel, draw_binned_scatter, draw_binned_strip,
+                             draw_density, DENSITY_ROW_THRESHOLD)
 warnings.filterwarnings('ignore')
 
 # Set style for better-looking plots
@@ -17,20 +28,22 @@ plt.style.use('default')
 sns.set_style("whitegrid")
 sns.set_palette("husl")
 
-def load_and_prepare_data():
+def load_and_prepare_data(path=DATASET_PATH):
     """Load and prepare the Netflix dataset"""
     try:
-        # Load the dataset
-        df = pd.read_csv('netflix_titles.csv')
+        # Load the typed dataset with derived columns (from the columnar cache when current)
+        df = load_prepared_dataset(path, **READ_CSV_OPTIONS)
         print(f"Dataset loaded successfully! Shape: {df.shape}")
         print(f"Columns: {list(df.columns)}")
         return df
     except FileNotFoundError:
-        print("Dataset file not found. Please ensure 'netflix_titles.csv' is in the current directory.")
+        print(f"Dataset file not found. Please ensure '{path}' is in the current directory.")
         return None
 
-def basic_data_info(df):
+def basic_data_info(df, tokens=None):
     """Display basic information about the dataset"""
+    if tokens is None:
+        tokens = CatalogTokens(df)
     print("\n" + "="*50)
     print("DATASET OVERVIEW")
     print("="*50)
@@ -44,17 +57,18 @@ def basic_data_info(df):
     print(df['type'].value_counts())
     
     print(f"\nTop 10 countries by content:")
-    print(df['country'].value_counts().head(10))
+    # Co-productions ("United States, India") count once for each country
+    print(tokens.counts('country').head(10))
 
-def create_visualizations(df):
+def create_visualizations(df, engine=None, workers=1, output_path='netflix_analysis.png', cache=None):
     """Create various types of visualizations"""
-    
-    # Set up the plotting area
-    fig = plt.figure(figsize=(20, 24))
-    
-    # 1. Content Type Distribution (Bar Plot)
-    plt.subplot(4, 3, 1)
-    type_counts = df['type'].value_counts()
+    if engine is None:
+        engine = AggregationEngine(df)
+    render_visualizations(engine.run(), output_path, workers=workers, cache=cache)
+
+def plot_type_distribution(agg):
+    """1. Content Type Distribution (Bar Plot)"""
+    type_counts = agg.type_counts.sort_values(ascending=False)
     colors = ['#E50914', '#221F1F']  # Netflix red and black
     bars = plt.bar(type_counts.index, type_counts.values, color=colors)
     plt.title('Distribution of Movies vs TV Shows', fontsize=14, fontweight='bold')
@@ -66,18 +80,20 @@ def create_visualizations(df):
         height = bar.get_height()
         plt.text(bar.get_x() + bar.get_width()/2., height + 1,
                 f'{int(height)}', ha='center', va='bottom', fontweight='bold')
-    
-    # 2. Release Year Distribution (Histogram)
-    plt.subplot(4, 3, 2)
-    plt.hist(df['release_year'].dropna(), bins=30, color='skyblue', alpha=0.7, edgecolor='black')
+
+def plot_release_years(agg):
+    """2. Release Year Distribution (Histogram)"""
+    year_counts = agg.release_year_counts
+    plt.hist(year_counts.index.astype(float), weights=year_counts.values, bins=30,
+             color='skyblue', alpha=0.7, edgecolor='black')
     plt.title('Distribution of Content by Release Year', fontsize=14, fontweight='bold')
     plt.xlabel('Release Year')
     plt.ylabel('Frequency')
     plt.xticks(rotation=45)
-    
-    # 3. Rating Distribution (Bar Plot)
-    plt.subplot(4, 3, 3)
-    rating_counts = df['rating'].value_counts().head(10)
+
+def plot_ratings(agg):
+    """3. Rating Distribution (Bar Plot)"""
+    rating_counts = agg.rating_counts.nlargest(10)
     bars = plt.bar(range(len(rating_counts)), rating_counts.values, color='lightcoral')
     plt.title('Top 10 Content Ratings', fontsize=14, fontweight='bold')
     plt.xlabel('Rating')
@@ -89,160 +105,255 @@ def create_visualizations(df):
         height = bar.get_height()
         plt.text(bar.get_x() + bar.get_width()/2., height + 20,
                 f'{int(height)}', ha='center', va='bottom')
-    
-    # 4. Duration Analysis by Type (Box Plot)
-    plt.subplot(4, 3, 4)
-    # Extract numeric duration for movies
-    df_movies = df[df['type'] == 'Movie'].copy()
-    df_movies['duration_minutes'] = df_movies['duration'].str.extract('(\d+)').astype(float)
-    
-    # Extract numeric duration for TV shows (seasons)
-    df_shows = df[df['type'] == 'TV Show'].copy()
-    df_shows['duration_seasons'] = df_shows['duration'].str.extract('(\d+)').astype(float)
-    
-    # Create box plot for movie durations
-    plt.boxplot(df_movies['duration_minutes'].dropna(), labels=['Movies'])
+
+def plot_movie_durations(agg):
+    """4. Duration Analysis by Type (Box Plot)"""
+    # Box statistics come from the histogram of movie durations
+    if len(agg.movie_minutes_counts) > 0:
+        plt.gca().bxp([box_stats(agg.movie_minutes_counts, 'Movies')])
     plt.title('Movie Duration Distribution (Minutes)', fontsize=14, fontweight='bold')
     plt.ylabel('Duration (Minutes)')
-    
-    # 5. Top Countries by Content (Horizontal Bar Plot)
-    plt.subplot(4, 3, 5)
-    top_countries = df['country'].value_counts().head(10)
+
+def plot_top_countries(agg):
+    """5. Top Countries by Content (Horizontal Bar Plot)"""
+    top_countries = agg.country_counts.nlargest(10)
     plt.barh(range(len(top_countries)), top_countries.values, color='lightgreen')
     plt.title('Top 10 Countries by Content Count', fontsize=14, fontweight='bold')
     plt.xlabel('Number of Titles')
     plt.yticks(range(len(top_countries)), top_countries.index)
-    
-    # 6. Content Added Over Time (Line Plot)
-    plt.subplot(4, 3, 6)
-    df['date_added_clean'] = pd.to_datetime(df['date_added'], errors='coerce')
-    monthly_additions = df.groupby(df['date_added_clean'].dt.to_period('M')).size()
-    monthly_additions.plot(kind='line', color='purple', linewidth=2)
+
+def plot_additions_over_time(agg):
+    """6. Content Added Over Time (Line Plot)"""
+    monthly_additions = agg.monthly_additions.sort_index()
+    if len(monthly_additions) > 0:
+        monthly_additions.plot(kind='line', color='purple', linewidth=2)
     plt.title('Content Added to Netflix Over Time', fontsize=14, fontweight='bold')
     plt.xlabel('Date')
     plt.ylabel('Number of Titles Added')
     plt.xticks(rotation=45)
-    
-    # 7. Genre Analysis (Violin Plot)
-    plt.subplot(4, 3, 7)
+
+def plot_genre_release_years(agg):
+    """7. Genre Analysis (Violin Plot)"""
     # Get top genres
-    all_genres = []
-    for genres in df['listed_in'].dropna():
-        all_genres.extend([genre.strip() for genre in genres.split(',')])
-    
-    genre_counts = pd.Series(all_genres).value_counts().head(8)
+    genre_counts = agg.genre_counts.nlargest(8)
     
     # Create data for violin plot (release years by top genres)
-    genre_year_data = []
+    genre_year_stats = []
     genre_labels = []
     
     for genre in genre_counts.index:
-        genre_movies = df[df['listed_in'].str.contains(genre, na=False)]
-        years = genre_movies['release_year'].dropna()
-        if len(years) > 0:
-            genre_year_data.append(years)
+        if genre in agg.genre_year_counts.index:
+            genre_year_stats.append(violin_stats(agg.genre_year_counts.loc[genre]))
             genre_labels.append(genre)
     
-    if genre_year_data:
-        plt.violinplot(genre_year_data, positions=range(len(genre_labels)))
+    if genre_year_stats:
+        plt.gca().violin(genre_year_stats, positions=range(len(genre_labels)))
         plt.title('Release Year Distribution by Top Genres', fontsize=14, fontweight='bold')
         plt.xlabel('Genre')
         plt.ylabel('Release Year')
         plt.xticks(range(len(genre_labels)), [label[:15] + '...' if len(label) > 15 else label 
                                             for label in genre_labels], rotation=45)
-    
-    # 8. Content Type by Rating (Stacked Bar Plot)
-    plt.subplot(4, 3, 8)
-    rating_type_cross = pd.crosstab(df['rating'], df['type'])
-    rating_type_cross.plot(kind='bar', stacked=True, ax=plt.gca())
+
+def plot_type_by_rating(agg):
+    """8. Content Type by Rating (Stacked Bar Plot)"""
+    if len(agg.rating_type_counts) > 0:
+        rating_type_cross = agg.rating_type_counts.unstack(fill_value=0)
+        rating_type_cross.columns.name = 'type'
+        rating_type_cross.plot(kind='bar', stacked=True, ax=plt.gca())
+        plt.legend(title='Type')
     plt.title('Content Type Distribution by Rating', fontsize=14, fontweight='bold')
     plt.xlabel('Rating')
     plt.ylabel('Count')
-    plt.legend(title='Type')
     plt.xticks(rotation=45)
-    
-    # 9. Movie Duration vs Release Year (Scatter Plot)
-    plt.subplot(4, 3, 9)
-    movies_clean = df_movies.dropna(subset=['duration_minutes', 'release_year'])
-    plt.scatter(movies_clean['release_year'], movies_clean['duration_minutes'], 
-               alpha=0.6, color='orange', s=20)
+
+def plot_duration_vs_year(agg):
+    """9. Movie Duration vs Release Year (Scatter Plot)"""
+    # One marker per distinct (year, duration) pair; repeated pairs would overplot anyway
+    year_minutes = agg.movie_year_minutes_counts
+    if len(year_minutes) > 0:
+        years = year_minutes.index.get_level_values(0).astype(float)
+        minutes = year_minutes.index.get_level_values(1).astype(float)
+        if year_minutes.sum() > DENSITY_ROW_THRESHOLD:
+            # Large catalogs: binned density image instead of a solid blob of markers
+            draw_binned_scatter(plt.gca(), years, minutes, year_minutes.values)
+        else:
+            plt.scatter(years, minutes, alpha=0.6, color='orange', s=20)
     plt.title('Movie Duration vs Release Year', fontsize=14, fontweight='bold')
     plt.xlabel('Release Year')
     plt.ylabel('Duration (Minutes)')
-    
-    # 10. Top Directors (Bar Plot)
-    plt.subplot(4, 3, 10)
-    top_directors = df['director'].value_counts().head(8)
+
+def plot_top_directors(agg):
+    """10. Top Directors (Bar Plot)"""
+    top_directors = agg.director_counts.nlargest(8)
     plt.bar(range(len(top_directors)), top_directors.values, color='teal')
     plt.title('Top 8 Directors by Content Count', fontsize=14, fontweight='bold')
     plt.xlabel('Director')
     plt.ylabel('Number of Titles')
     plt.xticks(range(len(top_directors)), [name[:15] + '...' if len(name) > 15 else name 
                                          for name in top_directors.index], rotation=45)
-    
-    # 11. Content by Month Added (KDE Plot)
-    plt.subplot(4, 3, 11)
-    df['month_added'] = df['date_added_clean'].dt.month
-    monthly_dist = df['month_added'].dropna()
-    sns.kdeplot(monthly_dist, fill=True, color='red', alpha=0.7)
+
+def plot_month_added(agg):
+    """11. Content by Month Added (KDE Plot)"""
+    month_counts = agg.month_counts
+    if len(month_counts) > 1:
+        # Twelve weighted points, binned onto the grid and smoothed by FFT
+        draw_density(plt.gca(), month_counts, color='red', alpha=0.7)
     plt.title('Distribution of Content Added by Month', fontsize=14, fontweight='bold')
     plt.xlabel('Month')
     plt.ylabel('Density')
     plt.xticks(range(1, 13), ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
                              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-    
-    # 12. TV Show Seasons Distribution (Swarm Plot)
-    plt.subplot(4, 3, 12)
-    seasons_data = df_shows['duration_seasons'].dropna()
-    if len(seasons_data) > 0:
-        # Create swarm plot data
-        y_data = np.random.normal(0, 0.1, len(seasons_data))
-        plt.scatter(seasons_data, y_data, alpha=0.6, s=10, color='darkblue')
+
+def plot_show_seasons(agg):
+    """12. TV Show Seasons Distribution (Swarm Plot)"""
+    seasons_counts = agg.show_seasons_counts
+    if len(seasons_counts) > 0:
+        if seasons_counts.sum() > DENSITY_ROW_THRESHOLD:
+            # Large catalogs: the jitter's expected density, drawn as one image
+            draw_binned_strip(plt.gca(), seasons_counts.index, seasons_counts.values)
+        else:
+            # Create swarm plot data, capping the points drawn per season count
+            seasons_data = expand_counts(seasons_counts)
+            # Seeded jitter: the same counts always draw the same panel, cached or not
+            y_data = np.random.default_rng(0).normal(0, 0.1, len(seasons_data))
+            plt.scatter(seasons_data, y_data, alpha=0.6, s=10, color='darkblue')
         plt.title('TV Show Seasons Distribution', fontsize=14, fontweight='bold')
         plt.xlabel('Number of Seasons')
         plt.ylabel('')
         plt.yticks([])
+
+def plot_top_collaborations(agg):
+    """13. Top Director-Cast Collaborations (Horizontal Bar Plot)"""
+    top_pairs = agg.director_cast_counts.sort_values(ascending=False, kind='stable').head(10)
+    if len(top_pairs) > 0:
+        labels = [f"{director} & {actor}" for director, actor in top_pairs.index]
+        labels = [label[:35] + '...' if len(label) > 35 else label for label in labels]
+        plt.barh(range(len(top_pairs)), top_pairs.values, color='goldenrod')
+        plt.yticks(range(len(top_pairs)), labels)
+        plt.gca().invert_yaxis()
+    else:
+        plt.text(0.5, 0.5, 'No comma-separated director/cast credits', ha='center', va='center',
+                 transform=plt.gca().transAxes)
+    plt.title('Top Director-Cast Collaborations', fontsize=14, fontweight='bold')
+    plt.xlabel('Titles Together')
+
+# The 13 panels in grid order; each draws on the current axes from the aggregates alone
+PANELS = [
+    plot_type_distribution,
+    plot_release_years,
+    plot_ratings,
+    plot_movie_durations,
+    plot_top_countries,
+    plot_additions_over_time,
+    plot_genre_release_years,
+    plot_type_by_rating,
+    plot_duration_vs_year,
+    plot_top_directors,
+    plot_month_added,
+    plot_show_seasons,
+    plot_top_collaborations,
+]
+GRID_ROWS, GRID_COLS = 5, 3
+
+# Aggregate fields each panel reads; the figure cache re-renders a panel only when these change
+PANEL_INPUTS = {
+    'plot_type_distribution': ['type_counts'],
+    'plot_release_years': ['release_year_counts'],
+    'plot_ratings': ['rating_counts'],
+    'plot_movie_durations': ['movie_minutes_counts'],
+    'plot_top_countries': ['country_counts'],
+    'plot_additions_over_time': ['monthly_additions'],
+    'plot_genre_release_years': ['genre_counts', 'genre_year_counts'],
+    'plot_type_by_rating': ['rating_type_counts'],
+    'plot_duration_vs_year': ['movie_year_minutes_counts'],
+    'plot_top_directors': ['director_counts'],
+    'plot_month_added': ['month_counts'],
+    'plot_show_seasons': ['show_seasons_counts'],
+    'plot_top_collaborations': ['director_cast_counts'],
+}
+FIGURE_SIZE = (20, 30)
+
+def render_visualizations(agg, output_path='netflix_analysis.png', show=None, workers=1, title=None, dpi=300,
+                          cache=None):
+    """Create the 13-panel figure from precomputed (possibly merged) aggregates
+
+    With workers > 1 the panels render concurrently in a process pool and are composited
+    into one image; with a FigureCache the panels are composited from cached tiles and only
+    panels whose inputs changed are rendered. show=None shows the figure only when a display
+    is available.
+    """
+    if show is None:
+        show = not is_headless()
+    if cache is not None or (workers and workers > 1):
+        if cache is not None:
+            rendered = render_cached(agg, cache, output_path, workers=workers, dpi=dpi, title=title)
+            print(f"🖼️ Figure cache: {len(rendered)} of {len(PANELS)} panels rendered")
+        else:
+            render_panels_parallel(agg, output_path, workers=workers, dpi=dpi, title=title)
+        if show:
+            image = plt.imread(output_path)
+            plt.figure(figsize=FIGURE_SIZE)
+            plt.imshow(image)
+            plt.axis('off')
+            plt.show()
+        return
     
-    plt.tight_layout()
-    plt.savefig('netflix_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    # Set up the plotting area
+    fig = plt.figure(figsize=FIGURE_SIZE)
+    if title:
+        fig.suptitle(title, fontsize=20, fontweight='bold')
+    for number, panel in enumerate(PANELS, 1):
+        with stage(f'panel {number:02d} {panel.__name__}'):
+            plt.subplot(GRID_ROWS, GRID_COLS, number)
+            panel(agg)
+    
+    with stage('tight_layout'):
+        plt.tight_layout()
+    with stage('savefig'):
+        plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close(fig)
 
-def generate_insights(df):
+def generate_insights(df, engine=None):
     """Generate insights from the data analysis"""
+    if engine is None:
+        engine = AggregationEngine(df)
+    return insights_from_aggregates(engine.run())
+
+def insights_from_aggregates(agg):
+    """Generate insights from precomputed aggregates"""
     insights = []
     
     # Content type insights
-    movie_count = len(df[df['type'] == 'Movie'])
-    show_count = len(df[df['type'] == 'TV Show'])
-    total_count = len(df)
+    movie_count = agg.count_of('type_counts', 'Movie')
+    show_count = agg.count_of('type_counts', 'TV Show')
+    total_count = agg.rows
     
     insights.append(f"📊 **Content Distribution**: Netflix has {movie_count:,} movies ({movie_count/total_count*100:.1f}%) and {show_count:,} TV shows ({show_count/total_count*100:.1f}%)")
     
     # Release year insights
-    recent_content = len(df[df['release_year'] >= 2010])
+    recent_content = agg.released_since(2010)
     insights.append(f"🎬 **Recent Content**: {recent_content:,} titles ({recent_content/total_count*100:.1f}%) were released in 2010 or later")
     
     # Rating insights
-    top_rating = df['rating'].value_counts().index[0]
-    top_rating_count = df['rating'].value_counts().iloc[0]
+    top_rating = agg.rating_counts.idxmax()
+    top_rating_count = agg.rating_counts.max()
     insights.append(f"📺 **Most Common Rating**: {top_rating} is the most common rating with {top_rating_count:,} titles")
     
     # Country insights
-    top_country = df['country'].value_counts().index[0]
-    top_country_count = df['country'].value_counts().iloc[0]
-    insights.append(f"🌍 **Top Country**: {top_country} produces the most content with {top_country_count:,} titles")
+    top_country = agg.country_counts.idxmax()
+    top_country_count = agg.country_counts.max()
+    top_country_movies = agg.count_of('country_type_counts', (top_country, 'Movie'))
+    top_country_shows = agg.count_of('country_type_counts', (top_country, 'TV Show'))
+    insights.append(f"🌍 **Top Country**: {top_country} produces the most content with {top_country_count:,} titles ({top_country_movies:,} movies, {top_country_shows:,} TV shows)")
     
     # Duration insights
-    df_movies = df[df['type'] == 'Movie'].copy()
-    df_movies['duration_minutes'] = df_movies['duration'].str.extract('(\d+)').astype(float)
-    avg_duration = df_movies['duration_minutes'].mean()
+    avg_duration = agg.movie_duration_mean()
     insights.append(f"⏱️ **Average Movie Duration**: {avg_duration:.1f} minutes")
     
     # Genre insights
-    all_genres = []
-    for genres in df['listed_in'].dropna():
-        all_genres.extend([genre.strip() for genre in genres.split(',')])
-    top_genre = pd.Series(all_genres).value_counts().index[0]
+    top_genre = agg.genre_counts.idxmax()
     insights.append(f"🎭 **Most Popular Genre**: {top_genre} is the most common genre")
     
     return insights
@@ -251,22 +362,38 @@ def main():
     """Main function to run the analysis"""
     print("🎬 Netflix Movies and TV Shows Data Visualization Analysis")
     print("="*60)
+    # --profile or NETFLIX_PROFILE=1 times every pipeline step and panel
+    profiling.configure('--profile' in sys.argv[1:])
     
     # Load data
-    df = load_and_prepare_data()
+    with stage('load'):
+        df = load_and_prepare_data()
     if df is None:
         return
     
-    # Display basic info
-    basic_data_info(df)
+    # Every panel and insight reads from one memoized aggregation pass; the counts are slices of
+    # the count cube saved with the dataset cache
+    engine = AggregationEngine(df, cube=read_count_cube(DATASET_PATH, **READ_CSV_OPTIONS))
+    
+    # Display basic info (sharing the engine's tokenized columns)
+    with stage('basic_data_info'):
+        basic_data_info(df, engine.tokens)
+    
+    with stage('aggregate'):
+        engine.run()
     
-    # Create visualizations
+    # Create visualizations (NETFLIX_RENDER_WORKERS > 1 renders the panels in a process pool;
+    # with --figure-cache or NETFLIX_FIGURE_CACHE, panels whose aggregates didn't change come from cached tiles)
     print("\n📈 Creating visualizations...")
-    create_visualizations(df)
+    workers = int(os.environ.get('NETFLIX_RENDER_WORKERS', '1'))
+    with stage('render'):
+        create_visualizations(df, engine, workers=workers, cache=FigureCache.from_env('--figure-cache' in sys.argv[1:]))
+    engine.run().print_timings()
     
     # Generate insights
     print("\n💡 Generating insights...")
-    insights = generate_insights(df)
+    with stage('insights'):
+        insights = generate_insights(df, engine)
     
     print("\n" + "="*50)
     print("KEY INSIGHTS")
@@ -275,6 +402,7 @@ def main():
         print(insight)
     
     print(f"\n✅ Analysis complete! Visualization saved as 'netflix_analysis.png'")
+    profiling.report()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,217 @@
+"""
+Columnar on-disk cache for the prepared Netflix dataset
+Stores the typed and derived columns as an Arrow/Feather file next to the CSV, together with the
+count cube the aggregates are sliced from and, once first queried, the full-text index
+"""
+
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+from data_loader import (DATASET_PATH, HAS_PYARROW, load_netflix_data, add_derived_columns,
+                         memory_footprint, print_load_report)
+from count_cube import CUBE_VERSION, CountCube
+from text_index import TextIndex
+from profiling import stage
+
+# Bump whenever the schema or the derived columns change so stale caches are rebuilt
+CACHE_VERSION = 6
+
+def cache_paths(csv_path):
+    """Return the (data, metadata) cache file paths for a CSV file"""
+    base = os.path.splitext(csv_path)[0]
+    return base + '.cache.feather', base + '.cache.json'
+
+def cube_path(csv_path):
+    """Return the count cube cache file path for a CSV file"""
+    return os.path.splitext(csv_path)[0] + '.cache.cube.npz'
+
+def text_index_path(csv_path):
+    """Return the full-text index cache file path for a CSV file"""
+    return os.path.splitext(csv_path)[0] + '.cache.text.npz'
+
+def file_hash(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_metadata(meta_path):
+    """Read a JSON metadata file (cache metadata, manifests, state records), None when missing or unreadable"""
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_metadata(meta_path, metadata):
+    """Write a JSON metadata file atomically"""
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+# read_csv options that never change a successfully parsed frame, with their no-op values (None: any
+# value). on_bad_lines only decides whether a malformed row fails the parse or is dropped, and a cache
+# is only ever written from a parse that succeeded; UTF-8 is what read_csv decodes with anyway.
+FRAME_NEUTRAL_OPTIONS = {
+    'on_bad_lines': None,
+    'encoding': {'utf-8', 'utf8'},
+}
+
+def _is_frame_neutral(name, value):
+    if name not in FRAME_NEUTRAL_OPTIONS:
+        return False
+    neutral = FRAME_NEUTRAL_OPTIONS[name]
+    return neutral is None or (isinstance(value, str) and value.lower().replace('_', '-') in neutral)
+
+def read_options(read_csv_kwargs=None):
+    """Normalized, JSON-comparable form of the read_csv options a cache is parsed with
+
+    Options left at None or that can't change the parsed frame are dropped and usecols is
+    order-independent, so equivalent calls share one cache.
+    """
+    options = {name: value for name, value in (read_csv_kwargs or {}).items()
+               if value is not None and not _is_frame_neutral(name, value)}
+    if 'usecols' in options and not callable(options['usecols']):
+        options['usecols'] = sorted(map(str, options['usecols']))
+    return json.loads(json.dumps(options, sort_keys=True, default=repr))
+
+def is_cache_valid(csv_path, metadata=None, read_csv_kwargs=None):
+    """Check whether the cache matches the CSV and the read options, by size/mtime first and content hash second"""
+    data_path, meta_path = cache_paths(csv_path)
+    if metadata is None:
+        metadata = read_metadata(meta_path)
+    if not metadata or metadata.get('version') != CACHE_VERSION or not os.path.exists(data_path):
+        return False
+    # A cache parsed with other options (usecols, na_values, ...) holds different data
+    if metadata.get('read_options') != read_options(read_csv_kwargs):
+        return False
+
+    stat = os.stat(csv_path)
+    if metadata.get('size') == stat.st_size and metadata.get('mtime') == stat.st_mtime:
+        return True
+    if metadata.get('size') != stat.st_size:
+        return False
+
+    # Same size but touched: only a content change invalidates the cache
+    if file_hash(csv_path) != metadata.get('sha256'):
+        return False
+    metadata['mtime'] = stat.st_mtime
+    write_metadata(meta_path, metadata)
+    return True
+
+def write_cache(df, csv_path, tokens=None, sha256=None, read_csv_kwargs=None):
+    """Write the prepared DataFrame, its count cube and their metadata next to the CSV
+
+    sha256 is the CSV's content hash when the caller already has it (saves rereading the file);
+    read_csv_kwargs are the options df was parsed with.
+    """
+    data_path, meta_path = cache_paths(csv_path)
+    stat = os.stat(csv_path)
+    tmp_path = data_path + '.tmp'
+    # Uncompressed Arrow IPC in one record batch so reads (and worker processes) can memory-map
+    # every column as one contiguous buffer
+    df.reset_index(drop=True).to_feather(tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+    os.replace(tmp_path, data_path)
+    with stage('cube_write'):
+        CountCube.from_frame(df, tokens).save(cube_path(csv_path))
+    write_metadata(meta_path, {
+        'version': CACHE_VERSION,
+        'csv_path': os.path.abspath(csv_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': sha256 or file_hash(csv_path),
+        'read_options': read_options(read_csv_kwargs),
+        'rows': len(df),
+        'columns': list(df.columns),
+        'cube_version': CUBE_VERSION,
+    })
+
+def read_cache(csv_path):
+    """Read the cached DataFrame with memory-mapped columns"""
+    from pyarrow import feather
+    data_path, _ = cache_paths(csv_path)
+    return feather.read_table(data_path, memory_map=True).to_pandas()
+
+def read_count_cube(csv_path, **read_csv_kwargs):
+    """Read the cached count cube, or None when the dataset cache is stale or has no cube
+
+    read_csv_kwargs are the options the dataset was loaded with, as for load_prepared_dataset.
+    """
+    path = cube_path(csv_path)
+    if not os.path.exists(path) or not is_cache_valid(csv_path, read_csv_kwargs=read_csv_kwargs):
+        return None
+    try:
+        with stage('cube_read'):
+            return CountCube.load(path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+def load_text_index(csv_path=DATASET_PATH, df=None, **read_csv_kwargs):
+    """Full-text index of the catalog, read from the cache or built (and stored) once per dataset version"""
+    path = text_index_path(csv_path)
+    metadata = read_metadata(cache_paths(csv_path)[1])
+    if metadata and is_cache_valid(csv_path, metadata, read_csv_kwargs):
+        fingerprint = metadata['sha256']
+    else:
+        fingerprint = file_hash(csv_path)
+    if os.path.exists(path):
+        try:
+            with stage('text_index_read'):
+                index = TextIndex.load(path, fingerprint)
+            if index is not None:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+    if df is None:
+        df = load_prepared_dataset(csv_path, report=False, **read_csv_kwargs)
+    with stage('text_index_build'):
+        index = TextIndex.from_frame(df)
+    try:
+        with stage('text_index_write'):
+            index.save(path, fingerprint)
+    except OSError as e:
+        print(f"⚠️ Could not write full-text index: {e}")
+    return index
+
+def load_prepared_dataset(path=DATASET_PATH, use_cache=True, report=True, **read_csv_kwargs):
+    """Load the typed dataset with derived columns, reusing the columnar cache when it is current
+
+    The cache is only reused when it was parsed with the same read_csv options.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    use_cache = use_cache and HAS_PYARROW
+
+    with stage('cache_check'):
+        cache_valid = use_cache and is_cache_valid(path, read_csv_kwargs=read_csv_kwargs)
+    if cache_valid:
+        start = time.perf_counter()
+        with stage('cache_read'):
+            df = read_cache(path)
+        elapsed = time.perf_counter() - start
+        df.attrs['load_report'] = {
+            'path': cache_paths(path)[0],
+            'engine': 'feather cache',
+            'rows': len(df),
+            'columns': len(df.columns),
+            'seconds': elapsed,
+            'memory_bytes': memory_footprint(df),
+        }
+        if report:
+            print_load_report(df)
+        return df
+
+    df = load_netflix_data(path, report=report, **read_csv_kwargs)
+    add_derived_columns(df)
+    if use_cache:
+        try:
+            with stage('cache_write'):
+                write_cache(df, path, read_csv_kwargs=read_csv_kwargs)
+        except OSError as e:
+            print(f"⚠️ Could not write dataset cache: {e}")
+    return df
@@ -1,10 +1,38 @@
 """
 Script to download the Netflix Movies and TV Shows dataset from Kaggle
+Ingestion fetches the dataset from a configurable source (Kaggle, a local directory or file, or an
+HTTP file-server mirror for offline runs), resumes interrupted transfers, verifies SHA-256
+checksums, skips the transfer when the source is unchanged, stream-decompresses the CSV while
+hashing it and builds the columnar cache from a single parse; the dataset version is recorded
+next to the CSV
 """
 
+import argparse
+import datetime
+import hashlib
 import os
+import sys
+import urllib.error
+import urllib.request
 import zipfile
 import pandas as pd
+from data_loader import DATASET_PATH, HAS_PYARROW, load_netflix_data, add_derived_columns
+from dataset_cache import file_hash, write_cache, read_metadata, write_metadata
+
+KAGGLE_DATASET = 'shivamb/netflix-shows'
+
+# Where the dataset comes from: 'kaggle', a local directory or file, or an http(s) URL
+SOURCE_ENV = 'NETFLIX_DATASET_SOURCE'
+DEFAULT_SOURCE = 'kaggle'
+
+# Downloaded archives are kept here, so an unchanged source is never transferred twice
+MIRROR_DIR = '.dataset_mirror'
+
+# Bump whenever the version record layout changes
+INGEST_VERSION = 1
+
+BLOCK_SIZE = 1 << 20
+HTTP_TIMEOUT = 30
 
 def create_sample_dataset():
     """Create a sample dataset for demonstration purposes"""
@@ -34,48 +62,271 @@ def create_sample_dataset():
     print("Sample dataset created successfully!")
     return df
 
-def download_kaggle_dataset():
-    """Download the actual dataset from Kaggle (requires Kaggle API)"""
+def source_record_path(csv_path=DATASET_PATH):
+    """Return the path of the dataset version record for a CSV file"""
+    return os.path.splitext(csv_path)[0] + '.source.json'
+
+def _is_url(source):
+    return source.startswith(('http://', 'https://'))
+
+def resolve_local_source(source, csv_name=os.path.basename(DATASET_PATH)):
+    """The CSV or archive to ingest from a local file or mirror directory"""
+    if os.path.isfile(source):
+        return source
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"Dataset source {source!r} does not exist")
+    candidates = [csv_name, csv_name + '.zip', 'netflix-shows.zip']
+    candidates += sorted(name for name in os.listdir(source) if name.endswith('.zip'))
+    for name in candidates:
+        if os.path.isfile(os.path.join(source, name)):
+            return os.path.join(source, name)
+    raise FileNotFoundError(f"No {csv_name} or .zip archive in {source!r}")
+
+def _read_checksum_text(text, name):
+    """SHA-256 for name from a .sha256 sidecar or SHA256SUMS listing ('<hash>  <name>' lines)"""
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) == 1 or (len(fields) >= 2 and fields[-1].lstrip('*') == name):
+            return fields[0].lower()
+    return None
+
+def published_checksum(artifact):
+    """SHA-256 published next to a local or HTTP artifact (<name>.sha256 or SHA256SUMS), if any"""
+    name = os.path.basename(artifact.rstrip('/'))
+    base = artifact[:len(artifact) - len(name)]
+    for sidecar in [artifact + '.sha256', base + 'SHA256SUMS']:
+        try:
+            if _is_url(sidecar):
+                with urllib.request.urlopen(sidecar, timeout=HTTP_TIMEOUT) as response:
+                    text = response.read().decode()
+            else:
+                with open(sidecar) as f:
+                    text = f.read()
+        except (OSError, urllib.error.URLError, UnicodeDecodeError):
+            continue
+        checksum = _read_checksum_text(text, name)
+        if checksum:
+            return checksum
+    return None
+
+def probe_source(source):
+    """Cheap validators of the source's current content (no transfer), or None when unknown"""
+    if source == 'kaggle':
+        # The Kaggle client compares its local archive with the server itself
+        return None
+    if _is_url(source):
+        request = urllib.request.Request(source, method='HEAD')
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+            headers = response.headers
+        return {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'),
+                'size': headers.get('Content-Length')}
+    path = resolve_local_source(source)
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def _range_total(content_range):
+    """Full size from a Content-Range header ('bytes */1234' or 'bytes 0-99/1234'), None when unknown"""
+    total = (content_range or '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+def download_http(url, mirror_dir=MIRROR_DIR, validators=None):
+    """Download url into the mirror directory, resuming a partial .part file; returns the local path"""
+    os.makedirs(mirror_dir, exist_ok=True)
+    path = os.path.join(mirror_dir, os.path.basename(urllib.request.urlparse(url).path) or 'dataset')
+    part_path = path + '.part'
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header('Range', f'bytes={offset}-')
+        # Resume only if the server still has the same version; otherwise it sends the whole file
+        if validators and (validators.get('etag') or validators.get('last_modified')):
+            request.add_header('If-Range', validators.get('etag') or validators['last_modified'])
     try:
-        import kaggle
-        
-        print("Downloading Netflix dataset from Kaggle...")
-        
-        # Download the dataset
-        kaggle.api.dataset_download_files('shivamb/netflix-shows', 
-                                        path='.', 
-                                        unzip=True)
-        
-        print("Dataset downloaded successfully!")
-        return True
-        
-    except Exception as e:
-        print(f"Error downloading from Kaggle: {e}")
-        print("Creating sample dataset instead...")
+        response = urllib.request.urlopen(request, timeout=HTTP_TIMEOUT)
+    except urllib.error.HTTPError as e:
+        if not (offset and e.code == 416):
+            raise
+        # Nothing left past the offset: the .part is done if it is exactly the file's full size
+        total = _range_total(e.headers.get('Content-Range')) or (validators or {}).get('size')
+        if total is None or int(total) != offset:
+            os.remove(part_path)
+            return download_http(url, mirror_dir, validators)
+        print(f"Download of {url} already complete ({offset:,} bytes)")
+        os.replace(part_path, path)
+        return path
+    with response:
+        resumed = offset and response.status == 206
+        if offset and not resumed:
+            offset = 0
+        total = response.headers.get('Content-Length')
+        total = int(total) + offset if total else None
+        print(f"Downloading {url}" + (f" (resuming at {offset:,} bytes)" if resumed else ""))
+        with open(part_path, 'ab' if resumed else 'wb') as f:
+            for block in iter(lambda: response.read(BLOCK_SIZE), b''):
+                f.write(block)
+                offset += len(block)
+    if total is not None and offset != total:
+        raise OSError(f"Transfer of {url} stopped at {offset:,} of {total:,} bytes; rerun to resume")
+    os.replace(part_path, path)
+    return path
+
+def download_kaggle_dataset(mirror_dir=MIRROR_DIR):
+    """Download the Kaggle archive into the mirror directory (requires the Kaggle API); returns its path"""
+    import kaggle
+
+    print("Downloading Netflix dataset from Kaggle...")
+    os.makedirs(mirror_dir, exist_ok=True)
+    # Kept zipped: the Kaggle client skips the download when this copy is current
+    kaggle.api.dataset_download_files(KAGGLE_DATASET, path=mirror_dir, unzip=False)
+    return os.path.join(mirror_dir, KAGGLE_DATASET.split('/')[1] + '.zip')
+
+def fetch_source(source, validators=None, mirror_dir=MIRROR_DIR):
+    """Local path of the source's CSV or archive, transferring it into the mirror when remote"""
+    if source == 'kaggle':
+        return download_kaggle_dataset(mirror_dir)
+    if _is_url(source):
+        return download_http(source, mirror_dir, validators)
+    return resolve_local_source(source)
+
+def extract_csv(artifact, csv_path=DATASET_PATH):
+    """Stream the CSV out of a .zip archive (or copy a plain CSV) to csv_path, hashing it on the way
+
+    Returns the SHA-256 of the written CSV; the file appears atomically once complete.
+    """
+    digest = hashlib.sha256()
+    tmp_path = csv_path + '.tmp'
+    with open(tmp_path, 'wb') as out:
+        if zipfile.is_zipfile(artifact):
+            with zipfile.ZipFile(artifact) as archive:
+                names = [name for name in archive.namelist() if name.endswith('.csv')]
+                if not names:
+                    raise ValueError(f"No CSV file in {artifact}")
+                preferred = [name for name in names if os.path.basename(name) == os.path.basename(csv_path)]
+                source = archive.open((preferred or names)[0])
+        else:
+            source = open(artifact, 'rb')
+        with source:
+            for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+                digest.update(block)
+                out.write(block)
+    os.replace(tmp_path, csv_path)
+    return digest.hexdigest()
+
+def build_cache(csv_path, csv_sha256):
+    """Parse the CSV once into the columnar cache; returns (rows, CSV columns)"""
+    df = load_netflix_data(csv_path, report=False)
+    columns = list(df.columns)
+    add_derived_columns(df)
+    if HAS_PYARROW:
+        write_cache(df, csv_path, sha256=csv_sha256)
+    return len(df), columns
+
+def _is_current(record, source, validators, csv_path, expected_sha256=None):
+    """True when the recorded ingestion came from this unchanged source and its CSV is untouched
+
+    A URL's Content-Length alone cannot tell a same-size change apart, so without an ETag or
+    Last-Modified the recorded archive must match the expected or published checksum instead.
+    """
+    if not record or record.get('version') != INGEST_VERSION or record.get('source') != source:
+        return False
+    if validators is None or record.get('validators') != validators or not os.path.exists(csv_path):
         return False
+    if _is_url(source) and not (validators.get('etag') or validators.get('last_modified')):
+        checksum = (expected_sha256 or published_checksum(source) or '').lower()
+        if not checksum or checksum != record.get('artifact_sha256'):
+            return False
+    stat = os.stat(csv_path)
+    return record.get('csv_size') == stat.st_size and record.get('csv_mtime') == stat.st_mtime
+
+def ingest(source=DEFAULT_SOURCE, csv_path=DATASET_PATH, expected_sha256=None, force=False,
+           mirror_dir=MIRROR_DIR):
+    """Fetch, verify, extract and cache the dataset; returns its version record
+
+    Raises ValueError on a checksum mismatch (the bad download is removed so the next run refetches).
+    """
+    if source != 'kaggle' and not _is_url(source):
+        source = os.path.abspath(source)
+    record_path = source_record_path(csv_path)
+    record = read_metadata(record_path)
+    validators = probe_source(source)
+    if not force and _is_current(record, source, validators, csv_path, expected_sha256):
+        print(f"✅ Source unchanged; dataset version {record['dataset_version']} is current")
+        return record
+
+    artifact = fetch_source(source, validators, mirror_dir)
+    artifact_sha256 = file_hash(artifact)
+    expected = (expected_sha256 or published_checksum(artifact if not _is_url(source) else source) or '').lower()
+    if expected and artifact_sha256 != expected:
+        if os.path.abspath(artifact).startswith(os.path.abspath(mirror_dir) + os.sep):
+            os.remove(artifact)
+        raise ValueError(f"Checksum mismatch for {artifact}: expected {expected}, got {artifact_sha256}")
+    print(f"🔒 sha256 {artifact_sha256} " + ("verified" if expected else "(no published checksum; recorded)"))
+
+    if (not force and record and record.get('artifact_sha256') == artifact_sha256
+            and os.path.exists(csv_path) and file_hash(csv_path) == record.get('csv_sha256')):
+        # Same content under new validators (e.g. touched or re-downloaded): nothing to rebuild
+        print(f"✅ Content unchanged; dataset version {record['dataset_version']} is current")
+        csv_sha256 = record['csv_sha256']
+        rows, columns = record['rows'], record['columns']
+    else:
+        csv_sha256 = extract_csv(artifact, csv_path)
+        rows, columns = build_cache(csv_path, csv_sha256)
+
+    stat = os.stat(csv_path)
+    record = {
+        'version': INGEST_VERSION,
+        'source': source,
+        'artifact': os.path.abspath(artifact),
+        'validators': validators,
+        'artifact_sha256': artifact_sha256,
+        'csv_sha256': csv_sha256,
+        'csv_size': stat.st_size,
+        'csv_mtime': stat.st_mtime,
+        'dataset_version': csv_sha256[:12],
+        'rows': rows,
+        'columns': columns,
+        'ingested_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+    write_metadata(record_path, record)
+    return record
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Fetch and prepare the Netflix dataset')
+    parser.add_argument('--source', default=os.environ.get(SOURCE_ENV),
+                        help=f"'kaggle', a local directory/file or an http(s) mirror URL (default: ${SOURCE_ENV} or kaggle)")
+    parser.add_argument('--sha256', help='expected SHA-256 of the archive or CSV')
+    parser.add_argument('--force', action='store_true', help='refetch and rebuild even if the source is unchanged')
+    parser.add_argument('--sample', action='store_true', help='fall back to a 10-title sample if fetching fails')
+    args = parser.parse_args()
+
     print("🎬 Netflix Dataset Setup")
     print("="*40)
-    
-    # Check if dataset already exists
-    if os.path.exists('netflix_titles.csv'):
-        print("Dataset already exists!")
+
+    # Without an explicit source, an existing dataset is kept as is (no network access)
+    if os.path.exists(DATASET_PATH) and not (args.source or args.force):
+        record = read_metadata(source_record_path())
+        version = f" (version {record['dataset_version']} from {record['source']})" if record else ""
+        print(f"Dataset already exists{version}! Pass --source or --force to refresh it.")
         return
-    
-    # Try to download from Kaggle first
-    if not download_kaggle_dataset():
-        # If that fails, create sample data
+
+    source = args.source or DEFAULT_SOURCE
+    try:
+        record = ingest(source, DATASET_PATH, args.sha256, args.force)
+    except Exception as e:
+        print(f"❌ Could not ingest the dataset from {source!r}: {e}")
+        if os.path.exists(DATASET_PATH):
+            print(f"Keeping the existing {DATASET_PATH}")
+            return
+        if not args.sample:
+            print("Rerun to resume, pass --source with a reachable mirror, or --sample for a 10-title demo dataset")
+            sys.exit(1)
+        print("⚠️ Creating a 10-title SAMPLE dataset instead; results will not reflect the real catalog")
         create_sample_dataset()
-    
-    # Verify the dataset
-    if os.path.exists('netflix_titles.csv'):
-        df = pd.read_csv('netflix_titles.csv')
-        print(f"✅ Dataset ready! Shape: {df.shape}")
-        print(f"Columns: {list(df.columns)}")
-    else:
-        print("❌ Failed to create dataset")
+        return
+
+    print(f"✅ Dataset ready! Version {record['dataset_version']}, shape: ({record['rows']}, {len(record['columns'])})")
+    print(f"Columns: {record['columns']}")
 
 if __name__ == "__main__":
     main()
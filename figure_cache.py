@@ -0,0 +1,194 @@
+"""
+Rendered-panel cache for the 13-panel figure
+Each panel tile is stored as a PNG under a fingerprint of the aggregates it reads, the code that
+draws it and the style settings; a rerun renders only the panels whose fingerprint changed,
+recomposites the figure, and skips rewriting it when no panel changed. Least recently used tiles
+are evicted once the cache grows past its size budget
+"""
+
+import hashlib
+import inspect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from dataset_cache import read_metadata, write_metadata
+from profiling import stage
+
+# Bump whenever tiles change in a way the fingerprint can't see
+FIGURE_CACHE_VERSION = 1
+
+# Turns the cache on: a cache directory, or 1 for the default one (0 keeps it off even with --figure-cache)
+CACHE_DIR_ENV = 'NETFLIX_FIGURE_CACHE'
+DEFAULT_CACHE_DIR = '.figure_cache'
+
+# Tiles are evicted, least recently used first, beyond this many bytes
+DEFAULT_MAX_BYTES = 512 << 20
+
+INDEX_NAME = 'index.json'
+
+# Tiles are written once and read often: fast, light compression
+TILE_COMPRESS_LEVEL = 1
+
+def _hash_series(digest, series):
+    """Feed a count Series (values and index, including level names) into a hash"""
+    digest.update(repr((series.index.names, str(series.index.dtype), len(series))).encode())
+    digest.update(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+
+def style_fingerprint(dpi):
+    """Hash of everything besides the aggregates that changes how tiles look"""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    from data_visualization import FIGURE_SIZE, GRID_ROWS, GRID_COLS
+    from panel_rendering import (render_panel, draw_binned_scatter, draw_binned_strip, draw_density,
+                                 _integer_edges, DENSITY_ROW_THRESHOLD)
+    from aggregates import box_stats, violin_stats, expand_counts, binned_kde, kde_curve
+    digest = hashlib.sha256()
+    # The backend differs between this process and the render workers but doesn't change the pixels
+    style = sorted((key, repr(value)) for key, value in plt.rcParams.items() if not key.startswith('backend'))
+    helpers = [render_panel, draw_binned_scatter, draw_binned_strip, draw_density, _integer_edges,
+               box_stats, violin_stats, expand_counts, binned_kde, kde_curve]
+    digest.update(repr((FIGURE_CACHE_VERSION, matplotlib.__version__, FIGURE_SIZE, GRID_ROWS, GRID_COLS,
+                        dpi, DENSITY_ROW_THRESHOLD, style)).encode())
+    for helper in helpers:
+        digest.update(inspect.getsource(helper).encode())
+    return digest.hexdigest()
+
+def panel_fingerprint(panel, fields, agg, style):
+    """Key of one panel's tile: its code, the aggregate fields it reads and the style hash"""
+    digest = hashlib.sha256(style.encode())
+    digest.update(inspect.getsource(panel).encode())
+    for field in fields:
+        digest.update(field.encode())
+        _hash_series(digest, getattr(agg, field))
+    return digest.hexdigest()
+
+class FigureCache:
+    """Panel tiles on disk keyed by fingerprint, with an LRU size budget"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        index = read_metadata(self.index_path)
+        if not index or index.get('version') != FIGURE_CACHE_VERSION:
+            index = {'version': FIGURE_CACHE_VERSION, 'tiles': {}, 'outputs': {}}
+        self.index = index
+
+    @classmethod
+    def from_env(cls, enabled=False):
+        """The cache when turned on by enabled (e.g. --figure-cache) or NETFLIX_FIGURE_CACHE, else None"""
+        directory = os.environ.get(CACHE_DIR_ENV, '')
+        if directory == '0' or not (enabled or directory):
+            return None
+        return cls(DEFAULT_CACHE_DIR if directory in ('', '1') else directory)
+
+    def _tile_path(self, key):
+        return os.path.join(self.directory, key + '.png')
+
+    def get(self, key):
+        """The cached RGBA tile for a fingerprint, or None"""
+        from PIL import Image
+        entry = self.index['tiles'].get(key)
+        if entry is None:
+            return None
+        try:
+            with Image.open(self._tile_path(key)) as image:
+                tile = np.asarray(image.convert('RGBA'))
+        except OSError:
+            del self.index['tiles'][key]
+            return None
+        entry['last_used'] = time.time()
+        return tile
+
+    def put(self, key, tile):
+        """Store a rendered RGBA tile"""
+        from PIL import Image
+        path = self._tile_path(key)
+        tmp_path = path + '.tmp'
+        Image.fromarray(tile).save(tmp_path, format='PNG', compress_level=TILE_COMPRESS_LEVEL)
+        os.replace(tmp_path, path)
+        self.index['tiles'][key] = {'bytes': os.path.getsize(path), 'last_used': time.time()}
+
+    def evict(self):
+        """Drop least recently used tiles until the cache fits in max_bytes; returns tiles dropped"""
+        tiles = self.index['tiles']
+        total = sum(entry['bytes'] for entry in tiles.values())
+        dropped = 0
+        for key in sorted(tiles, key=lambda key: tiles[key]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= tiles.pop(key)['bytes']
+            try:
+                os.remove(self._tile_path(key))
+            except OSError:
+                pass
+            dropped += 1
+        return dropped
+
+    def output_is_current(self, output_path, fingerprint):
+        """True when output_path is the unmodified figure written for this fingerprint"""
+        entry = self.index['outputs'].get(os.path.abspath(output_path))
+        if entry is None or entry['fingerprint'] != fingerprint or not os.path.exists(output_path):
+            return False
+        stat = os.stat(output_path)
+        return entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+
+    def record_output(self, output_path, fingerprint):
+        stat = os.stat(output_path)
+        self.index['outputs'][os.path.abspath(output_path)] = {
+            'fingerprint': fingerprint,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+        }
+
+    def save(self):
+        """Evict beyond the size budget and write the index"""
+        self.evict()
+        write_metadata(self.index_path, self.index)
+
+def render_cached(agg, cache, output_path='netflix_analysis.png', workers=1, dpi=None, title=None):
+    """Compose the figure from cached panel tiles, rendering only panels whose inputs changed
+
+    Returns the numbers of the panels that were rendered (empty when the figure was reused).
+    """
+    import matplotlib.pyplot as plt
+    from data_visualization import PANELS, PANEL_INPUTS, GRID_ROWS, GRID_COLS
+    from panel_rendering import render_panel, composite_tiles, _init_worker, DPI
+    dpi = dpi or DPI
+
+    with stage('fingerprint'):
+        style = style_fingerprint(dpi)
+        keys = [panel_fingerprint(panel, PANEL_INPUTS[panel.__name__], agg, style) for panel in PANELS]
+        figure_key = hashlib.sha256((''.join(keys) + repr(title)).encode()).hexdigest()
+    if cache.output_is_current(output_path, figure_key):
+        # Nothing moved: touch the tiles so they stay recent, and keep the existing file
+        for key in keys:
+            if key in cache.index['tiles']:
+                cache.index['tiles'][key]['last_used'] = time.time()
+        cache.save()
+        return []
+
+    with stage('cache_read'):
+        tiles = [cache.get(key) for key in keys]
+    missing = [number for number, tile in enumerate(tiles, 1) if tile is None]
+    with stage('render_tiles'):
+        if workers and workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(missing)), initializer=_init_worker) as pool:
+                rendered = list(pool.map(render_panel, missing, [agg] * len(missing), [dpi] * len(missing)))
+        else:
+            rendered = [render_panel(number, agg, dpi) for number in missing]
+    with stage('cache_write'):
+        for number, tile in zip(missing, rendered):
+            tiles[number - 1] = tile
+            cache.put(keys[number - 1], tile)
+
+    with stage('composite'):
+        canvas = composite_tiles(tiles, GRID_ROWS, GRID_COLS, title, dpi)
+    with stage('savefig'):
+        plt.imsave(output_path, canvas, dpi=dpi)
+    cache.record_output(output_path, figure_key)
+    cache.save()
+    return missing
@@ -0,0 +1,174 @@
+"""
+Incremental refresh for a catalog that grows by appends
+The merged aggregates are persisted next to the CSV together with the byte offset consumed so far;
+a rerun parses only the rows appended after that offset and merges them into the stored state
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import pickle
+import time
+from data_loader import DATASET_PATH, read_netflix_chunks
+from dataset_cache import read_metadata, write_metadata
+from aggregates import COUNT_FIELDS, compute_aggregates
+from streaming import STREAMING_COLUMNS, stream_aggregates
+import profiling
+from profiling import stage
+
+# Bump whenever the aggregates change meaning so stored state is rebuilt
+STATE_VERSION = 3
+
+# Bytes just before the consumed offset that must be unchanged for the file to count as appended to
+TAIL_BYTES = 64 * 1024
+
+def state_paths(csv_path):
+    """Return the (aggregates, metadata) state file paths for a CSV file"""
+    base = os.path.splitext(csv_path)[0]
+    return base + '.aggstate.pkl', base + '.aggstate.json'
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _file_fingerprint(f, offset):
+    """Header line, hash of the header and hash of the TAIL_BYTES before offset"""
+    f.seek(0)
+    header = f.readline()
+    f.seek(max(offset - TAIL_BYTES, 0))
+    tail = f.read(offset - max(offset - TAIL_BYTES, 0))
+    return header, _digest(header), _digest(tail)
+
+def save_state(csv_path, agg, offset):
+    """Persist aggregates and the byte offset they cover"""
+    data_path, meta_path = state_paths(csv_path)
+    with open(csv_path, 'rb') as f:
+        header, header_sha256, tail_sha256 = _file_fingerprint(f, offset)
+        f.seek(max(offset - 1, 0))
+        ends_with_newline = f.read(1) in (b'\n', b'')
+    tmp_path = data_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(agg, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, data_path)
+    write_metadata(meta_path, {
+        'version': STATE_VERSION,
+        'fields': COUNT_FIELDS,
+        'csv_path': os.path.abspath(csv_path),
+        'offset': offset,
+        'rows': agg.rows,
+        'columns': next(csv.reader([header.decode('utf-8')])),
+        'header_sha256': header_sha256,
+        'tail_sha256': tail_sha256,
+        'ends_with_newline': ends_with_newline,
+    })
+
+def load_state(csv_path):
+    """Return (aggregates, metadata) when the stored state still describes a prefix of the file"""
+    data_path, meta_path = state_paths(csv_path)
+    metadata = read_metadata(meta_path)
+    if (not metadata or metadata.get('version') != STATE_VERSION or metadata.get('fields') != COUNT_FIELDS
+            or not os.path.exists(data_path)):
+        return None, None
+
+    offset = metadata['offset']
+    if os.path.getsize(csv_path) < offset:
+        return None, None
+    with open(csv_path, 'rb') as f:
+        _, header_sha256, tail_sha256 = _file_fingerprint(f, offset)
+        next_byte = f.read(1)
+    if header_sha256 != metadata['header_sha256'] or tail_sha256 != metadata['tail_sha256']:
+        return None, None
+    if not metadata['ends_with_newline'] and next_byte not in (b'\n', b'\r', b''):
+        # The last stored row had no newline and the append continued it: that row changed
+        return None, None
+    try:
+        with open(data_path, 'rb') as f:
+            return pickle.load(f), metadata
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None, None
+
+def read_appended_chunks(path, offset, columns, chunksize=100_000, consumed=None, **read_csv_kwargs):
+    """Yield typed chunks of the rows after a byte offset, without re-reading earlier rows
+
+    When given, consumed[0] is set to the byte offset the reader stopped at.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        # The header is not repeated after the offset, so column names come from the stored state
+        yield from read_netflix_chunks(f, chunksize=chunksize, usecols=STREAMING_COLUMNS, header=None,
+                                       names=columns, **read_csv_kwargs)
+        if consumed is not None:
+            consumed[0] = f.tell()
+
+def update_aggregates(path=DATASET_PATH, chunksize=100_000, rebuild=False, progress=True, **read_csv_kwargs):
+    """Bring the stored aggregates up to date with the CSV; returns (aggregates, rows parsed)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    # Appends should not run during a refresh: the rows are read to end of file
+    size = os.path.getsize(path)
+
+    agg, metadata = (None, None) if rebuild else load_state(path)
+    if agg is None:
+        if progress:
+            print("🔄 No reusable aggregate state; aggregating the whole catalog")
+        with stage('full_rebuild'):
+            agg = stream_aggregates(path, chunksize=chunksize, progress=progress, **read_csv_kwargs)
+        save_state(path, agg, os.path.getsize(path))
+        return agg, agg.rows
+
+    offset = metadata['offset']
+    if size == offset:
+        if progress:
+            print(f"✅ No appended rows; reusing aggregates for {agg.rows:,} rows")
+        return agg, 0
+
+    rows_before = agg.rows
+    start = time.perf_counter()
+    consumed = [size]
+    with stage('appended_rows'):
+        for chunk in read_appended_chunks(path, offset, metadata['columns'], chunksize, consumed,
+                                          **read_csv_kwargs):
+            agg.merge(compute_aggregates(chunk))
+    new_rows = agg.rows - rows_before
+    if progress:
+        print(f"➕ Merged {new_rows:,} appended rows ({consumed[0] - offset:,} bytes) in "
+              f"{time.perf_counter() - start:.2f}s; catalog now {agg.rows:,} rows")
+    save_state(path, agg, consumed[0])
+    return agg, new_rows
+
+def main():
+    """Refresh the aggregates from appended rows and re-render the figure"""
+    parser = argparse.ArgumentParser(description='Netflix analysis refreshed from rows appended since the last run')
+    parser.add_argument('path', nargs='?', default=DATASET_PATH, help='catalog CSV file')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows per chunk')
+    parser.add_argument('--rebuild', action='store_true', help='ignore stored state and start from row zero')
+    parser.add_argument('--output', default='netflix_analysis.png', help='figure file to write')
+    parser.add_argument('--no-show', action='store_true', help="don't open the figure window")
+    parser.add_argument('--workers', type=int, default=1, help='render panels in this many processes')
+    parser.add_argument('--profile', action='store_true', help='print a per-stage profile and write a trace')
+    parser.add_argument('--figure-cache', action='store_true',
+                        help='reuse rendered panel tiles whose aggregates did not change (.figure_cache/)')
+    args = parser.parse_args()
+    profiling.configure(args.profile)
+
+    from data_visualization import render_visualizations
+    from figure_cache import FigureCache
+
+    print("🎬 Netflix Analysis (incremental mode)")
+    print("="*50)
+    try:
+        agg, _ = update_aggregates(args.path, chunksize=args.chunksize, rebuild=args.rebuild,
+                                   on_bad_lines='skip')
+    except FileNotFoundError:
+        print(f"❌ Dataset file '{args.path}' not found!")
+        return
+
+    print("\n📈 Creating visualizations...")
+    with stage('render'):
+        render_visualizations(agg, output_path=args.output, show=False if args.no_show else None,
+                              workers=args.workers, cache=FigureCache.from_env(args.figure_cache))
+    print(f"\n✅ Analysis complete! Visualization saved as '{args.output}'")
+    profiling.report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Panel rendering helpers for the 13-panel Netflix figure
+Each panel can render as an independent task on the Agg backend in a process pool; the tiles are
+composited into the final image in grid order
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+import numpy as np
+from profiling import stage
+
+# Pixel density of the saved figure, matching the serial renderer
+DPI = 300
+
+# Height in inches of the title strip composited above the tiles
+TITLE_HEIGHT = 0.6
+
+# Above this many titles the scatter/strip panels switch from one marker per title to a binned image
+DENSITY_ROW_THRESHOLD = 100_000
+
+def _integer_edges(values, max_bins):
+    """Bin edges centred on whole numbers (years, minutes, seasons), merged when the range is wide"""
+    low, high = float(np.min(values)) - 0.5, float(np.max(values)) + 0.5
+    width = max(np.ceil((high - low) / max_bins), 1)
+    return np.arange(low, high + width, width)
+
+def draw_binned_scatter(ax, x, y, weights, max_bins=(120, 120), cmap='Oranges', label='Titles'):
+    """Draw a weighted 2-D histogram of (x, y) as a single image; cost depends on bins, not rows"""
+    from matplotlib.colors import LogNorm
+    bins = (_integer_edges(x, max_bins[0]), _integer_edges(y, max_bins[1]))
+    grid, x_edges, y_edges = np.histogram2d(x, y, bins=bins, weights=weights)
+    grid = np.ma.masked_equal(grid, 0)
+    image = ax.imshow(grid.T, origin='lower', aspect='auto', interpolation='nearest', cmap=cmap,
+                      extent=[x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]],
+                      norm=LogNorm(vmin=1, vmax=max(grid.max(), 1)))
+    ax.figure.colorbar(image, ax=ax, label=label)
+    return image
+
+def draw_binned_strip(ax, values, weights, spread=0.1, max_bins=200, y_bins=64, cmap='Blues', label='Titles'):
+    """Draw a jittered strip plot as an image: per-value counts spread by the jitter's normal profile"""
+    from matplotlib.colors import LogNorm
+    x_counts, x_edges = np.histogram(np.asarray(values, dtype=float), bins=_integer_edges(values, max_bins),
+                                     weights=weights)
+    y_centers = np.linspace(-4 * spread, 4 * spread, y_bins)
+    profile = np.exp(-0.5 * (y_centers / spread) ** 2)
+    # Expected titles per cell; cells below half a title would be empty in the scatter too
+    grid = np.ma.masked_less(np.outer(profile / profile.sum(), x_counts), 0.5)
+    image = ax.imshow(grid, origin='lower', aspect='auto', interpolation='nearest', cmap=cmap,
+                      extent=[x_edges[0], x_edges[-1], y_centers[0], y_centers[-1]],
+                      norm=LogNorm(vmin=0.5, vmax=max(grid.max(), 1)))
+    ax.figure.colorbar(image, ax=ax, label=label)
+    return image
+
+def draw_density(ax, counts, color='red', alpha=0.7):
+    """Filled KDE of a value histogram, drawn like seaborn's kdeplot(fill=True) from a binned FFT density"""
+    from matplotlib.colors import to_rgba
+    from aggregates import kde_curve
+    coords, density = kde_curve(counts)
+    artist = ax.fill_between(coords, 0, density, facecolor=to_rgba(color, alpha), edgecolor=color, linewidth=1)
+    # Same autoscaling as seaborn: the density axis starts at 0
+    artist.sticky_edges.y[:] = 0, np.inf
+    return artist
+
+def is_headless():
+    """True when figures can't be shown: a non-interactive backend or no display server"""
+    backend = matplotlib.get_backend().lower()
+    if backend in [name.lower() for name in getattr(matplotlib.rcsetup, 'non_interactive_bk', [])]:
+        return True
+    if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        return True
+    return False
+
+def show_unless_headless():
+    """plt.show() for interactive sessions; batch jobs skip the blocking call"""
+    import matplotlib.pyplot as plt
+    if not is_headless():
+        plt.show()
+
+def _init_worker():
+    """Select the non-interactive backend before pyplot is imported in the worker"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+def render_panel(number, agg, dpi=DPI):
+    """Render one panel (1-based grid number) to an RGBA array of a fixed tile size"""
+    import matplotlib.pyplot as plt
+    from data_visualization import PANELS, GRID_ROWS, GRID_COLS, FIGURE_SIZE
+
+    tile_size = (FIGURE_SIZE[0] / GRID_COLS, FIGURE_SIZE[1] / GRID_ROWS)
+    fig = plt.figure(figsize=tile_size, dpi=dpi)
+    try:
+        plt.subplot(1, 1, 1)
+        PANELS[number - 1](agg)
+        plt.tight_layout()
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba()).copy()
+    finally:
+        plt.close(fig)
+
+def render_title(title, width, dpi=DPI):
+    """Render a figure title (styled like the serial figure's suptitle) as an RGBA strip width pixels wide"""
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(width / dpi, TITLE_HEIGHT), dpi=dpi)
+    try:
+        fig.text(0.5, 0.5, title, ha='center', va='center', fontsize=20, fontweight='bold')
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba())[:, :width].copy()
+    finally:
+        plt.close(fig)
+
+def composite_tiles(tiles, rows, cols, title=None, dpi=DPI):
+    """Paste equally sized RGBA tiles into one rows x cols image, under a title strip when given"""
+    tile_height, tile_width = tiles[0].shape[:2]
+    strip = render_title(title, cols * tile_width, dpi) if title else np.empty((0, 0, 4), dtype=np.uint8)
+    top = strip.shape[0]
+    canvas = np.full((top + rows * tile_height, cols * tile_width, 4), 255, dtype=np.uint8)
+    canvas[:top, :strip.shape[1]] = strip
+    for i, tile in enumerate(tiles):
+        row, col = divmod(i, cols)
+        canvas[top + row * tile_height:top + (row + 1) * tile_height,
+               col * tile_width:(col + 1) * tile_width] = tile
+    return canvas
+
+def render_panels_parallel(agg, output_path='netflix_analysis.png', workers=None, dpi=DPI, title=None):
+    """Render every panel in a process pool and save the composited figure"""
+    import matplotlib.pyplot as plt
+    from data_visualization import PANELS, GRID_ROWS, GRID_COLS
+
+    workers = workers or os.cpu_count() or 1
+    numbers = range(1, len(PANELS) + 1)
+    with stage('render_tiles'):
+        with ProcessPoolExecutor(max_workers=min(workers, len(PANELS)), initializer=_init_worker) as pool:
+            tiles = list(pool.map(render_panel, numbers, [agg] * len(PANELS), [dpi] * len(PANELS)))
+
+    with stage('composite'):
+        canvas = composite_tiles(tiles, GRID_ROWS, GRID_COLS, title, dpi)
+    with stage('savefig'):
+        plt.imsave(output_path, canvas, dpi=dpi)
+    return canvas
@@ -0,0 +1,239 @@
+"""
+Per-stage profiling hooks for the Netflix analysis pipeline
+Pipeline steps and panels are wrapped in stage() blocks; when profiling is enabled (--profile or
+NETFLIX_PROFILE=1) each stage records wall time, CPU time and traced memory, and report() prints
+a summary table and writes a Chrome trace JSON (open it in Perfetto or chrome://tracing)
+"""
+
+import cProfile
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+PROFILE_ENV = 'NETFLIX_PROFILE'
+TRACE_ENV = 'NETFLIX_PROFILE_TRACE'
+DUMP_ENV = 'NETFLIX_PROFILE_DUMP'
+MEMORY_ENV = 'NETFLIX_PROFILE_MEMORY'
+DEFAULT_TRACE_PATH = 'netflix_profile.json'
+
+# Dump formats for the slowest leaf stage
+DUMP_FORMATS = ('cprofile', 'tracemalloc')
+
+class _Frame:
+    """One open stage on the profiler stack"""
+
+    def __init__(self, path, memory):
+        self.path = path
+        self.children = 0
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.memory_start = tracemalloc.get_traced_memory()[0] if memory else 0
+        self.peak = self.memory_start
+        self.profile = None
+        self.snapshot = None
+
+class StageProfiler:
+    """Records nested pipeline stages; stage paths join the enclosing stage names with '/'"""
+
+    def __init__(self, memory=True, dump=None):
+        if dump is not None and dump not in DUMP_FORMATS:
+            raise ValueError(f"dump must be one of {DUMP_FORMATS}, got {dump!r}")
+        self.memory = memory or dump == 'tracemalloc'
+        self.dump = dump
+        self.records = []
+        self.origin = time.perf_counter()
+        self._stack = []
+        # (wall seconds, path, cProfile.Profile or tracemalloc statistics) of the slowest leaf stage
+        self._slowest = None
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent.children += 1
+            if self.memory:
+                # reset_peak below clears the parent's peak, so fold it in first
+                parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+            if parent.profile is not None:
+                parent.profile.disable()
+        if self.memory:
+            tracemalloc.reset_peak()
+
+        frame = _Frame(name if parent is None else f"{parent.path}/{name}", self.memory)
+        if self.dump == 'cprofile':
+            frame.profile = cProfile.Profile()
+            frame.profile.enable()
+        elif self.dump == 'tracemalloc':
+            frame.snapshot = tracemalloc.take_snapshot()
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self._finish(frame, parent)
+
+    def _finish(self, frame, parent):
+        """Record a closed stage and hand memory peak and profiling back to its parent"""
+        if frame.profile is not None:
+            frame.profile.disable()
+        wall = time.perf_counter() - frame.start
+        record = {
+            'path': frame.path,
+            'depth': frame.path.count('/'),
+            'start': frame.start - self.origin,
+            'seconds': wall,
+            'cpu_seconds': time.process_time() - frame.cpu_start,
+        }
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            frame.peak = max(frame.peak, peak)
+            record['allocated_mb'] = (current - frame.memory_start) / (1 << 20)
+            record['peak_mb'] = (frame.peak - frame.memory_start) / (1 << 20)
+            if parent is not None:
+                parent.peak = max(parent.peak, frame.peak)
+        self.records.append(record)
+
+        # Only leaf stages have complete profiles: a parent's profiler is paused while children run
+        if self.dump and frame.children == 0 and (self._slowest is None or wall > self._slowest[0]):
+            if frame.profile is not None:
+                self._slowest = (wall, frame.path, frame.profile)
+            else:
+                statistics = tracemalloc.take_snapshot().compare_to(frame.snapshot, 'lineno')
+                self._slowest = (wall, frame.path, statistics)
+        if parent is not None and parent.profile is not None:
+            parent.profile.enable()
+
+    def summary(self):
+        """Per-path totals in first-start order; repeated stages (e.g. per chunk) are summed"""
+        totals = {}
+        for record in sorted(self.records, key=lambda record: record['start']):
+            total = totals.setdefault(record['path'], dict(record, calls=0, seconds=0.0, cpu_seconds=0.0,
+                                                            allocated_mb=0.0, peak_mb=0.0))
+            total['calls'] += 1
+            total['seconds'] += record['seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            total['allocated_mb'] += record.get('allocated_mb', 0.0)
+            total['peak_mb'] = max(total['peak_mb'], record.get('peak_mb', 0.0))
+        return list(totals.values())
+
+    def print_summary(self):
+        """Print every stage path with its share of the top-level total"""
+        rows = self.summary()
+        total = sum(row['seconds'] for row in rows if row['depth'] == 0)
+        header = f"{'stage':<44}{'calls':>6}{'wall':>10}{'cpu':>10}{'share':>8}"
+        if self.memory:
+            header += f"{'alloc':>11}{'peak':>11}"
+        print(f"\n⏱️ Pipeline profile ({total:.3f}s)")
+        print(header)
+        for row in rows:
+            name = '  ' * row['depth'] + row['path'].rsplit('/', 1)[-1]
+            share = row['seconds'] / total * 100 if total else 0.0
+            line = f"{name[:43]:<44}{row['calls']:6d}{row['seconds']:9.3f}s{row['cpu_seconds']:9.3f}s{share:7.1f}%"
+            if self.memory:
+                line += f"{row['allocated_mb']:8.1f} MB{row['peak_mb']:8.1f} MB"
+            print(line)
+
+    def write_trace(self, path=DEFAULT_TRACE_PATH):
+        """Write the stages as Chrome trace events (complete 'X' events in microseconds)"""
+        events = []
+        for record in self.records:
+            args = {key: value for key, value in record.items() if key not in ('path', 'depth', 'start')}
+            events.append({
+                'name': record['path'].rsplit('/', 1)[-1],
+                'cat': record['path'],
+                'ph': 'X',
+                'ts': record['start'] * 1e6,
+                'dur': record['seconds'] * 1e6,
+                'pid': os.getpid(),
+                'tid': 0,
+                'args': args,
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, indent=1)
+        return path
+
+    def write_dump(self, trace_path=DEFAULT_TRACE_PATH):
+        """Write the cProfile stats or tracemalloc diff of the slowest leaf stage; returns its path"""
+        if self._slowest is None:
+            return None
+        wall, stage_path, data = self._slowest
+        base = os.path.splitext(trace_path)[0] + '.' + stage_path.replace('/', '.').replace(' ', '_')
+        if self.dump == 'cprofile':
+            path = base + '.prof'
+            data.dump_stats(path)
+        else:
+            path = base + '.tracemalloc.txt'
+            with open(path, 'w') as f:
+                f.write(f"# Allocations during stage {stage_path} ({wall:.3f}s), largest first\n")
+                for statistic in data[:50]:
+                    f.write(f"{statistic}\n")
+        return path
+
+class LapTimer:
+    """Consecutive stages for straight-line code: each lap(name) closes the previous lap
+
+    Laps nest under the parent stage, which stays open until stop().
+    """
+
+    def __init__(self, parent=None):
+        self._parent = None
+        self._current = None
+        if parent is not None:
+            self._parent = stage(parent)
+            self._parent.__enter__()
+
+    def __call__(self, name):
+        self._close_lap()
+        self._current = stage(name)
+        self._current.__enter__()
+
+    def _close_lap(self):
+        if self._current is not None:
+            current, self._current = self._current, None
+            current.__exit__(None, None, None)
+
+    def stop(self):
+        """Close the open lap and the parent stage"""
+        self._close_lap()
+        if self._parent is not None:
+            parent, self._parent = self._parent, None
+            parent.__exit__(None, None, None)
+
+_profiler = None
+
+def enable(memory=True, dump=None):
+    """Turn profiling on for this process and return the profiler"""
+    global _profiler
+    _profiler = StageProfiler(memory=memory, dump=dump)
+    return _profiler
+
+def is_enabled():
+    return _profiler is not None
+
+def configure(flag=False):
+    """Enable profiling when the script got --profile or NETFLIX_PROFILE is set"""
+    requested = flag or os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'yes', 'on')
+    if requested and _profiler is None:
+        enable(memory=os.environ.get(MEMORY_ENV, '1') != '0', dump=os.environ.get(DUMP_ENV) or None)
+    return _profiler
+
+def stage(name):
+    """Context manager timing one pipeline stage; a no-op when profiling is off"""
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.stage(name)
+
+def report(trace_path=None):
+    """Print the summary table and write the trace (and dump) files when profiling is on"""
+    if _profiler is None:
+        return
+    trace_path = trace_path or os.environ.get(TRACE_ENV, DEFAULT_TRACE_PATH)
+    _profiler.print_summary()
+    print(f"🧾 Trace written to {_profiler.write_trace(trace_path)}")
+    dump_path = _profiler.write_dump(trace_path)
+    if dump_path:
+        print(f"🔬 Slowest stage ({_profiler._slowest[1]}) dumped to {dump_path}")
@@ -7,16 +7,27 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime
+import sys
 import warnings
+import profiling
+from profiling import stage, LapTimer
+from data_loader import READ_CSV_OPTIONS
+from dataset_cache import load_prepared_dataset, read_count_cube
+from aggregates import AggregationEngine, box_stats, violin_stats, expand_counts
+from panel_rendering import (show_unless_headless, draw_binned_scatter, draw_binned_strip, draw_density,
+                             DENSITY_ROW_THRESHOLD)
 warnings.filterwarnings('ignore')
 
 def main():
     print("🎬 Netflix Data Visualization Analysis")
     print("="*50)
+    # --profile or NETFLIX_PROFILE=1 times every pipeline step and panel
+    profiling.configure('--profile' in sys.argv[1:])
     
     # Load data
     try:
-        df = pd.read_csv('netflix_titles.csv', encoding='utf-8', on_bad_lines='skip')
+        with stage('load'):
+            df = load_prepared_dataset('netflix_titles.csv', **READ_CSV_OPTIONS)
         print(f"✅ Dataset loaded successfully! Shape: {df.shape}")
     except FileNotFoundError:
         print("❌ Dataset file 'netflix_titles.csv' not found!")
@@ -25,23 +36,31 @@ def main():
         print(f"❌ Error loading dataset: {e}")
         return
     
+    # Every panel and insight reads from one memoized aggregation pass
+    with stage('aggregate'):
+        agg = AggregationEngine(df, cube=read_count_cube('netflix_titles.csv', **READ_CSV_OPTIONS)).run()
+    
     # Basic info
     print(f"\n📊 Dataset Overview:")
-    print(f"Total records: {len(df)}")
-    print(f"Movies: {len(df[df['type'] == 'Movie'])}")
-    print(f"TV Shows: {len(df[df['type'] == 'TV Show'])}")
-    print(f"Date range: {df['release_year'].min()} - {df['release_year'].max()}")
+    print(f"Total records: {agg.rows}")
+    print(f"Movies: {agg.count_of('type_counts', 'Movie')}")
+    print(f"TV Shows: {agg.count_of('type_counts', 'TV Show')}")
+    print(f"Date range: {agg.release_year_counts.index.min()} - {agg.release_year_counts.index.max()}")
     
     # Create visualizations
     print("\n📈 Creating visualizations...")
     
+    lap = LapTimer('render')
+    lap('subplots')
+    
     # Set up the plotting area
     fig, axes = plt.subplots(3, 4, figsize=(20, 15))
     fig.suptitle('Netflix Movies and TV Shows Analysis', fontsize=20, fontweight='bold')
     
     # 1. Content Type Distribution (Bar Plot)
+    lap('panel 01 content_type_distribution')
     ax1 = axes[0, 0]
-    type_counts = df['type'].value_counts()
+    type_counts = agg.type_counts.sort_values(ascending=False)
     colors = ['#E50914', '#221F1F']  # Netflix colors
     bars = ax1.bar(type_counts.index, type_counts.values, color=colors)
     ax1.set_title('Movies vs TV Shows', fontweight='bold')
@@ -52,15 +71,17 @@ def main():
                 f'{int(height)}', ha='center', va='bottom', fontweight='bold')
     
     # 2. Release Year Distribution (Histogram)
+    lap('panel 02 release_year_distribution')
     ax2 = axes[0, 1]
-    ax2.hist(df['release_year'].dropna(), bins=20, color='skyblue', alpha=0.7, edgecolor='black')
+    ax2.hist(agg.release_year_counts.index.astype(float), weights=agg.release_year_counts.values, bins=20, color='skyblue', alpha=0.7, edgecolor='black')
     ax2.set_title('Content by Release Year', fontweight='bold')
     ax2.set_xlabel('Release Year')
     ax2.set_ylabel('Frequency')
     
     # 3. Rating Distribution (Bar Plot)
+    lap('panel 03 rating_distribution')
     ax3 = axes[0, 2]
-    rating_counts = df['rating'].value_counts().head(8)
+    rating_counts = agg.rating_counts.nlargest(8)
     bars = ax3.bar(range(len(rating_counts)), rating_counts.values, color='lightcoral')
     ax3.set_title('Top Content Ratings', fontweight='bold')
     ax3.set_ylabel('Count')
@@ -72,8 +93,9 @@ def main():
                 f'{int(height)}', ha='center', va='bottom', fontsize=8)
     
     # 4. Top Countries (Horizontal Bar)
+    lap('panel 04 top_countries')
     ax4 = axes[0, 3]
-    top_countries = df['country'].value_counts().head(8)
+    top_countries = agg.country_counts.nlargest(8)
     ax4.barh(range(len(top_countries)), top_countries.values, color='lightgreen')
     ax4.set_title('Top Countries by Content', fontweight='bold')
     ax4.set_xlabel('Number of Titles')
@@ -82,49 +104,46 @@ def main():
                         for country in top_countries.index])
     
     # 5. Movie Duration Analysis (Box Plot)
+    lap('panel 05 movie_duration_analysis')
     ax5 = axes[1, 0]
-    df_movies = df[df['type'] == 'Movie'].copy()
-    df_movies['duration_minutes'] = df_movies['duration'].str.extract(r'(\d+)').astype(float)
-    ax5.boxplot(df_movies['duration_minutes'].dropna(), labels=['Movies'])
+    if len(agg.movie_minutes_counts) > 0:
+        ax5.bxp([box_stats(agg.movie_minutes_counts, 'Movies')])
     ax5.set_title('Movie Duration Distribution', fontweight='bold')
     ax5.set_ylabel('Duration (Minutes)')
     
     # 6. Content Added Over Time (Line Plot)
+    lap('panel 06 content_added_over_time')
     ax6 = axes[1, 1]
-    df['date_added_clean'] = pd.to_datetime(df['date_added'], errors='coerce')
-    yearly_additions = df.groupby(df['date_added_clean'].dt.year).size()
+    yearly_additions = agg.yearly_additions()
     ax6.plot(yearly_additions.index, yearly_additions.values, marker='o', linewidth=2, color='purple')
     ax6.set_title('Content Added Over Time', fontweight='bold')
     ax6.set_xlabel('Year')
     ax6.set_ylabel('Titles Added')
     
     # 7. Genre Analysis (Violin Plot)
+    lap('panel 07 genre_analysis')
     ax7 = axes[1, 2]
-    all_genres = []
-    for genres in df['listed_in'].dropna():
-        all_genres.extend([genre.strip() for genre in genres.split(',')])
-    genre_counts = pd.Series(all_genres).value_counts().head(6)
+    genre_counts = agg.genre_counts.nlargest(6)
     
-    # Create data for violin plot
-    genre_year_data = []
+    # Create data for violin plot from the genre x release year counts
+    genre_year_stats = []
     genre_labels = []
     for genre in genre_counts.index:
-        genre_movies = df[df['listed_in'].str.contains(genre, na=False)]
-        years = genre_movies['release_year'].dropna()
-        if len(years) > 0:
-            genre_year_data.append(years)
+        if genre in agg.genre_year_counts.index:
+            genre_year_stats.append(violin_stats(agg.genre_year_counts.loc[genre]))
             genre_labels.append(genre[:10])
     
-    if genre_year_data:
-        parts = ax7.violinplot(genre_year_data, positions=range(len(genre_labels)))
+    if genre_year_stats:
+        parts = ax7.violin(genre_year_stats, positions=range(len(genre_labels)))
         ax7.set_title('Release Years by Genre', fontweight='bold')
         ax7.set_ylabel('Release Year')
         ax7.set_xticks(range(len(genre_labels)))
         ax7.set_xticklabels(genre_labels, rotation=45)
     
     # 8. Content Type by Rating (Stacked Bar)
+    lap('panel 08 content_type_by_rating')
     ax8 = axes[1, 3]
-    rating_type_cross = pd.crosstab(df['rating'], df['type'])
+    rating_type_cross = agg.rating_type_counts.unstack(fill_value=0)
     rating_type_cross.plot(kind='bar', stacked=True, ax=ax8, color=['#E50914', '#221F1F'])
     ax8.set_title('Content Type by Rating', fontweight='bold')
     ax8.set_xlabel('Rating')
@@ -133,17 +152,24 @@ def main():
     ax8.tick_params(axis='x', rotation=45)
     
     # 9. Movie Duration vs Release Year (Scatter Plot)
+    lap('panel 09 movie_duration_vs_release_year')
     ax9 = axes[2, 0]
-    movies_clean = df_movies.dropna(subset=['duration_minutes', 'release_year'])
-    ax9.scatter(movies_clean['release_year'], movies_clean['duration_minutes'], 
-               alpha=0.6, color='orange', s=20)
+    year_minutes = agg.movie_year_minutes_counts
+    if len(year_minutes) > 0:
+        years = year_minutes.index.get_level_values(0).astype(float)
+        minutes = year_minutes.index.get_level_values(1).astype(float)
+        if year_minutes.sum() > DENSITY_ROW_THRESHOLD:
+            draw_binned_scatter(ax9, years, minutes, year_minutes.values)
+        else:
+            ax9.scatter(years, minutes, alpha=0.6, color='orange', s=20)
     ax9.set_title('Movie Duration vs Release Year', fontweight='bold')
     ax9.set_xlabel('Release Year')
     ax9.set_ylabel('Duration (Minutes)')
     
     # 10. Top Directors (Bar Plot)
+    lap('panel 10 top_directors')
     ax10 = axes[2, 1]
-    top_directors = df['director'].value_counts().head(6)
+    top_directors = agg.director_counts.nlargest(6)
     ax10.bar(range(len(top_directors)), top_directors.values, color='teal')
     ax10.set_title('Top Directors', fontweight='bold')
     ax10.set_ylabel('Number of Titles')
@@ -152,11 +178,11 @@ def main():
                          for name in top_directors.index], rotation=45)
     
     # 11. Content by Month Added (KDE Plot)
+    lap('panel 11 content_by_month_added')
     ax11 = axes[2, 2]
-    df['month_added'] = df['date_added_clean'].dt.month
-    monthly_dist = df['month_added'].dropna()
-    if len(monthly_dist) > 0:
-        sns.kdeplot(monthly_dist, fill=True, color='red', alpha=0.7, ax=ax11)
+    month_counts = agg.month_counts
+    if len(month_counts) > 1:
+        draw_density(ax11, month_counts, color='red', alpha=0.7)
         ax11.set_title('Content Added by Month', fontweight='bold')
         ax11.set_xlabel('Month')
         ax11.set_ylabel('Density')
@@ -165,55 +191,64 @@ def main():
                              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
     
     # 12. TV Show Seasons Distribution (Swarm Plot)
+    lap('panel 12 tv_show_seasons_distribution')
     ax12 = axes[2, 3]
-    df_shows = df[df['type'] == 'TV Show'].copy()
-    df_shows['duration_seasons'] = df_shows['duration'].str.extract(r'(\d+)').astype(float)
-    seasons_data = df_shows['duration_seasons'].dropna()
-    if len(seasons_data) > 0:
-        y_data = np.random.normal(0, 0.1, len(seasons_data))
-        ax12.scatter(seasons_data, y_data, alpha=0.6, s=15, color='darkblue')
+    seasons_counts = agg.show_seasons_counts
+    if len(seasons_counts) > 0:
+        if seasons_counts.sum() > DENSITY_ROW_THRESHOLD:
+            draw_binned_strip(ax12, seasons_counts.index, seasons_counts.values)
+        else:
+            seasons_data = expand_counts(seasons_counts)
+            y_data = np.random.normal(0, 0.1, len(seasons_data))
+            ax12.scatter(seasons_data, y_data, alpha=0.6, s=15, color='darkblue')
         ax12.set_title('TV Show Seasons', fontweight='bold')
         ax12.set_xlabel('Number of Seasons')
         ax12.set_ylabel('')
         ax12.set_yticks([])
     
+    lap('tight_layout')
     plt.tight_layout()
+    lap('savefig')
     plt.savefig('netflix_analysis.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    lap.stop()
+    show_unless_headless()
     
     # Generate insights
     print("\n💡 Key Insights:")
     print("="*30)
     
-    movie_count = len(df[df['type'] == 'Movie'])
-    show_count = len(df[df['type'] == 'TV Show'])
-    total_count = len(df)
+    movie_count = agg.count_of('type_counts', 'Movie')
+    show_count = agg.count_of('type_counts', 'TV Show')
+    total_count = agg.rows
     
     print(f"📊 Content Distribution: {movie_count} movies ({movie_count/total_count*100:.1f}%) and {show_count} TV shows ({show_count/total_count*100:.1f}%)")
     
-    recent_content = len(df[df['release_year'] >= 2010])
+    recent_content = agg.released_since(2010)
     print(f"🎬 Recent Content: {recent_content} titles ({recent_content/total_count*100:.1f}%) released in 2010 or later")
     
-    top_rating = df['rating'].value_counts().index[0]
-    top_rating_count = df['rating'].value_counts().iloc[0]
+    top_rating = agg.rating_counts.idxmax()
+    top_rating_count = agg.rating_counts.max()
     print(f"📺 Most Common Rating: {top_rating} with {top_rating_count} titles")
     
-    top_country = df['country'].value_counts().index[0]
-    top_country_count = df['country'].value_counts().iloc[0]
-    print(f"🌍 Top Country: {top_country} produces {top_country_count} titles")
+    top_country = agg.country_counts.idxmax()
+    top_country_count = agg.country_counts.max()
+    top_country_movies = agg.count_of('country_type_counts', (top_country, 'Movie'))
+    top_country_shows = agg.count_of('country_type_counts', (top_country, 'TV Show'))
+    print(f"🌍 Top Country: {top_country} produces {top_country_count} titles ({top_country_movies} movies, {top_country_shows} TV shows)")
     
-    if len(df_movies) > 0:
-        avg_duration = df_movies['duration_minutes'].mean()
+    if len(agg.movie_minutes_counts) > 0:
+        avg_duration = agg.movie_duration_mean()
         print(f"⏱️ Average Movie Duration: {avg_duration:.1f} minutes")
     
-    all_genres = []
-    for genres in df['listed_in'].dropna():
-        all_genres.extend([genre.strip() for genre in genres.split(',')])
-    if all_genres:
-        top_genre = pd.Series(all_genres).value_counts().index[0]
+    if len(genre_counts) > 0:
+        top_genre = genre_counts.index[0]
         print(f"🎭 Most Popular Genre: {top_genre}")
     
+    print()
+    agg.print_timings()
+    
     print(f"\n✅ Analysis complete! Visualization saved as 'netflix_analysis.png'")
+    profiling.report()
 
 if __name__ == "__main__":
     main()
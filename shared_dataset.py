@@ -0,0 +1,164 @@
+"""
+Zero-copy sharing of the prepared dataset with worker processes
+The prepared DataFrame is published once as an uncompressed, single-chunk Arrow IPC file (in
+shared memory when /dev/shm is available, or the dataset cache file itself when it is current);
+workers receive a small picklable handle, memory-map the file and wrap its buffers as a read-only
+DataFrame instead of unpickling a private copy of the whole catalog
+"""
+
+import os
+import tempfile
+import uuid
+import numpy as np
+import pandas as pd
+from data_loader import HAS_PYARROW
+from profiling import stage
+
+if HAS_PYARROW:
+    import pyarrow as pa
+
+# Preferred directory for published datasets: RAM-backed, shared by every process on the machine
+SHARED_MEMORY_DIR = '/dev/shm'
+
+def _shared_dir():
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return tempfile.gettempdir()
+
+def write_ipc(df, path):
+    """Write a DataFrame as an uncompressed Arrow IPC file with one record batch (atomically)"""
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        # One batch keeps every column contiguous, so it can be viewed without concatenating chunks
+        writer.write_table(table, max_chunksize=max(len(df), 1))
+    os.replace(tmp_path, path)
+
+def _null_mask(array):
+    return array.is_null().to_numpy(zero_copy_only=False)
+
+def _values(array, dtype):
+    """numpy view of a fixed-width array's values buffer (no copy)"""
+    return np.frombuffer(array.buffers()[1], dtype=dtype, count=array.offset + len(array))[array.offset:]
+
+def _column(chunked):
+    """Wrap one memory-mapped Arrow column as a pandas array, copying only what pandas can't view
+
+    Strings stay Arrow-backed (string[pyarrow]), numbers and timestamps are views of the mapped
+    values (nullable integers add a boolean mask), and dictionaries become categoricals over their
+    codes. Multi-chunk columns are concatenated first, which copies them.
+    """
+    array = chunked.combine_chunks() if chunked.num_chunks != 1 else chunked.chunk(0)
+    kind = array.type
+    if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        return pd.arrays.ArrowStringArray(pa.chunked_array([array], type=kind))
+    if pa.types.is_dictionary(kind):
+        codes = _values(array.indices, array.indices.type.to_pandas_dtype())
+        if array.null_count:
+            codes = np.where(_null_mask(array), -1, codes)
+        categories = array.dictionary.to_pandas()
+        return pd.Categorical.from_codes(codes, categories=categories)
+    if pa.types.is_integer(kind):
+        values = _values(array, kind.to_pandas_dtype())
+        if array.null_count:
+            return pd.arrays.IntegerArray(values, _null_mask(array))
+        return values
+    if pa.types.is_floating(kind) or pa.types.is_timestamp(kind):
+        dtype = np.dtype(f'datetime64[{kind.unit}]') if pa.types.is_timestamp(kind) else kind.to_pandas_dtype()
+        values = _values(array, dtype)
+        if array.null_count:
+            # pandas writes NaN/NaT into null slots, so the buffer already reads as missing there
+            mask = _null_mask(array)
+            missing = np.isnat(values[mask]) if values.dtype.kind == 'M' else np.isnan(values[mask])
+            if not missing.all():
+                values = np.where(mask, np.array('NaT' if values.dtype.kind == 'M' else np.nan, dtype=dtype),
+                                  values)
+        return values
+    return chunked.to_pandas()
+
+class SharedDataset:
+    """Picklable handle of a dataset published as a memory-mapped Arrow IPC file
+
+    Use as a context manager in the parent; a published temporary file is deleted on close, while a
+    dataset cache file that was merely reused is left in place.
+    """
+
+    def __init__(self, path, rows, columns, owned=False):
+        self.path = path
+        self.rows = rows
+        self.columns = columns
+        self.owned = owned
+
+    @classmethod
+    def publish(cls, df, directory=None):
+        """Write df once to shared memory (or the temp directory) for workers to attach to"""
+        if not HAS_PYARROW:
+            raise ImportError("Sharing the dataset with workers needs pyarrow")
+        path = os.path.join(directory or _shared_dir(), f'netflix-shared-{os.getpid()}-{uuid.uuid4().hex}.arrow')
+        with stage('publish_dataset'):
+            write_ipc(df, path)
+        return cls(path, len(df), list(df.columns), owned=True)
+
+    @classmethod
+    def from_cache(cls, csv_path, df=None, **read_csv_kwargs):
+        """Handle on the dataset cache file itself when it is current (and matches df); otherwise publish df
+
+        read_csv_kwargs are the options df was loaded with, as for load_prepared_dataset.
+        """
+        from dataset_cache import cache_paths, is_cache_valid, read_metadata
+        data_path, meta_path = cache_paths(csv_path)
+        metadata = read_metadata(meta_path)
+        if (HAS_PYARROW and metadata and is_cache_valid(csv_path, metadata, read_csv_kwargs)
+                and (df is None or (metadata['rows'], metadata['columns']) == (len(df), list(df.columns)))):
+            return cls(data_path, metadata['rows'], metadata['columns'])
+        if df is None:
+            from dataset_cache import load_prepared_dataset
+            df = load_prepared_dataset(csv_path, report=False, **read_csv_kwargs)
+        return cls.publish(df)
+
+    def __getstate__(self):
+        # Only the publishing process removes the file
+        return dict(self.__dict__, owned=False)
+
+    def attach(self):
+        """Read-only DataFrame over the memory-mapped file, mapped once per process"""
+        view = _ATTACHED.get(self.path)
+        if view is None:
+            with stage('attach_dataset'):
+                view = _ATTACHED[self.path] = attach_dataset(self.path)
+        return view
+
+    def close(self):
+        _ATTACHED.pop(self.path, None)
+        if self.owned:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.owned = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Views attached by this process, keyed by file path
+_ATTACHED = {}
+
+def attach_dataset(path):
+    """Memory-map an Arrow IPC (or uncompressed Feather v2) file as a read-only DataFrame"""
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    # copy=False keeps each column its own block over the mapped buffers instead of consolidating
+    df = pd.DataFrame({name: _column(table.column(name)) for name in table.column_names}, copy=False)
+    df.attrs['shared_path'] = path
+    return df
+
+def call_with_dataset(dataset, function, *args, **kwargs):
+    """Call function(df, *args, **kwargs) on the shared read-only view; submit this to a process pool
+
+    Works for any function taking the prepared DataFrame first, e.g.
+    pool.submit(call_with_dataset, dataset, generate_insights).
+    """
+    return function(dataset.attach(), *args, **kwargs)
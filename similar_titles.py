@@ -0,0 +1,235 @@
+"""
+"Titles similar to X" for every title in the catalog, in one batch job
+Each title is a sparse TF-IDF vector of its genres, cast, directors and countries (feature-hashed
+into a fixed number of columns); cosine top-k neighbours are computed a block of titles at a time,
+with memory bounded by the block size, across a process pool, and streamed to a Feather file
+keyed by show_id that reports can join against
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from data_loader import DATASET_PATH, HAS_PYARROW
+from multivalue import CatalogTokens, unique_row_codes
+from sketches import hash_values
+from profiling import stage
+
+if HAS_PYARROW:
+    import pyarrow as pa
+
+# Multi-valued columns describing a title and the weight of a match on each; countries are broad,
+# so sharing one says less than sharing a genre or a cast member
+FEATURE_WEIGHTS = {
+    'listed_in': 1.0,
+    'cast': 1.0,
+    'director': 1.0,
+    'country': 0.5,
+}
+
+# Hashed feature space: large enough that unrelated names rarely collide
+N_FEATURES = 1 << 20
+
+# Memory for one block's dense float32 similarity scores (block titles x catalog)
+BLOCK_BYTES = 256 << 20
+MAX_BLOCK_SIZE = 2048
+
+def feature_vectors(df, tokens=None, weights=FEATURE_WEIGHTS, n_features=N_FEATURES):
+    """L2-normalized float32 TF-IDF matrix (titles x hashed features) of the multi-valued columns"""
+    tokens = tokens if tokens is not None else CatalogTokens(df)
+    rows, features, values = [], [], []
+    for column, weight in weights.items():
+        if column not in df.columns:
+            continue
+        column_tokens = tokens[column]
+        token_rows, codes = unique_row_codes(column_tokens.index.to_numpy(), column_tokens.cat.codes.to_numpy())
+        # Only the dictionary is hashed; rows pick their feature through the codes
+        hashed = hash_values(column + '=' + pd.Index(column_tokens.cat.categories).astype(str))
+        rows.append(token_rows)
+        features.append((hashed % np.uint64(n_features)).astype(np.int64)[codes])
+        values.append(np.full(len(codes), weight))
+    if not rows:
+        return sp.csr_matrix((len(df), n_features), dtype=np.float32)
+
+    matrix = sp.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(features))),
+                           shape=(len(df), n_features))
+    matrix.sum_duplicates()
+    document_frequency = np.bincount(matrix.indices, minlength=n_features)
+    idf = np.log((1 + len(df)) / (1 + document_frequency)) + 1
+    matrix.data *= idf[matrix.indices]
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = sp.diags(1 / np.where(norms > 0, norms, 1)) @ matrix
+    return matrix.tocsr().astype(np.float32)
+
+def block_size(n_titles, block_bytes=BLOCK_BYTES):
+    """Titles per block so that one block's float32 scores fit in block_bytes"""
+    return int(min(MAX_BLOCK_SIZE, max(1, block_bytes // (4 * max(n_titles, 1)))))
+
+def feature_postings(vectors):
+    """The feature matrix transposed to CSR (features x titles), so a feature's titles are one row slice"""
+    return vectors.T.tocsr()
+
+def top_k_neighbors(vectors, start, stop, k, postings=None):
+    """Cosine top-k of titles start:stop against the catalog, as (rows, neighbours, scores)
+
+    postings is feature_postings(vectors), built once per catalog rather than per block. Only the
+    features the block uses take part in the product, and the block's dense scores are partitioned,
+    so one block costs O(block size x (catalog size + catalog nonzeros in the block's features)) and
+    the whole catalog O(titles^2). Neighbours with no shared feature are left out; ties are broken by row.
+    """
+    if postings is None:
+        postings = feature_postings(vectors)
+    block = vectors[start:stop]
+    used = np.unique(block.indices)
+    # Catalog x block scores: sparse (catalog x used features) times dense (used features x block),
+    # laid out block x catalog so each title's scores are contiguous for the partition; the used
+    # features' postings are one row slice, turned back to CSR for the faster row-major product
+    scores = np.ascontiguousarray((postings[used].T.tocsr() @ block[:, used].toarray().T).T)
+    scores[np.arange(stop - start), np.arange(start, stop)] = 0
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float32)
+    threshold = np.partition(scores, scores.shape[1] - k, axis=1)[:, scores.shape[1] - k]
+    block_rows, neighbors = np.nonzero((scores >= threshold[:, None]) & (scores > 0))
+    values = scores[block_rows, neighbors]
+    order = np.lexsort((neighbors, -values, block_rows))
+    first = np.searchsorted(block_rows[order], np.arange(stop - start))
+    keep = order[np.arange(len(order)) - first[block_rows[order]] < k]
+    return block_rows[keep] + start, neighbors[keep], values[keep]
+
+_WORKER_VECTORS = None
+_WORKER_POSTINGS = None
+
+def _init_worker(vectors, postings):
+    """Keep one copy of the feature matrix and its postings per worker process"""
+    global _WORKER_VECTORS, _WORKER_POSTINGS
+    _WORKER_VECTORS, _WORKER_POSTINGS = vectors, postings
+
+def _worker_block(start, stop, k):
+    return top_k_neighbors(_WORKER_VECTORS, start, stop, k, _WORKER_POSTINGS)
+
+def neighbor_blocks(vectors, k=10, block=None, workers=1):
+    """Yield (rows, neighbours, scores) for consecutive blocks of titles, in row order"""
+    n_titles = vectors.shape[0]
+    block = block or block_size(n_titles)
+    starts = range(0, n_titles, block)
+    stops = [min(start + block, n_titles) for start in starts]
+    with stage('feature_postings'):
+        postings = feature_postings(vectors)
+    if workers and workers > 1 and len(starts) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(starts)), initializer=_init_worker,
+                                 initargs=(vectors, postings)) as pool:
+            yield from pool.map(_worker_block, starts, stops, [k] * len(starts))
+        return
+    for start, stop in zip(starts, stops):
+        yield top_k_neighbors(vectors, start, stop, k, postings)
+
+def _neighbor_frame(df, rows, neighbors, scores):
+    """Long-format neighbour rows: one line per (title, rank)"""
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    frame = pd.DataFrame({'row': rows, 'rank': rank + 1, 'neighbor_row': neighbors, 'score': scores})
+    for column in ['show_id', 'title']:
+        if column in df.columns:
+            values = df[column].to_numpy(dtype=object)
+            frame[column] = values[rows]
+            frame['neighbor_' + column] = values[neighbors]
+    return frame
+
+def write_similar_titles(df, output_path, k=10, block=None, workers=1, tokens=None, progress=True):
+    """Compute the top-k similar titles of every title and stream them to a Feather file
+
+    Blocks are written as they finish, so peak memory is one block's scores plus the feature matrix.
+    Returns the number of neighbour rows written.
+    """
+    if not HAS_PYARROW:
+        raise ImportError("Writing the similar-titles table needs pyarrow")
+    with stage('feature_vectors'):
+        vectors = feature_vectors(df, tokens)
+    block = block or block_size(len(df))
+    n_blocks = -(-len(df) // block)
+    if progress:
+        print(f"🧮 {len(df):,} titles x {vectors.nnz:,} features, {n_blocks:,} blocks of {block:,}")
+
+    start = time.perf_counter()
+    written = 0
+    writer = None
+    tmp_path = output_path + '.tmp'
+    try:
+        for i, (rows, neighbors, scores) in enumerate(neighbor_blocks(vectors, k, block, workers), 1):
+            with stage('write_block'):
+                frame = _neighbor_frame(df, rows, neighbors, scores)
+                batch = pa.RecordBatch.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_file(tmp_path, batch.schema)
+                writer.write_batch(batch)
+            written += len(frame)
+            if progress and (i == n_blocks or i % max(1, n_blocks // 10) == 0):
+                print(f"  block {i}/{n_blocks}: {written:,} neighbours ({time.perf_counter() - start:.1f}s)")
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        empty = np.empty(0, dtype=np.int64)
+        _neighbor_frame(df, empty, empty, np.empty(0, dtype=np.float32)).to_feather(tmp_path)
+    os.replace(tmp_path, output_path)
+    return written
+
+def read_similar_titles(path):
+    """Neighbour table written by write_similar_titles"""
+    return pd.read_feather(path)
+
+def similar_to(df, title, k=10, tokens=None, vectors=None):
+    """Top-k similar titles of one title, by name (for interactive lookups)"""
+    matches = np.flatnonzero(df['title'].to_numpy(dtype=object) == title)
+    if len(matches) == 0:
+        return pd.DataFrame(columns=['title', 'score'])
+    vectors = vectors if vectors is not None else feature_vectors(df, tokens)
+    row = int(matches[0])
+    _, neighbors, scores = top_k_neighbors(vectors, row, row + 1, k)
+    return pd.DataFrame({'title': df['title'].to_numpy(dtype=object)[neighbors], 'score': scores},
+                        index=pd.Index(neighbors, name='row'))
+
+def similar_titles_path(csv_path):
+    """Default output path of the neighbour table for a CSV file"""
+    return os.path.splitext(csv_path)[0] + '.similar.feather'
+
+def main():
+    """Command-line entry point"""
+    from dataset_cache import load_prepared_dataset
+    import profiling
+    parser = argparse.ArgumentParser(description='Top-k similar titles for every title in the catalog')
+    parser.add_argument('path', nargs='?', default=DATASET_PATH, help='catalog CSV file')
+    parser.add_argument('--k', type=int, default=10, help='neighbours per title')
+    parser.add_argument('--output', help='Feather file to write (default: <catalog>.similar.feather)')
+    parser.add_argument('--block-size', type=int, default=None, help='titles per block (default: fit 256 MB)')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: CPU count)')
+    parser.add_argument('--title', help='only print the titles most similar to this one')
+    parser.add_argument('--profile', action='store_true', help='print a per-stage profile and write a trace')
+    args = parser.parse_args()
+    profiling.configure(args.profile)
+
+    df = load_prepared_dataset(args.path)
+    if args.title:
+        similar = similar_to(df, args.title, args.k)
+        print(f"\n🎯 Titles similar to {args.title!r}:")
+        if similar.empty:
+            print("   (title not found or nothing similar)")
+        for name, score in zip(similar['title'], similar['score']):
+            print(f"   {score:.3f}  {name}")
+        return
+
+    if not HAS_PYARROW:
+        print("❌ pyarrow is required to write the similar-titles table")
+        return
+    output = args.output or similar_titles_path(args.path)
+    start = time.perf_counter()
+    written = write_similar_titles(df, output, args.k, args.block_size, args.workers or os.cpu_count() or 1)
+    print(f"\n✅ {written:,} neighbours written to '{output}' in {time.perf_counter() - start:.1f}s")
+    profiling.report()
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from data_loader import load_netflix_data
+from aggregates import AggregationEngine
+from panel_rendering import show_unless_headless
 
 def main():
     print("🎬 Netflix Data Visualization Analysis")
@@ -13,18 +16,21 @@ def main():
     
     # Load data
     try:
-        df = pd.read_csv('netflix_titles.csv')
+        df = load_netflix_data('netflix_titles.csv', usecols=['type', 'release_year', 'rating', 'country', 'listed_in'])
         print(f"✅ Dataset loaded successfully! Shape: {df.shape}")
     except Exception as e:
         print(f"❌ Error loading dataset: {e}")
         return
     
+    # Every panel and insight reads from one memoized aggregation pass
+    agg = AggregationEngine(df).run()
+    
     # Basic info
     print(f"\n📊 Dataset Overview:")
-    print(f"Total records: {len(df)}")
-    print(f"Movies: {len(df[df['type'] == 'Movie'])}")
-    print(f"TV Shows: {len(df[df['type'] == 'TV Show'])}")
-    print(f"Date range: {df['release_year'].min()} - {df['release_year'].max()}")
+    print(f"Total records: {agg.rows}")
+    print(f"Movies: {agg.count_of('type_counts', 'Movie')}")
+    print(f"TV Shows: {agg.count_of('type_counts', 'TV Show')}")
+    print(f"Date range: {agg.release_year_counts.index.min()} - {agg.release_year_counts.index.max()}")
     
     # Create a simple 2x2 subplot
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
@@ -32,7 +38,7 @@ def main():
     
     # 1. Content Type Distribution (Bar Plot)
     ax1 = axes[0, 0]
-    type_counts = df['type'].value_counts()
+    type_counts = agg.type_counts.sort_values(ascending=False)
     colors = ['#E50914', '#221F1F']  # Netflix colors
     bars = ax1.bar(type_counts.index, type_counts.values, color=colors)
     ax1.set_title('Movies vs TV Shows', fontweight='bold')
@@ -44,14 +50,14 @@ def main():
     
     # 2. Release Year Distribution (Histogram)
     ax2 = axes[0, 1]
-    ax2.hist(df['release_year'].dropna(), bins=15, color='skyblue', alpha=0.7, edgecolor='black')
+    ax2.hist(agg.release_year_counts.index.astype(float), weights=agg.release_year_counts.values, bins=15, color='skyblue', alpha=0.7, edgecolor='black')
     ax2.set_title('Content by Release Year', fontweight='bold')
     ax2.set_xlabel('Release Year')
     ax2.set_ylabel('Frequency')
     
     # 3. Rating Distribution (Bar Plot)
     ax3 = axes[1, 0]
-    rating_counts = df['rating'].value_counts().head(6)
+    rating_counts = agg.rating_counts.nlargest(6)
     bars = ax3.bar(range(len(rating_counts)), rating_counts.values, color='lightcoral')
     ax3.set_title('Top Content Ratings', fontweight='bold')
     ax3.set_ylabel('Count')
@@ -64,7 +70,7 @@ def main():
     
     # 4. Top Countries (Horizontal Bar)
     ax4 = axes[1, 1]
-    top_countries = df['country'].value_counts().head(6)
+    top_countries = agg.country_counts.nlargest(6)
     ax4.barh(range(len(top_countries)), top_countries.values, color='lightgreen')
     ax4.set_title('Top Countries by Content', fontweight='bold')
     ax4.set_xlabel('Number of Titles')
@@ -78,36 +84,33 @@ def main():
     plt.savefig('netflix_simple_analysis.png', dpi=300, bbox_inches='tight')
     print(f"\n📈 Visualization saved as 'netflix_simple_analysis.png'")
     
-    # Show the plot
-    plt.show()
+    # Show the plot (skipped in headless batch jobs)
+    show_unless_headless()
     
     # Generate insights
     print("\n💡 Key Insights:")
     print("="*30)
     
-    movie_count = len(df[df['type'] == 'Movie'])
-    show_count = len(df[df['type'] == 'TV Show'])
-    total_count = len(df)
+    movie_count = agg.count_of('type_counts', 'Movie')
+    show_count = agg.count_of('type_counts', 'TV Show')
+    total_count = agg.rows
     
     print(f"📊 Content Distribution: {movie_count} movies ({movie_count/total_count*100:.1f}%) and {show_count} TV shows ({show_count/total_count*100:.1f}%)")
     
-    recent_content = len(df[df['release_year'] >= 2010])
+    recent_content = agg.released_since(2010)
     print(f"🎬 Recent Content: {recent_content} titles ({recent_content/total_count*100:.1f}%) released in 2010 or later")
     
-    top_rating = df['rating'].value_counts().index[0]
-    top_rating_count = df['rating'].value_counts().iloc[0]
+    top_rating = agg.rating_counts.idxmax()
+    top_rating_count = agg.rating_counts.max()
     print(f"📺 Most Common Rating: {top_rating} with {top_rating_count} titles")
     
-    top_country = df['country'].value_counts().index[0]
-    top_country_count = df['country'].value_counts().iloc[0]
+    top_country = agg.country_counts.idxmax()
+    top_country_count = agg.country_counts.max()
     print(f"🌍 Top Country: {top_country} produces {top_country_count} titles")
     
     # Genre analysis
-    all_genres = []
-    for genres in df['listed_in'].dropna():
-        all_genres.extend([genre.strip() for genre in genres.split()])
-    if all_genres:
-        top_genre = pd.Series(all_genres).value_counts().index[0]
+    if len(agg.genre_counts) > 0:
+        top_genre = agg.genre_counts.idxmax()
         print(f"🎭 Most Popular Genre: {top_genre}")
     
     print(f"\n✅ Analysis complete!")
@@ -0,0 +1,200 @@
+"""
+Approximate counting sketches for high-cardinality columns (director, cast, country)
+Space-Saving keeps the heavy hitters, Count-Min bounds any value's frequency and HyperLogLog
+estimates the number of distinct values; all three use bounded memory and merge across chunks
+and processes
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+def hash_values(values):
+    """Stable 64-bit hashes of values (the same in every process)"""
+    values = np.asarray(pd.Index(values).astype(str), dtype=object)
+    return pd.util.hash_array(values, categorize=False)
+
+class SketchConfig:
+    """Error bounds of the approximate mode
+
+    top_k_error: Space-Saving overcounts any value by at most top_k_error * N
+    frequency_error, confidence: Count-Min overcounts by at most frequency_error * N with that probability
+    distinct_error: relative standard error of the HyperLogLog distinct count
+    """
+
+    def __init__(self, top_k_error=0.001, frequency_error=0.0005, confidence=0.99, distinct_error=0.01):
+        self.top_k_error = top_k_error
+        self.frequency_error = frequency_error
+        self.confidence = confidence
+        self.distinct_error = distinct_error
+
+    def new_sketch(self):
+        return ColumnSketch(
+            SpaceSaving(math.ceil(1 / self.top_k_error)),
+            CountMinSketch.from_error(self.frequency_error, 1 - self.confidence),
+            HyperLogLog.from_error(self.distinct_error),
+        )
+
+class SpaceSaving:
+    """Mergeable Space-Saving summary: at most capacity values with upper-bound counts and their error"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.total = 0
+
+    def min_count(self):
+        """Upper bound on the count of any value not being monitored"""
+        return int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+
+    def update(self, counts):
+        """Fold exact counts (e.g. of one chunk) into the summary"""
+        exact = SpaceSaving(self.capacity)
+        exact.total = int(counts.sum())
+        # Every value dropped here counts at most the smallest one kept, which is min_count()
+        exact.counts = counts.sort_values(ascending=False, kind='stable').head(self.capacity).astype('int64')
+        exact.errors = pd.Series(0, index=exact.counts.index, dtype='int64')
+        return self.merge(exact)
+
+    def merge(self, other):
+        """Merge another summary into this one in place and return self"""
+        mine_min, theirs_min = self.min_count(), other.min_count()
+        union = self.counts.index.union(other.counts.index)
+        counts = (self.counts.reindex(union, fill_value=mine_min)
+                  + other.counts.reindex(union, fill_value=theirs_min))
+        errors = (self.errors.reindex(union, fill_value=mine_min)
+                  + other.errors.reindex(union, fill_value=theirs_min))
+        keep = counts.sort_values(ascending=False, kind='stable').index[:self.capacity]
+        self.counts, self.errors = counts[keep].astype('int64'), errors[keep].astype('int64')
+        self.total += other.total
+        return self
+
+    def top(self, k):
+        return self.counts.head(k)
+
+class CountMinSketch:
+    """Count-Min sketch: depth rows of width counters; estimates never undercount"""
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon, delta):
+        """Sketch overcounting by at most epsilon * N with probability 1 - delta"""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+    def _columns(self, hashes):
+        # Double hashing: row i uses h1 + i * h2
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        h2 = (hashes >> np.uint64(32)).astype(np.int64) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def update(self, counts):
+        """Add exact counts keyed by value"""
+        weights = counts.to_numpy(dtype=np.float64)
+        for row, columns in enumerate(self._columns(hash_values(counts.index))):
+            self.table[row] += np.bincount(columns, weights=weights, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+        return self
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Count-Min sketches must have the same width and depth to merge")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def estimate(self, values):
+        """Upper-bound counts of the given values"""
+        columns = self._columns(hash_values(values))
+        return np.min([self.table[row, cols] for row, cols in enumerate(columns)], axis=0)
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision registers"""
+
+    def __init__(self, precision):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def from_error(cls, relative_error):
+        """Counter whose relative standard error is about relative_error"""
+        precision = math.ceil(2 * math.log2(1.04 / relative_error))
+        return cls(min(max(precision, 4), 18))
+
+    def update_hashes(self, hashes):
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # Rank = leading zeros of the remaining 64 - p bits + 1, via exact 32-bit float exponents
+        high, low = (rest >> np.uint64(32)).astype(np.float64), (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bit_length = np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def update(self, values):
+        return self.update_hashes(hash_values(values))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog counters must have the same precision to merge")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            return m * math.log(m / zeros)
+        return float(raw)
+
+class ColumnSketch:
+    """Top-k, frequency and distinct-count sketches of one column"""
+
+    def __init__(self, heavy_hitters, frequencies, distinct):
+        self.heavy_hitters = heavy_hitters
+        self.frequencies = frequencies
+        self.distinct = distinct
+
+    def update(self, counts):
+        """Fold exact counts of one chunk (value -> titles) into every sketch"""
+        if len(counts) == 0:
+            return self
+        self.heavy_hitters.update(counts)
+        self.frequencies.update(counts)
+        self.distinct.update(counts.index)
+        return self
+
+    def merge(self, other):
+        self.heavy_hitters.merge(other.heavy_hitters)
+        self.frequencies.merge(other.frequencies)
+        self.distinct.merge(other.distinct)
+        return self
+
+    def top_counts(self, k=None):
+        """Estimated counts of the heaviest values, tightened by Count-Min, most common first"""
+        counts = self.heavy_hitters.counts
+        if len(counts) == 0:
+            return counts
+        estimate = np.minimum(counts.to_numpy(), self.frequencies.estimate(counts.index))
+        counts = pd.Series(estimate, index=counts.index, name='count').sort_values(ascending=False, kind='stable')
+        return counts if k is None else counts.head(k)
+
+    def distinct_count(self):
+        return int(round(self.distinct.estimate()))
+
+    def error_bounds(self):
+        """Worst-case absolute overcount of top_counts and relative error of distinct_count"""
+        total = self.heavy_hitters.total
+        return {
+            'count_overestimate': min(total / self.heavy_hitters.capacity, math.e * total / self.frequencies.width),
+            'distinct_relative_error': 1.04 / math.sqrt(len(self.distinct.registers)),
+        }
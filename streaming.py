@@ -0,0 +1,84 @@
+"""
+Streaming mode for catalogs larger than memory
+Reads netflix_titles.csv in chunks, folds each chunk into partial aggregates and renders the
+13-panel figure from the merged result, so peak memory is bounded by the chunk size
+"""
+
+import argparse
+import time
+from data_loader import DATASET_PATH, read_netflix_chunks
+from aggregates import CatalogAggregates, compute_aggregates
+from sketches import SketchConfig
+import profiling
+from profiling import stage
+
+# Columns the aggregates need; title and description are never read in streaming mode
+STREAMING_COLUMNS = ['type', 'director', 'cast', 'country', 'date_added', 'release_year',
+                     'rating', 'duration', 'listed_in']
+
+def stream_aggregates(path=DATASET_PATH, chunksize=100_000, progress=True, sketch_config=None,
+                      **read_csv_kwargs):
+    """Fold the CSV chunk by chunk into one CatalogAggregates
+
+    With a SketchConfig, director/country/cast are summarized by mergeable sketches, so memory
+    stays bounded however many distinct names the catalog has.
+    """
+    total = CatalogAggregates()
+    start = time.perf_counter()
+    chunks = read_netflix_chunks(path, chunksize=chunksize, usecols=STREAMING_COLUMNS, **read_csv_kwargs)
+    for i, chunk in enumerate(chunks, 1):
+        with stage('aggregate_chunk'):
+            total.merge(compute_aggregates(chunk, sketch_config=sketch_config))
+        if progress:
+            print(f"  chunk {i}: {total.rows:,} rows folded ({time.perf_counter() - start:.1f}s)")
+    return total
+
+def main():
+    """Render the analysis figure in streaming mode"""
+    parser = argparse.ArgumentParser(description='Netflix analysis over a CSV streamed in chunks')
+    parser.add_argument('path', nargs='?', default=DATASET_PATH, help='catalog CSV file')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows per chunk')
+    parser.add_argument('--output', default='netflix_analysis.png', help='figure file to write')
+    parser.add_argument('--no-show', action='store_true', help="don't open the figure window")
+    parser.add_argument('--workers', type=int, default=1, help='render panels in this many processes')
+    parser.add_argument('--profile', action='store_true', help='print a per-stage profile and write a trace')
+    parser.add_argument('--figure-cache', action='store_true',
+                        help='reuse rendered panel tiles whose aggregates did not change (.figure_cache/)')
+    parser.add_argument('--approximate', action='store_true',
+                        help='sketch director/country/cast counts in bounded memory')
+    parser.add_argument('--top-k-error', type=float, default=0.001,
+                        help='approximate mode: max overcount of top values as a fraction of titles')
+    parser.add_argument('--distinct-error', type=float, default=0.01,
+                        help='approximate mode: relative error of distinct counts')
+    args = parser.parse_args()
+    profiling.configure(args.profile)
+
+    # Imported here so the aggregation path doesn't pull in the plotting style setup
+    from data_visualization import render_visualizations
+    from figure_cache import FigureCache
+
+    print("🎬 Netflix Analysis (streaming mode)")
+    print("="*50)
+    try:
+        with stage('stream_aggregates'):
+            sketch_config = None
+            if args.approximate:
+                sketch_config = SketchConfig(top_k_error=args.top_k_error, distinct_error=args.distinct_error)
+            agg = stream_aggregates(args.path, chunksize=args.chunksize, sketch_config=sketch_config,
+                                    on_bad_lines='skip')
+    except FileNotFoundError:
+        print(f"❌ Dataset file '{args.path}' not found!")
+        return
+
+    agg.print_timings()
+    agg.print_sketches()
+    
+    print("\n📈 Creating visualizations...")
+    with stage('render'):
+        render_visualizations(agg, output_path=args.output, show=False if args.no_show else None,
+                              workers=args.workers, cache=FigureCache.from_env(args.figure_cache))
+    print(f"\n✅ Analysis complete! Visualization saved as '{args.output}'")
+    profiling.report()
+
+if __name__ == "__main__":
+    main()
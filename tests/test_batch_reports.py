@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from create_dataset import generate_batch
+from data_loader import add_derived_columns, netflix_schema
+from aggregates import AggregationEngine, COUNT_FIELDS
+from batch_reports import SliceIndex, slices_by
+
+def test_grouped_slice_aggregates_match_per_slice_engine():
+    df = generate_batch(3000, np.random.default_rng(3))
+    df = add_derived_columns(df.astype({column: dtype for column, dtype in netflix_schema().items()
+                                        if column != 'show_id'}))
+    index = SliceIndex(df)
+    slices = slices_by(index, 'country', top=3) + slices_by(index, 'genre', top=3) + slices_by(index, 'rating')
+    slices.append({'country': ['Spain', 'India'], 'type': 'Movie'})
+    row_sets = [index.rows(filters) for filters in slices]
+
+    grouped = AggregationEngine(df, index.tokens).slice_aggregates(row_sets)
+    for rows, agg in zip(row_sets, grouped):
+        expected = AggregationEngine(df.take(rows).reset_index(drop=True)).run()
+        assert agg.rows == expected.rows
+        for field in COUNT_FIELDS:
+            pd.testing.assert_series_equal(getattr(agg, field).sort_index(), getattr(expected, field).sort_index())
@@ -0,0 +1,39 @@
+import os
+import pandas as pd
+from data_loader import load_netflix_data
+from aggregates import AggregationEngine
+from cooccurrence import CollaborationGraph
+from multivalue import is_delimited
+
+SHIPPED_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netflix_titles.csv')
+
+def test_shipped_csv_cast_is_not_read_as_one_person_per_title():
+    df = load_netflix_data(SHIPPED_CSV, report=False)
+    # The bundled sample joins cast names with spaces, not commas
+    assert not is_delimited(df['cast'])
+    assert is_delimited(df['director'])
+
+    graph = CollaborationGraph.from_frame(df)
+    assert 'cast' not in graph.incidence
+    assert 'director' in graph.incidence
+    assert graph.pair_counts('director', 'cast').empty
+    assert AggregationEngine(df).run().director_cast_counts.empty
+
+def test_comma_separated_cast_pairs():
+    df = pd.DataFrame({
+        'director': ['Ava Lee', 'Ava Lee', 'Ben Cho'],
+        'cast': ['Cara Diaz, Dan Eze', 'Cara Diaz', 'Dan Eze, Cara Diaz'],
+    })
+    pairs = CollaborationGraph.from_frame(df).pair_counts('director', 'cast')
+    assert pairs.to_dict() == {
+        ('Ava Lee', 'Cara Diaz'): 2,
+        ('Ava Lee', 'Dan Eze'): 1,
+        ('Ben Cho', 'Cara Diaz'): 1,
+        ('Ben Cho', 'Dan Eze'): 1,
+    }
+
+def test_streaming_merge_without_separable_cast():
+    from streaming import stream_aggregates
+    agg = stream_aggregates(SHIPPED_CSV, chunksize=20, progress=False)
+    assert agg.rows == 50
+    assert agg.director_cast_counts.empty
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from create_dataset import generate_batch
+from data_loader import add_derived_columns, netflix_schema
+from count_cube import CountCube
+
+VIEWS = [('type',), ('rating', 'type'), ('country',), ('country', 'type'), ('release_year',),
+         ('year_added', 'month_added')]
+
+def catalog(n_rows, seed):
+    df = generate_batch(n_rows, np.random.default_rng(seed))
+    # A few co-productions, so titles count once per listed country
+    df.loc[df.index[::7], 'country'] = 'Spain, India'
+    df.loc[df.index[::11], 'country'] = np.nan
+    df = df.astype({column: dtype for column, dtype in netflix_schema().items() if column != 'show_id'})
+    return add_derived_columns(df)
+
+def assert_same_views(cube, expected):
+    assert cube.total() == expected.total()
+    for by in VIEWS:
+        pd.testing.assert_series_equal(cube.counts(*by), expected.counts(*by), check_index_type=False)
+
+def test_merge_matches_a_full_build():
+    df = catalog(2000, 8)
+    full = CountCube.from_frame(df)
+    merged = CountCube.from_frame(df.iloc[:900].reset_index(drop=True))
+    merged.merge(CountCube.from_frame(df.iloc[900:].reset_index(drop=True)))
+    assert_same_views(merged, full)
+
+def test_counts_match_the_dataframe():
+    df = catalog(1000, 9)
+    cube = CountCube.from_frame(df)
+    assert cube.total() == len(df)
+    assert cube.counts('type').to_dict() == df['type'].value_counts().to_dict()
+    countries = df['country'].astype(object).str.split(', ').explode().dropna()
+    assert cube.counts('country').to_dict() == countries.value_counts().to_dict()
+
+    tv_ma = df['rating'] == 'TV-MA'
+    in_spain = df['country'].astype(object).str.contains('Spain', na=False)
+    assert cube.select(rating='TV-MA', country='Spain').total() == int((tv_ma & in_spain).sum())
+    assert cube.select(rating=['TV-MA', 'R']).total() == int(df['rating'].isin(['TV-MA', 'R']).sum())
+    assert cube.select(rating='no such rating').total() == 0
+    with pytest.raises(KeyError):
+        cube.select(genre='Dramas')
+
+def test_save_and_load(tmp_path):
+    cube = CountCube.from_frame(catalog(500, 10))
+    path = str(tmp_path / 'cube.npz')
+    cube.save(path)
+    assert_same_views(CountCube.load(path), cube)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+import pandas as pd
+from create_dataset import generate_batch, generate_catalog, COLUMNS, GENRES
+
+@pytest.mark.parametrize('size', [3, 10, 14, len(GENRES)])
+def test_genres_per_title_is_honoured_for_long_samples(size):
+    df = generate_batch(500, np.random.default_rng(0), distributions={'genres_per_title': (size, size)})
+    genres = df['listed_in'].str.split(', ')
+    assert (genres.str.len() == size).all()
+    assert (genres.apply(lambda names: len(set(names))) == size).all()
+    assert set(genres.explode()) <= set(GENRES)
+
+@pytest.mark.parametrize('ext', ['.csv', '.parquet'])
+def test_more_shards_than_rows_writes_empty_shards(tmp_path, ext):
+    paths = generate_catalog(str(tmp_path / f'catalog{ext}'), 3, shards=5, workers=1)
+    read = pd.read_parquet if ext == '.parquet' else pd.read_csv
+    frames = [read(path) for path in paths]
+    assert [len(df) for df in frames].count(0) == 2
+    assert all(list(df.columns) == COLUMNS for df in frames)
+    assert pd.concat(frames)['show_id'].tolist() == ['s0001', 's0002', 's0003']
+
+def test_empty_catalog(tmp_path):
+    path, = generate_catalog(str(tmp_path / 'catalog.csv'), 0)
+    assert list(pd.read_csv(path).columns) == COLUMNS
@@ -0,0 +1,31 @@
+import pandas as pd
+from data_loader import parse_duration, parse_date_added, add_derived_columns
+
+def test_parse_duration_mixed_formats():
+    duration = pd.Series(['90 min', '1 Season', '3 Seasons', ' 45 mins ', '120 Min.', '8 Episodes', None, 'min'],
+                         index=range(10, 18))
+    minutes, seasons = parse_duration(duration)
+    assert minutes.index.equals(duration.index)
+    assert minutes.tolist() == [90, pd.NA, pd.NA, 45, 120, pd.NA, pd.NA, pd.NA]
+    assert seasons.tolist() == [pd.NA, 1, 3, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA]
+    assert str(minutes.dtype) == 'Int32'
+
+def test_duration_columns_follow_the_title_type():
+    df = add_derived_columns(pd.DataFrame({'type': ['Movie', 'TV Show', 'Movie'],
+                                           'duration': ['95 min', '2 Seasons', '1 Season']}))
+    assert df['duration_minutes'].tolist() == [95, pd.NA, pd.NA]
+    assert df['duration_seasons'].tolist() == [pd.NA, 2, pd.NA]
+
+def test_parse_date_added_mixed_formats():
+    date_added = pd.Series(['September 25, 2021', ' August 4, 2020', 'May 1 2019', '2018-03-07',
+                            'September 25, 2021', '07/04/2017', 'not a date', None])
+    parsed = parse_date_added(date_added)
+    expected = pd.to_datetime(['2021-09-25', '2020-08-04', '2019-05-01', '2018-03-07',
+                               '2021-09-25', '2017-07-04', None, None])
+    assert parsed.tolist() == expected.tolist()
+    assert parsed.dtype == 'datetime64[ns]'
+
+def test_month_added_is_derived_from_the_parsed_date():
+    df = add_derived_columns(pd.DataFrame({'date_added': ['December 31, 2020', '2021-01-01', '']}))
+    assert df['month_added'].tolist()[:2] == [12, 1]
+    assert pd.isna(df['month_added'].iloc[2])
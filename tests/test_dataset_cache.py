@@ -0,0 +1,42 @@
+import os
+import shutil
+from dataset_cache import load_prepared_dataset, read_count_cube
+
+SHIPPED_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netflix_titles.csv')
+
+def test_cache_is_keyed_by_read_options(tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    shutil.copy(SHIPPED_CSV, path)
+
+    def load(**read_csv_kwargs):
+        df = load_prepared_dataset(path, report=False, **read_csv_kwargs)
+        return df.attrs['load_report']['engine'], list(df.columns)
+
+    engine, full_columns = load()
+    assert engine != 'feather cache'
+    assert load() == ('feather cache', full_columns)
+
+    engine, columns = load(usecols=['type', 'title', 'duration'])
+    assert engine != 'feather cache'
+    assert 'director' not in columns
+    # Same options in another order reuse that cache; the defaults don't
+    assert load(usecols=('duration', 'type', 'title')) == ('feather cache', columns)
+    assert load()[0] != 'feather cache'
+
+def test_options_that_cannot_change_the_frame_share_the_cache(tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    shutil.copy(SHIPPED_CSV, path)
+    load_prepared_dataset(path, report=False)
+    # run_analysis.py and data_visualization.py alternate without re-parsing
+    for read_csv_kwargs in [{'encoding': 'utf-8', 'on_bad_lines': 'skip'}, {}, {'encoding': 'UTF_8'}]:
+        df = load_prepared_dataset(path, report=False, **read_csv_kwargs)
+        assert df.attrs['load_report']['engine'] == 'feather cache'
+    assert load_prepared_dataset(path, report=False, encoding='latin-1').attrs['load_report']['engine'] != 'feather cache'
+
+def test_count_cube_is_read_with_the_load_options(tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    shutil.copy(SHIPPED_CSV, path)
+    load_prepared_dataset(path, report=False, na_values=['??'])
+    assert read_count_cube(path, na_values=['??']) is not None
+    # A cube written for other options is stale for a default load
+    assert read_count_cube(path) is None
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+import pytest
+from dataset_cache import load_prepared_dataset
+from aggregates import AggregationEngine
+from figure_cache import FigureCache, CACHE_DIR_ENV
+from data_visualization import render_visualizations
+
+SHIPPED_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netflix_titles.csv')
+
+@pytest.fixture(scope='module')
+def agg():
+    return AggregationEngine(load_prepared_dataset(SHIPPED_CSV, use_cache=False, report=False)).run()
+
+def test_cache_is_off_unless_asked_for(monkeypatch, tmp_path):
+    monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+    assert FigureCache.from_env() is None
+    monkeypatch.chdir(tmp_path)
+    assert FigureCache.from_env(enabled=True).directory == '.figure_cache'
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / 'tiles'))
+    assert FigureCache.from_env().directory == str(tmp_path / 'tiles')
+    monkeypatch.setenv(CACHE_DIR_ENV, '0')
+    assert FigureCache.from_env(enabled=True) is None
+
+def test_cached_figure_matches_uncached_tiled_figure(agg, tmp_path):
+    uncached = tmp_path / 'uncached.png'
+    render_visualizations(agg, str(uncached), show=False, workers=2, title='Spain', dpi=20)
+    cache = FigureCache(str(tmp_path / 'cache'))
+    cold, warm = tmp_path / 'cold.png', tmp_path / 'warm.png'
+    render_visualizations(agg, str(cold), show=False, title='Spain', dpi=20, cache=cache)
+    render_visualizations(agg, str(warm), show=False, title='Spain', dpi=20, cache=FigureCache(cache.directory))
+
+    untitled = tmp_path / 'untitled.png'
+    render_visualizations(agg, str(untitled), show=False, workers=2, dpi=20)
+    expected, panels = plt.imread(uncached), plt.imread(untitled)
+    # The title strip sits above the same panels
+    assert expected.shape[0] > panels.shape[0]
+    np.testing.assert_array_equal(expected[-panels.shape[0]:], panels)
+    assert (expected[:-panels.shape[0], :, :3] < 1).any()
+    np.testing.assert_array_equal(plt.imread(cold), expected)
+    np.testing.assert_array_equal(plt.imread(warm), expected)
+
+def test_title_change_rewrites_cached_figure(agg, tmp_path):
+    cache = FigureCache(str(tmp_path / 'cache'))
+    output = str(tmp_path / 'figure.png')
+    render_visualizations(agg, output, show=False, title='Spain', dpi=20, cache=cache)
+    spain = plt.imread(output)
+    render_visualizations(agg, output, show=False, title='India', dpi=20, cache=cache)
+    assert not np.array_equal(plt.imread(output), spain)
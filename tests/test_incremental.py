@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from create_dataset import generate_batch
+from aggregates import COUNT_FIELDS
+from streaming import stream_aggregates
+from incremental import update_aggregates
+
+def assert_same_aggregates(agg, expected):
+    assert agg.rows == expected.rows
+    for field in COUNT_FIELDS:
+        pd.testing.assert_series_equal(getattr(agg, field).sort_index(), getattr(expected, field).sort_index(),
+                                       check_names=False, obj=field)
+
+def test_appended_rows_match_a_full_run(tmp_path):
+    path = str(tmp_path / 'catalog.csv')
+    df = generate_batch(700, np.random.default_rng(5))
+    df.iloc[:400].to_csv(path, index=False)
+    agg, parsed = update_aggregates(path, chunksize=150, progress=False)
+    assert parsed == 400
+
+    df.iloc[400:].to_csv(path, mode='a', header=False, index=False)
+    agg, parsed = update_aggregates(path, chunksize=150, progress=False)
+    assert parsed == 300
+    assert_same_aggregates(agg, stream_aggregates(path, chunksize=150, progress=False))
+
+    # Nothing appended: the stored state is reused as is
+    assert update_aggregates(path, progress=False)[1] == 0
+
+def test_rewritten_file_is_aggregated_again(tmp_path):
+    path = str(tmp_path / 'catalog.csv')
+    df = generate_batch(300, np.random.default_rng(6))
+    df.to_csv(path, index=False)
+    update_aggregates(path, progress=False)
+
+    # An earlier row changed: not an append
+    changed = df.copy()
+    changed.loc[0, 'rating'] = 'R' if df.loc[0, 'rating'] != 'R' else 'PG'
+    changed.to_csv(path, index=False)
+    agg, parsed = update_aggregates(path, progress=False)
+    assert parsed == 300
+    assert_same_aggregates(agg, stream_aggregates(path, progress=False))
+
+def test_append_continuing_an_unterminated_row(tmp_path):
+    path = str(tmp_path / 'catalog.csv')
+    df = generate_batch(50, np.random.default_rng(7))
+    with open(path, 'w') as f:
+        f.write(df.to_csv(index=False).rstrip('\n'))
+    update_aggregates(path, progress=False)
+    # The appended bytes extend the last stored row, so that row has to be re-read
+    with open(path, 'a') as f:
+        f.write(' (Director\'s Cut)\n')
+    agg, parsed = update_aggregates(path, progress=False)
+    assert parsed == 50
+    assert_same_aggregates(agg, stream_aggregates(path, progress=False))
@@ -0,0 +1,58 @@
+import contextlib
+import json
+import time
+import tracemalloc
+import pytest
+import profiling
+from profiling import StageProfiler, LapTimer
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setattr(profiling, '_profiler', None)
+    return profiling.enable(memory=False, dump='cprofile')
+
+def test_stages_are_free_when_profiling_is_off(monkeypatch):
+    monkeypatch.setattr(profiling, '_profiler', None)
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    assert profiling.configure() is None
+    assert isinstance(profiling.stage('load'), contextlib.nullcontext)
+
+def test_nested_and_repeated_stages(profiler, tmp_path):
+    with profiling.stage('load'):
+        for _ in range(3):
+            with profiling.stage('chunk'):
+                pass
+        with profiling.stage('slow'):
+            time.sleep(0.02)
+    lap = LapTimer('render')
+    lap('panel 01')
+    lap('panel 02')
+    lap.stop()
+
+    summary = {row['path']: row for row in profiler.summary()}
+    assert list(summary) == ['load', 'load/chunk', 'load/slow', 'render', 'render/panel 01', 'render/panel 02']
+    assert summary['load/chunk']['calls'] == 3
+    assert summary['load']['seconds'] >= summary['load/slow']['seconds'] >= 0.02
+
+    trace = json.load(open(profiler.write_trace(str(tmp_path / 'trace.json'))))
+    assert len(trace['traceEvents']) == 8
+    assert {event['ph'] for event in trace['traceEvents']} == {'X'}
+    # The slowest leaf stage gets the cProfile dump
+    assert profiler.write_dump(str(tmp_path / 'trace.json')).endswith('.load.slow.prof')
+
+def test_memory_peak_of_a_stage():
+    profiler = StageProfiler(memory=True)
+    try:
+        with profiler.stage('allocate'):
+            block = bytearray(8 << 20)
+            del block
+    finally:
+        # Tracing slows everything after it, including forked workers of later tests
+        tracemalloc.stop()
+    record, = profiler.records
+    assert record['peak_mb'] >= 8
+    assert record['allocated_mb'] < 1
+
+def test_unknown_dump_format():
+    with pytest.raises(ValueError):
+        StageProfiler(dump='perf')
@@ -0,0 +1,12 @@
+import os
+import pandas as pd
+import run_analysis
+
+SHIPPED_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netflix_titles.csv')
+
+def test_catalog_without_movies(tmp_path, monkeypatch):
+    df = pd.read_csv(SHIPPED_CSV)
+    df[df['type'] == 'TV Show'].to_csv(tmp_path / 'netflix_titles.csv', index=False)
+    monkeypatch.chdir(tmp_path)
+    run_analysis.main()
+    assert (tmp_path / 'netflix_analysis.png').exists()
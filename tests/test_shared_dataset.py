@@ -0,0 +1,57 @@
+import os
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from dataset_cache import load_prepared_dataset, cache_paths
+from shared_dataset import SharedDataset, call_with_dataset
+from batch_reports import run_batch
+
+SHIPPED_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'netflix_titles.csv')
+
+def prepared(tmp_path):
+    path = str(tmp_path / 'netflix_titles.csv')
+    shutil.copy(SHIPPED_CSV, path)
+    return path, load_prepared_dataset(path, report=False)
+
+def summary(df):
+    """Process-independent digest of the frame a worker sees"""
+    return (len(df), df['type'].value_counts().to_dict(), int(df['duration_minutes'].sum()),
+            df['date_added_clean'].isna().sum(), df['title'].iloc[-1])
+
+def test_published_view_matches_the_frame(tmp_path):
+    _, df = prepared(tmp_path)
+    df.loc[3, 'duration_minutes'] = pd.NA
+    with SharedDataset.publish(df, str(tmp_path)) as dataset:
+        view = dataset.attach()
+        pd.testing.assert_frame_equal(view, df.reset_index(drop=True), check_dtype=False)
+        assert isinstance(view['type'].dtype, pd.CategoricalDtype)
+        assert view['duration_minutes'].isna().sum() == df['duration_minutes'].isna().sum()
+        # Numbers are read-only views of the mapped file, not copies
+        assert not view['release_year'].to_numpy().flags.writeable
+        path = dataset.path
+    assert not os.path.exists(path)
+
+def test_workers_see_the_same_frame(tmp_path):
+    path, df = prepared(tmp_path)
+    with SharedDataset.from_cache(path, df) as dataset, ProcessPoolExecutor(max_workers=2) as pool:
+        # A current cache file is shared as is, never copied or deleted
+        assert dataset.path == cache_paths(path)[0] and not dataset.owned
+        assert not pickle.loads(pickle.dumps(dataset)).owned
+        assert pool.submit(call_with_dataset, dataset, summary).result() == summary(df)
+    assert os.path.exists(cache_paths(path)[0])
+
+def test_stale_cache_is_published_instead(tmp_path):
+    path, df = prepared(tmp_path)
+    with SharedDataset.from_cache(path, df.iloc[:10]) as dataset:
+        assert dataset.owned and dataset.rows == 10
+
+def test_parallel_batch_matches_serial(tmp_path):
+    path, df = prepared(tmp_path)
+    slices = [{'type': 'Movie'}, {'type': 'TV Show'}, {'rating': 'TV-MA'}]
+    serial = run_batch(slices, path, str(tmp_path / 'serial'), workers=1, progress=False)
+    parallel = run_batch(slices, path, str(tmp_path / 'parallel'), workers=2, progress=False)
+    assert list(serial) == list(parallel)
+    for name in serial:
+        with open(serial[name], 'rb') as a, open(parallel[name], 'rb') as b:
+            assert a.read() == b.read()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from similar_titles import (feature_vectors, top_k_neighbors, neighbor_blocks, write_similar_titles,
+                            read_similar_titles, similar_to)
+
+CATALOG = pd.DataFrame({
+    'show_id': [f's{i}' for i in range(1, 9)],
+    'title': ['Heist One', 'Heist Two', 'Heist Three', 'Space Saga', 'Space Saga II', 'Baking Show',
+              'Baking Show Kids', 'Lonely Doc'],
+    'listed_in': ['Thrillers, Action & Adventure', 'Thrillers, Action & Adventure', 'Thrillers, Dramas',
+                  'Sci-Fi & Fantasy, Action & Adventure', 'Sci-Fi & Fantasy', 'Reality TV', 'Reality TV, Kids\' TV',
+                  'Documentaries'],
+    'cast': ['Ana Ruiz, Ben Cole', 'Ana Ruiz, Cara Diaz', 'Ben Cole', 'Dan Eze, Eva Fox', 'Dan Eze',
+             'Gil Hart', 'Gil Hart, Ivy Jones', None],
+    'director': ['Kim Lee', 'Kim Lee', None, 'Max Ng', 'Max Ng', None, None, 'Ola Park'],
+    'country': ['Spain', 'Spain, France', 'France', 'United States', 'United States', 'United Kingdom',
+                'United Kingdom', 'Norway'],
+})
+
+def brute_force(vectors, k):
+    """Exact cosine top-k of every title from the dense similarity matrix"""
+    dense = vectors.toarray().astype(np.float64)
+    scores = dense @ dense.T
+    np.fill_diagonal(scores, 0)
+    neighbors = {}
+    for row in range(len(scores)):
+        candidates = [(-scores[row, other], other) for other in range(len(scores)) if scores[row, other] > 1e-9]
+        neighbors[row] = [other for _, other in sorted(candidates)[:k]]
+    return neighbors
+
+def test_top_k_matches_brute_force():
+    vectors = feature_vectors(CATALOG)
+    assert np.allclose(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel(), 1, atol=1e-5)
+    expected = brute_force(vectors, 3)
+    rows, neighbors, scores = top_k_neighbors(vectors, 0, len(CATALOG), 3)
+    for row in range(len(CATALOG)):
+        assert neighbors[rows == row].tolist() == expected[row]
+    assert (scores > 0).all() and (np.diff(scores[rows == 0]) <= 0).all()
+    # The lone documentary shares nothing with anyone
+    assert 7 not in rows and 7 not in neighbors
+
+def test_blocks_and_workers_agree():
+    vectors = feature_vectors(CATALOG)
+    whole = top_k_neighbors(vectors, 0, len(CATALOG), 2)
+    for workers in (1, 2):
+        blocks = list(neighbor_blocks(vectors, k=2, block=3, workers=workers))
+        assert len(blocks) == 3
+        for combined, part in zip(whole, (np.concatenate(parts) for parts in zip(*blocks))):
+            np.testing.assert_array_equal(combined, part)
+
+def test_write_and_look_up(tmp_path):
+    path = str(tmp_path / 'similar.feather')
+    written = write_similar_titles(CATALOG, path, k=2, block=4, progress=False)
+    table = read_similar_titles(path)
+    assert len(table) == written
+    heist = table[table['show_id'] == 's1']
+    assert heist['rank'].tolist() == [1, 2]
+    assert heist['neighbor_show_id'].tolist()[0] == 's2'
+
+    similar = similar_to(CATALOG, 'Space Saga', k=1)
+    assert similar['title'].tolist() == ['Space Saga II']
+    assert similar_to(CATALOG, 'Missing Title').empty
@@ -0,0 +1,66 @@
+import math
+import numpy as np
+import pandas as pd
+from sketches import SpaceSaving, CountMinSketch, HyperLogLog, SketchConfig
+
+def zipf_chunks(n_chunks=8, size=20_000, seed=0):
+    """Exact value counts of chunks drawn from a skewed distribution, plus their sum"""
+    rng = np.random.default_rng(seed)
+    chunks = [pd.Series(rng.zipf(1.3, size) % 50_000).astype(str).value_counts() for _ in range(n_chunks)]
+    return chunks, pd.concat(chunks).groupby(level=0).sum()
+
+def test_space_saving_error_bounds():
+    chunks, exact = zipf_chunks()
+    summary = SpaceSaving(200)
+    for counts in chunks:
+        summary.merge(SpaceSaving(200).update(counts))
+    assert summary.total == exact.sum()
+    true = exact.reindex(summary.counts.index)
+    # Counts never undercount, and overcount by at most their recorded error, itself at most N / capacity
+    assert (summary.counts >= true).all()
+    assert (summary.counts - summary.errors <= true).all()
+    assert summary.errors.max() <= summary.total / summary.capacity
+    # Every value above the N / capacity threshold is monitored
+    assert set(exact[exact > summary.total / summary.capacity].index) <= set(summary.counts.index)
+
+def test_count_min_never_undercounts():
+    chunks, exact = zipf_chunks()
+    epsilon, delta = 0.001, 0.01
+    sketch = CountMinSketch.from_error(epsilon, delta)
+    for counts in chunks[:4]:
+        sketch.update(counts)
+    other = CountMinSketch.from_error(epsilon, delta)
+    for counts in chunks[4:]:
+        other.update(counts)
+    sketch.merge(other)
+    estimate = sketch.estimate(exact.index)
+    assert (estimate >= exact.to_numpy()).all()
+    assert np.mean(estimate - exact.to_numpy() > epsilon * sketch.total) <= delta
+
+def test_hyperloglog_error_and_merge():
+    values = np.arange(200_000).astype(str)
+    sketch = HyperLogLog.from_error(0.01)
+    left, right = HyperLogLog(sketch.precision), HyperLogLog(sketch.precision)
+    sketch.update(values)
+    left.update(values[:120_000])
+    right.update(values[80_000:])
+    # Merging overlapping halves is the same as sketching the union
+    assert np.array_equal(left.merge(right).registers, sketch.registers)
+    standard_error = 1.04 / math.sqrt(len(sketch.registers))
+    assert abs(sketch.estimate() / len(values) - 1) < 3 * standard_error
+
+def test_hyperloglog_small_range():
+    sketch = HyperLogLog(14).update(['a', 'b', 'c', 'a'])
+    assert round(sketch.estimate()) == 3
+
+def test_column_sketch_within_its_error_bounds():
+    chunks, exact = zipf_chunks(seed=1)
+    config = SketchConfig(top_k_error=0.005, distinct_error=0.02)
+    sketch = config.new_sketch()
+    for counts in chunks:
+        sketch.merge(config.new_sketch().update(counts))
+    bounds = sketch.error_bounds()
+    top = sketch.top_counts(20)
+    overcount = top - exact.reindex(top.index)
+    assert (overcount >= 0).all() and (overcount <= bounds['count_overestimate']).all()
+    assert abs(sketch.distinct_count() / len(exact) - 1) < 3 * bounds['distinct_relative_error']
@@ -0,0 +1,53 @@
+import pandas as pd
+from text_index import TextIndex, parse_query
+
+CATALOG = pd.DataFrame({
+    'title': ['The Great Heist', 'Heist Night', 'Bank Job', 'Space Robbery', 'Sci-Fi Nights', None],
+    'description': [
+        'A crew plans the great bank heist of the decade.',
+        "Robbers don't sleep: a night-long bank heist goes wrong.",
+        'An inside job at a small-town bank.',
+        'A robbery in orbit, heist style.',
+        'An anthology of sci-fi stories told at night.',
+        'A documentary about heist movies.',
+    ],
+})
+
+def test_and_or_and_phrase_queries():
+    index = TextIndex.from_frame(CATALOG)
+    assert index.rows('heist').tolist() == [0, 1, 3, 5]
+    assert index.rows('bank heist').tolist() == [0, 1]
+    assert index.rows('bank AND job').tolist() == [2]
+    assert index.rows('robbery OR robbers').tolist() == [1, 3]
+    assert index.rows('"bank heist"').tolist() == [0, 1]
+    assert index.rows('"heist bank"').tolist() == []
+    # Case, apostrophes and hyphens are tokenized like the indexed text
+    assert index.rows('DONT').tolist() == [1]
+    assert index.rows('sci-fi').tolist() == [4]
+    assert index.rows('unknown').tolist() == []
+
+def test_phrases_stay_inside_one_column():
+    index = TextIndex.from_frame(pd.DataFrame({'title': ['Heist'], 'description': ['Night at the museum']}))
+    assert index.rows('"heist night"').tolist() == []
+    assert index.rows('heist night').tolist() == [0]
+
+def test_bm25_ranks_focused_matches_first():
+    index = TextIndex.from_frame(CATALOG)
+    ranked = index.search('heist')
+    assert sorted(ranked.index) == [0, 1, 3, 5]
+    # A title match plus a description match beats one mention in a longer text
+    assert ranked.index[0] in (0, 1)
+    assert ranked.iloc[-1] < ranked.iloc[0]
+    assert len(index.search('heist', limit=2)) == 2
+
+def test_parse_query():
+    assert parse_query('bank "great heist" OR robbery') == [[['bank'], ['great', 'heist']], [['robbery']]]
+
+def test_save_and_load(tmp_path):
+    index = TextIndex.from_frame(CATALOG)
+    path = str(tmp_path / 'text.npz')
+    index.save(path, 'abc')
+    assert TextIndex.load(path, 'other') is None
+    loaded = TextIndex.load(path, 'abc')
+    assert loaded.rows('"bank heist" OR orbit').tolist() == [0, 1, 3]
+    pd.testing.assert_series_equal(loaded.search('heist'), index.search('heist'))
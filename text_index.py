@@ -0,0 +1,294 @@
+"""
+Full-text inverted index over the title and description columns
+Each term maps to the rows containing it (with term frequencies) and to its positions in every
+row, so keyword, AND/OR and phrase lookups cost O(postings) instead of a str.contains scan of
+every description; matches are ranked with BM25 and come back as row ids
+"""
+
+import argparse
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from data_loader import DATASET_PATH, HAS_PYARROW
+from multivalue import _encode
+from profiling import stage
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+# Bump whenever tokenization or the file layout change so stored indexes are rebuilt
+TEXT_INDEX_VERSION = 1
+
+# Indexed columns, in position order: a phrase never spans from one column into the next
+TEXT_COLUMNS = ['title', 'description']
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Letters and digits form terms; apostrophes are dropped so "don't" matches "dont"
+APOSTROPHES = "['’]"
+ARROW_SEPARATORS = r'[^\p{L}\p{N}]+'
+PYTHON_SEPARATORS = r'[\W_]+'
+
+def _tokenize_arrow(values):
+    """Lowercase and split strings with Arrow kernels; returns (value positions, terms)"""
+    values = pa.array(values, from_pandas=True)
+    if not pa.types.is_string(values.type):
+        values = values.cast(pa.string())
+    values = pc.replace_substring_regex(pc.utf8_lower(values), pattern=APOSTROPHES, replacement='')
+    lists = pc.split_pattern_regex(values, pattern=ARROW_SEPARATORS)
+    parents = pc.list_parent_indices(lists)
+    terms = pc.list_flatten(lists)
+    keep = pc.not_equal(terms, '')
+    return (pc.filter(parents, keep).to_numpy(),
+            pc.filter(terms, keep).to_numpy(zero_copy_only=False).astype(object))
+
+def _tokenize_pandas(values):
+    """Lowercase and split strings with pandas str methods; returns (value positions, terms)"""
+    terms = (pd.Series(values, dtype=object).reset_index(drop=True).str.lower()
+             .str.replace(APOSTROPHES, '', regex=True).str.split(PYTHON_SEPARATORS, regex=True).explode())
+    terms = terms[terms.notna() & (terms != '')]
+    return terms.index.to_numpy(), terms.to_numpy(dtype=object)
+
+def tokenize(series):
+    """Terms of a text column as (row positions, terms, position of each term within its row)
+
+    Only the distinct values are tokenized; their terms are expanded back to rows through the codes.
+    """
+    codes, distinct = _encode(series)
+    if len(distinct) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+    tokenizer = _tokenize_arrow if HAS_PYARROW else _tokenize_pandas
+    value_rows, value_terms = tokenizer(distinct)
+    per_value = np.bincount(value_rows, minlength=len(distinct))
+    value_starts = np.concatenate([[0], np.cumsum(per_value)[:-1]])
+
+    present = codes >= 0
+    safe_codes = np.where(present, codes, 0)
+    per_row = np.where(present, per_value[safe_codes], 0)
+    rows = np.repeat(np.arange(len(series)), per_row)
+    positions = np.arange(len(rows)) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+    take = np.repeat(value_starts[safe_codes], per_row) + positions
+    return rows, value_terms[take], positions
+
+def query_terms(text):
+    """Terms of a query string, tokenized exactly like the indexed columns"""
+    return list(tokenize(pd.Series([text], dtype=object))[1])
+
+def parse_query(query):
+    """Parse a query into OR-ed clauses, each a list of AND-ed phrases (lists of terms)
+
+    Words are AND-ed, OR (upper case) separates alternatives and "double quotes" make a phrase;
+    a word that splits into several terms (e.g. "sci-fi") is matched as a phrase.
+    """
+    clauses, clause = [], []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        if word == 'OR':
+            clauses.append(clause)
+            clause = []
+        elif word != 'AND':
+            terms = query_terms(phrase or word)
+            if terms:
+                clause.append(terms)
+    clauses.append(clause)
+    return [clause for clause in clauses if clause]
+
+class TextIndex:
+    """Term -> rows (with term frequencies) and (term, row) -> positions, in CSR arrays
+
+    Postings of term i are offsets[i]:offsets[i + 1] of posting_rows/term_frequencies; positions of
+    posting j are position_offsets[j]:position_offsets[j + 1] of positions.
+    """
+
+    def __init__(self, terms, offsets, posting_rows, term_frequencies, position_offsets, positions,
+                 doc_lengths):
+        self.terms = terms
+        self.offsets = offsets
+        self.posting_rows = posting_rows
+        self.term_frequencies = term_frequencies
+        self.position_offsets = position_offsets
+        self.positions = positions
+        self.doc_lengths = doc_lengths
+        self.n_rows = len(doc_lengths)
+        self.average_length = float(doc_lengths.mean()) if self.n_rows and doc_lengths.any() else 1.0
+        self._positions = pd.Series(np.arange(len(terms)), index=terms)
+
+    @classmethod
+    def from_frame(cls, df, columns=TEXT_COLUMNS):
+        """Index the text columns present in a DataFrame"""
+        n_rows = len(df)
+        doc_lengths = np.zeros(n_rows, dtype=np.int64)
+        parts = []
+        for column in columns:
+            if column not in df.columns:
+                continue
+            with stage(f'tokenize {column}'):
+                rows, terms, positions = tokenize(df[column])
+            # Positions continue after the previous column, with a gap so phrases stay inside one column
+            parts.append((rows, terms, positions + np.where(doc_lengths > 0, doc_lengths + 1, 0)[rows]))
+            doc_lengths += np.bincount(rows, minlength=n_rows)
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(pd.Index([], dtype=object, name='term'), np.zeros(1, dtype=np.int64), empty, empty,
+                       np.zeros(1, dtype=np.int64), empty, doc_lengths)
+
+        with stage('text_postings'):
+            rows = np.concatenate([part[0] for part in parts])
+            codes, terms = pd.factorize(np.concatenate([part[1] for part in parts]))
+            positions = np.concatenate([part[2] for part in parts])
+            order = np.lexsort((positions, rows, codes))
+            rows, codes, positions = rows[order], codes[order], positions[order]
+            # One posting per (term, row) run
+            starts = np.flatnonzero(np.concatenate([[True], (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])]))
+            position_offsets = np.append(starts, len(rows))
+            posting_codes = codes[starts]
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(posting_codes, minlength=len(terms)))])
+        return cls(pd.Index(np.asarray(terms, dtype=object), name='term'), offsets, rows[starts],
+                   np.diff(position_offsets), position_offsets, positions, doc_lengths)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        return term in self._positions.index
+
+    def _postings(self, term):
+        """Slice of the posting arrays of one term (empty when the term is unknown)"""
+        i = self._positions.get(term)
+        if i is None:
+            return slice(0, 0)
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def term_rows(self, term):
+        """Sorted row ids containing a term"""
+        return self.posting_rows[self._postings(term)]
+
+    def phrase_rows(self, terms):
+        """Sorted row ids containing the terms next to each other, in order"""
+        if len(terms) == 1:
+            return self.term_rows(terms[0])
+        if len(self.positions) == 0:
+            return np.empty(0, dtype=np.int64)
+        # Candidate rows hold every term; then (row, start position) keys are intersected term by term
+        stride = int(self.positions.max()) + len(terms) + 1
+        keys = None
+        for shift, term in enumerate(terms):
+            postings = self._postings(term)
+            rows = np.repeat(self.posting_rows[postings], self.term_frequencies[postings])
+            starts = self.positions[self.position_offsets[postings.start]:self.position_offsets[postings.stop]]
+            term_keys = rows * stride + (starts - shift + len(terms))
+            keys = term_keys if keys is None else np.intersect1d(keys, term_keys)
+            if len(keys) == 0:
+                break
+        return np.unique(keys // stride)
+
+    def rows(self, query):
+        """Sorted row ids matching a query (see parse_query for the syntax)"""
+        matched = [self._clause_rows(clause) for clause in parse_query(query)]
+        if not matched:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(matched)) if len(matched) > 1 else matched[0]
+
+    def _clause_rows(self, clause):
+        # Rarest phrase first keeps the intersections small
+        clause = sorted(clause, key=lambda terms: min(self._document_frequency(term) for term in terms))
+        rows = None
+        for terms in clause:
+            matched = self.phrase_rows(terms)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
+
+    def _document_frequency(self, term):
+        postings = self._postings(term)
+        return postings.stop - postings.start
+
+    def bm25(self, terms, rows):
+        """BM25 score of each of the given sorted rows for a bag of query terms"""
+        scores = np.zeros(len(rows))
+        if len(rows) == 0:
+            return scores
+        for term in set(terms):
+            postings = self._postings(term)
+            document_frequency = postings.stop - postings.start
+            if document_frequency == 0:
+                continue
+            idf = np.log(1 + (self.n_rows - document_frequency + 0.5) / (document_frequency + 0.5))
+            posting_rows = self.posting_rows[postings]
+            at = np.minimum(np.searchsorted(rows, posting_rows), len(rows) - 1)
+            hit = rows[at] == posting_rows
+            tf = self.term_frequencies[postings][hit]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[posting_rows[hit]] / self.average_length)
+            scores[at[hit]] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query, limit=None):
+        """Matching row ids ranked by BM25, as a Series of scores indexed by row id (best first)"""
+        with stage('text_search'):
+            rows = self.rows(query)
+            terms = [term for clause in parse_query(query) for phrase in clause for term in phrase]
+            scores = self.bm25(terms, rows)
+            order = np.lexsort((rows, -scores))[:limit]
+        return pd.Series(scores[order], index=pd.Index(rows[order], name='row'), name='score')
+
+    def save(self, path, dataset_sha256=None):
+        """Write the index as an .npz file (atomically), tagged with the dataset it was built from"""
+        tmp_path = path + '.tmp'
+        meta = {
+            'version': TEXT_INDEX_VERSION,
+            'dataset_sha256': dataset_sha256,
+            'terms': self.terms.tolist(),
+        }
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, offsets=self.offsets, posting_rows=self.posting_rows,
+                     term_frequencies=self.term_frequencies, position_offsets=self.position_offsets,
+                     positions=self.positions, doc_lengths=self.doc_lengths, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, dataset_sha256=None):
+        """Read an index written by save(); None when it is from another version or dataset"""
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != TEXT_INDEX_VERSION or meta.get('dataset_sha256') != dataset_sha256:
+                return None
+            return cls(pd.Index(meta['terms'], dtype=object, name='term'), data['offsets'], data['posting_rows'],
+                       data['term_frequencies'], data['position_offsets'], data['positions'], data['doc_lengths'])
+
+def filter_by_text(df, query, index=None):
+    """Rows of df matching a full-text query, in row order"""
+    if index is None:
+        index = TextIndex.from_frame(df)
+    return df.iloc[index.rows(query)]
+
+def main():
+    """Search the catalog and optionally render the report of the matching titles"""
+    from dataset_cache import load_prepared_dataset, load_text_index
+    parser = argparse.ArgumentParser(description='Full-text search over Netflix titles and descriptions')
+    parser.add_argument('query', help='words are AND-ed; use OR between alternatives and "quotes" for phrases')
+    parser.add_argument('--path', default=DATASET_PATH, help='catalog CSV file')
+    parser.add_argument('--limit', type=int, default=10, help='best matches to list')
+    parser.add_argument('--report', help='render the full report of every match to this PNG')
+    args = parser.parse_args()
+
+    df = load_prepared_dataset(args.path)
+    index = load_text_index(args.path, df)
+    hits = index.search(args.query)
+    print(f"\n🔍 {len(hits):,} titles match {args.query!r}")
+    for row, score in hits.head(args.limit).items():
+        print(f"   {score:6.2f}  {df['title'].iat[row]}")
+
+    if args.report and len(hits):
+        from aggregates import AggregationEngine
+        from data_visualization import render_visualizations
+        agg = AggregationEngine(df.take(np.sort(hits.index.to_numpy())).reset_index(drop=True)).run()
+        render_visualizations(agg, output_path=args.report, title=args.query)
+        print(f"✅ Report saved as '{args.report}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Inverted index over a multi-valued column (listed_in, country)
+Maps each value (a genre, a country) to the row positions listing it, so lookups are exact and cost O(matches)
+"""
+
+import numpy as np
+import pandas as pd
+from multivalue import split_multivalued, unique_row_codes, _encode
+
+class TokenIndex:
+    """Exact value -> row position index over a multi-valued column (genres in listed_in, countries, ...)"""
+
+    def __init__(self, column, sep=',', name=None):
+        self._build(split_multivalued(column, sep), len(column), name or column.name)
+
+    @classmethod
+    def from_tokens(cls, tokens, n_rows, name=None):
+        """Build the index from a column already split by split_multivalued"""
+        index = cls.__new__(cls)
+        index._build(tokens, n_rows, name or tokens.name)
+        return index
+
+    def _build(self, tokens, n_rows, name):
+        codes, values = pd.factorize(tokens.array)
+        rows, codes = unique_row_codes(tokens.index.to_numpy(), codes)
+
+        # CSR layout: row ids grouped by value code, offsets[i]:offsets[i + 1] belong to value i
+        order = np.argsort(codes, kind='stable')
+        self.row_ids = rows[order]
+        self.codes = codes[order]
+        self.values = pd.Index(np.asarray(values, dtype=object), name=name)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.codes, minlength=len(values)))])
+        self.n_rows = n_rows
+        self._positions = {value: i for i, value in enumerate(self.values)}
+
+    def __contains__(self, value):
+        return value in self._positions
+
+    def rows(self, value):
+        """Row positions of titles listing exactly this value"""
+        i = self._positions.get(value)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+        return self.row_ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def rows_any(self, values):
+        """Row positions of titles listing any of the given values"""
+        parts = [self.rows(value) for value in values]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def counts(self):
+        """Number of titles per value, most common first"""
+        counts = pd.Series(np.diff(self.offsets), index=self.values, name='count')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def top(self, k):
+        """The k most common values"""
+        return self.counts().head(k)
+
+    def cross_counts(self, column):
+        """Titles per (value, column value) pair for a row-aligned column, as one bincount over integer codes"""
+        column_codes, distinct = _encode(column)
+        column_codes = column_codes[self.row_ids]
+        present = column_codes >= 0
+        n_distinct = len(distinct)
+        pair_codes = self.codes[present].astype(np.int64) * n_distinct + column_codes[present]
+        counts = np.bincount(pair_codes, minlength=len(self.values) * n_distinct)
+        pairs = np.flatnonzero(counts)
+        index = pd.MultiIndex.from_arrays(
+            [self.values[pairs // n_distinct], np.asarray(distinct, dtype=object)[pairs % n_distinct]],
+            names=[self.values.name, column.name])
+        return pd.Series(counts[pairs], index=index, name='count').sort_index()
+
+def filter_by_genre(df, genres, index=None):
+    """Rows of df listed under any of the given genres (a name or a list of names)"""
+    if isinstance(genres, str):
+        genres = [genres]
+    if index is None:
+        index = TokenIndex(df['listed_in'], name='genre')
+    elif not isinstance(index, TokenIndex):
+        # Shared CatalogTokens for df
+        index = index.genre_index()
+    return df.iloc[index.rows_any(genres)]